@@ -0,0 +1,123 @@
+"""
+Validation harness for the YOLO detector backends against the PyTorch baseline.
+
+Every page of the sample PDFs is rendered once and detected with each backend.
+Boxes are matched to the PyTorch boxes by IoU; the report lists mean IoU,
+class agreement on matched boxes, match recall/precision, model load time
+and detection speedup. Backends are given as NAME or NAME:int8.
+
+    python benchmarks/bench_backends.py onnx onnx:int8 openvino
+"""
+import argparse
+import time
+from pathlib import Path
+
+import numpy as np
+
+from common import DEFAULT_MODEL, SAMPLE_INPUT, load_extractor
+
+
+def iou(a, b):
+    x1, y1 = max(a[0], b[0]), max(a[1], b[1])
+    x2, y2 = min(a[2], b[2]), min(a[3], b[3])
+    inter = max(0, x2 - x1) * max(0, y2 - y1)
+    union = (a[2] - a[0]) * (a[3] - a[1]) + (b[2] - b[0]) * (b[3] - b[1]) - inter
+    return inter / union if union > 0 else 0.0
+
+
+def match_boxes(reference, candidate, threshold):
+    """Greedy one-to-one matching by IoU; returns [(reference box, candidate box, iou)]"""
+    pairs = sorted(((iou(r["bbox"], c["bbox"]), i, j)
+                    for i, r in enumerate(reference) for j, c in enumerate(candidate)), reverse=True)
+    used_ref, used_cand, matches = set(), set(), []
+    for score, i, j in pairs:
+        if score < threshold:
+            break
+        if i in used_ref or j in used_cand:
+            continue
+        used_ref.add(i)
+        used_cand.add(j)
+        matches.append((reference[i], candidate[j], score))
+    return matches
+
+
+def load_backend(extractor, model_path, backend, int8):
+    """Export if needed, then time loading the model plus one warm-up forward pass"""
+    from extract_outline_docker import _yolo_class, detector_weights
+
+    config = {"model": {"backend": backend, "int8": int8}}
+    start = time.perf_counter()
+    path = detector_weights(model_path, config)
+    export_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    model = _yolo_class()(str(path), task="detect")
+    if backend == "torch":
+        model.to("cpu")
+    model(np.full((640, 640, 3), 255, dtype=np.uint8), device="cpu", verbose=False)
+    load_time = time.perf_counter() - start
+    extractor.model = model
+    return path, export_time, load_time
+
+
+def detect_all(extractor, images):
+    start = time.perf_counter()
+    boxes = []
+    for i in range(0, len(images), extractor.batch_size):
+        batch = [{"page": i + j + 1, "image": img, "boxes": [], "error": None}
+                 for j, img in enumerate(images[i:i + extractor.batch_size])]
+        boxes.extend(r["boxes"] for r in extractor.detect_batch(batch))
+    return boxes, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("backends", nargs="*", default=["onnx", "onnx:int8"])
+    parser.add_argument("--input", default=str(SAMPLE_INPUT))
+    parser.add_argument("--batch-size", type=int, default=1)
+    parser.add_argument("--iou", type=float, default=0.5, help="IoU needed for two boxes to match")
+    parser.add_argument("--model", default=str(DEFAULT_MODEL))
+    args = parser.parse_args()
+
+    extractor = load_extractor(args.model, load_models=False,
+                               config={"performance": {"batch_size": args.batch_size}})
+    images = [img for pdf in sorted(Path(args.input).glob("*.pdf"))
+              for _, img in extractor.iter_page_images(pdf)]
+    print(f"{len(images)} page(s) from {args.input}")
+
+    _, _, torch_load = load_backend(extractor, args.model, "torch", False)
+    reference, torch_time = detect_all(extractor, images)
+    ref_count = sum(len(b) for b in reference)
+
+    print(f"\n{'backend':<14} {'size MB':>8} {'export':>8} {'load':>7} {'pages/s':>8} {'speedup':>8} "
+          f"{'mean IoU':>9} {'class agr':>10} {'recall':>7} {'precision':>10}")
+    print(f"{'torch':<14} {Path(args.model).stat().st_size / 1e6:>8.1f} {'-':>8} {torch_load:>6.2f}s "
+          f"{len(images) / torch_time:>8.2f} {1.0:>7.2f}x {1.0:>9.3f} {1.0:>10.3f} {1.0:>7.2f} {1.0:>10.2f}")
+
+    for spec in args.backends:
+        backend, _, flag = spec.partition(":")
+        int8 = flag == "int8"
+        try:
+            path, export_time, load_time = load_backend(extractor, args.model, backend, int8)
+        except Exception as e:
+            print(f"{spec:<14} unavailable: {e}")
+            continue
+        candidate, elapsed = detect_all(extractor, images)
+
+        matches = [m for ref, cand in zip(reference, candidate)
+                   for m in match_boxes(ref, cand, args.iou)]
+        cand_count = sum(len(b) for b in candidate)
+        mean_iou = sum(score for _, _, score in matches) / len(matches) if matches else 0.0
+        agreement = (sum(r["class_name"] == c["class_name"] for r, c, _ in matches) / len(matches)
+                     if matches else 0.0)
+        recall = len(matches) / ref_count if ref_count else 1.0
+        precision = len(matches) / cand_count if cand_count else 1.0
+        size = (sum(f.stat().st_size for f in path.rglob("*") if f.is_file())
+                if path.is_dir() else path.stat().st_size)
+        print(f"{spec:<14} {size / 1e6:>8.1f} {export_time:>7.2f}s {load_time:>6.2f}s "
+              f"{len(images) / elapsed:>8.2f} {torch_time / elapsed:>7.2f}x {mean_iou:>9.3f} "
+              f"{agreement:>10.3f} {recall:>7.2f} {precision:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+"""
+Throughput benchmark for batched YOLO detection, in pages per second.
+
+Detection-only numbers time `detect_batch` on pre-rendered pages; pipeline
+numbers run the full streaming render/detect/OCR pipeline.
+
+    python benchmarks/bench_batching.py --pages 64 --batch-sizes 1 2 4 8 --threads 4
+"""
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+from common import DEFAULT_MODEL, load_extractor, make_synthetic_pdf
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--pages", type=int, default=64)
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--threads", type=int, default=0, help="Torch/OpenCV threads (0 = default)")
+    parser.add_argument("--documents", type=int, default=4,
+                        help="Split the pages over this many PDFs for the cross-document run")
+    parser.add_argument("--model", default=str(DEFAULT_MODEL))
+    args = parser.parse_args()
+
+    extractor = load_extractor(args.model, config={"performance": {"cpu_threads": args.threads}})
+
+    with tempfile.TemporaryDirectory() as tmp:
+        pdf_path = make_synthetic_pdf(Path(tmp) / "synthetic.pdf", args.pages)
+        per_doc = max(1, args.pages // args.documents)
+        doc_paths = [make_synthetic_pdf(Path(tmp) / f"doc_{i}.pdf", per_doc, seed=i)
+                     for i in range(args.documents)]
+        images = [img for _, img in extractor.iter_page_images(pdf_path)]
+
+        print(f"{'batch':>6} {'detect pages/s':>15} {'pipeline pages/s':>17} {'cross-doc pages/s':>18}")
+        for batch_size in args.batch_sizes:
+            extractor.batch_size = batch_size
+
+            start = time.perf_counter()
+            for i in range(0, len(images), batch_size):
+                batch = [{"page": i + j + 1, "image": img, "boxes": [], "error": None}
+                         for j, img in enumerate(images[i:i + batch_size])]
+                extractor.detect_batch(batch)
+            detect_rate = len(images) / (time.perf_counter() - start)
+
+            start = time.perf_counter()
+            pages = sum(1 for _ in extractor.iter_outline_pages(pdf_path))
+            pipeline_rate = pages / (time.perf_counter() - start)
+
+            start = time.perf_counter()
+            pages = sum(1 for _ in extractor.iter_outline_pages(doc_paths))
+            cross_rate = pages / (time.perf_counter() - start)
+
+            print(f"{batch_size:>6} {detect_rate:>15.2f} {pipeline_rate:>17.2f} {cross_rate:>18.2f}")
+
+
+if __name__ == "__main__":
+    main()
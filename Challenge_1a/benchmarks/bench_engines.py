@@ -0,0 +1,79 @@
+"""
+Font-statistics engine vs the YOLO engine: pages per second and agreement.
+
+Both engines run over the sample PDFs with the bookmark/font resolver turned
+off, so each document goes through the engine itself. Outlines are compared
+with the golden JSONs in output/ (text + page precision/recall, and level
+agreement on matched entries). Add --pages N to time a synthetic N-page PDF.
+
+    python benchmarks/bench_engines.py --pages 200
+"""
+import argparse
+import json
+import tempfile
+import time
+from pathlib import Path
+
+import fitz
+
+from common import (DEFAULT_MODEL, SAMPLE_INPUT, SAMPLE_OUTPUT, load_extractor, make_synthetic_pdf,
+                    normalize_text, outline_match)
+
+
+def level_agreement(predicted, expected):
+    """Share of entries found in both outlines (text + page) that also agree on the level"""
+    gold = {(normalize_text(o["text"]), o["page"]): o["level"] for o in expected.get("outline", [])}
+    shared = [(o["level"], gold[key]) for o in predicted.get("outline", [])
+              if (key := (normalize_text(o["text"]), o["page"])) in gold]
+    return sum(a == b for a, b in shared) / len(shared) if shared else 0.0
+
+
+def run(extractor, pdfs):
+    pages = 0
+    for pdf in pdfs:
+        with fitz.open(pdf) as doc:
+            pages += len(doc)
+    start = time.perf_counter()
+    outlines = {pdf.stem: extractor.get_outline(str(pdf)) for pdf in pdfs}
+    return outlines, pages, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--input", default=str(SAMPLE_INPUT))
+    parser.add_argument("--golden", default=str(SAMPLE_OUTPUT))
+    parser.add_argument("--engines", nargs="+", default=["yolo", "fonts"])
+    parser.add_argument("--pages", type=int, default=0, help="Also time a synthetic PDF of this many pages")
+    parser.add_argument("--model", default=str(DEFAULT_MODEL))
+    args = parser.parse_args()
+
+    pdfs = sorted(Path(args.input).glob("*.pdf"))
+    golden = {p.stem: json.loads(p.read_text(encoding="utf-8")) for p in Path(args.golden).glob("*.json")}
+
+    with tempfile.TemporaryDirectory() as tmp:
+        synthetic = make_synthetic_pdf(Path(tmp) / "synthetic.pdf", args.pages) if args.pages else None
+
+        print(f"\n{'engine':<8} {'load':>7} {'pages/s':>9} {'precision':>10} {'recall':>7} "
+              f"{'level agr':>10} {'synthetic pages/s':>18}")
+        for engine in args.engines:
+            start = time.perf_counter()
+            extractor = load_extractor(args.model, config={"outline": {"sources": ["vision"], "engine": engine}})
+            load_time = time.perf_counter() - start
+
+            outlines, pages, elapsed = run(extractor, pdfs)
+            scores = [outline_match(outlines[name], ref) for name, ref in golden.items() if name in outlines]
+            levels = [level_agreement(outlines[name], ref) for name, ref in golden.items() if name in outlines]
+            precision = sum(p for p, _ in scores) / len(scores) if scores else 0.0
+            recall = sum(r for _, r in scores) / len(scores) if scores else 0.0
+            agreement = sum(levels) / len(levels) if levels else 0.0
+
+            synthetic_rate = "-"
+            if synthetic is not None:
+                _, synthetic_pages, synthetic_time = run(extractor, [synthetic])
+                synthetic_rate = f"{synthetic_pages / synthetic_time:.2f}"
+            print(f"{engine:<8} {load_time:>6.2f}s {pages / elapsed:>9.2f} {precision:>10.2f} {recall:>7.2f} "
+                  f"{agreement:>10.2f} {synthetic_rate:>18}")
+
+
+if __name__ == "__main__":
+    main()
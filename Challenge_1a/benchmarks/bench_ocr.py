@@ -0,0 +1,65 @@
+"""
+OCR benchmark: per-box readtext vs page-level batched recognition.
+
+Runs detection on the sample PDFs, then OCRs every header box three ways
+(text layer disabled): full readtext per box, batched recognition of
+single-line crops only, and batched recognition with multi-line crops split
+into width-bucketed lines. Reports OCR time per page and how often each
+batched path agrees with readtext on the final text.
+
+    python benchmarks/bench_ocr.py --input input
+"""
+import argparse
+import time
+from pathlib import Path
+
+from common import DEFAULT_MODEL, SAMPLE_INPUT, load_extractor, normalize_text
+
+# (label, batch_recognition, split_lines)
+MODES = [
+    ("Per-box readtext", False, False),
+    ("Batched single lines", True, False),
+    ("Batched split lines", True, True),
+]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--input", default=str(SAMPLE_INPUT))
+    parser.add_argument("--model", default=str(DEFAULT_MODEL))
+    args = parser.parse_args()
+
+    extractor = load_extractor(args.model)
+    timings = {label: 0.0 for label, _, _ in MODES}
+    agree = {label: 0 for label, _, _ in MODES}
+    pages = boxes = 0
+
+    for pdf_path in sorted(Path(args.input).glob("*.pdf")):
+        for page_idx, img in extractor.iter_page_images(pdf_path):
+            record = extractor.detect_page({"page": page_idx, "image": img, "boxes": [], "error": None})
+            bboxes = [box["bbox"] for box in record["boxes"]]
+            pages += 1
+            if not bboxes:
+                continue
+
+            texts = {}
+            for label, batched, split in MODES:
+                extractor.batch_recognition, extractor.split_lines = batched, split
+                start = time.perf_counter()
+                texts[label] = extractor.ocr_boxes(img, bboxes)
+                timings[label] += time.perf_counter() - start
+
+            boxes += len(bboxes)
+            reference = texts[MODES[0][0]]
+            for label, _, _ in MODES:
+                agree[label] += sum(normalize_text(a) == normalize_text(b)
+                                    for a, b in zip(reference, texts[label]))
+
+    print(f"Pages: {pages}, header boxes: {boxes}")
+    for label, _, _ in MODES:
+        print(f"{label + ':':<22} {1000 * timings[label] / max(pages, 1):8.1f} ms/page, "
+              f"same text as readtext: {agree[label]}/{boxes} boxes")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""
+Micro-benchmark for the render path: PNG round trip vs zero-copy pixmap view.
+
+Reports time and traced allocations per page at each zoom level. The
+zero-copy view is made contiguous once, as YOLO/OpenCV would, so both
+paths end with an equivalent BGR array.
+
+    python benchmarks/bench_render.py --pages 20 --zooms 1.0 1.5 2.0
+"""
+import argparse
+import tempfile
+import time
+import tracemalloc
+from io import BytesIO
+from pathlib import Path
+
+from common import make_synthetic_pdf
+
+
+def render_png_roundtrip(page, zoom):
+    import cv2
+    import fitz
+    import numpy as np
+    from PIL import Image
+
+    pix = page.get_pixmap(matrix=fitz.Matrix(zoom, zoom))
+    pil_img = Image.open(BytesIO(pix.tobytes("png")))
+    return cv2.cvtColor(np.array(pil_img), cv2.COLOR_RGB2BGR)
+
+
+def render_zero_copy(page, zoom):
+    import fitz
+    import numpy as np
+    from extract_outline_docker import pixmap_to_bgr
+
+    view = pixmap_to_bgr(page.get_pixmap(matrix=fitz.Matrix(zoom, zoom), alpha=False))
+    return view, np.ascontiguousarray(view)
+
+
+def measure(fn, pages, zoom):
+    tracemalloc.start()
+    tracemalloc.reset_peak()
+    start = time.perf_counter()
+    allocated = 0
+    for page in pages:
+        before = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+        result = fn(page, zoom)
+        allocated += tracemalloc.get_traced_memory()[1] - before
+        del result
+    elapsed = time.perf_counter() - start
+    tracemalloc.stop()
+    return 1000 * elapsed / len(pages), allocated / len(pages) / 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--pages", type=int, default=20)
+    parser.add_argument("--zooms", type=float, nargs="+", default=[1.0, 1.5, 2.0])
+    args = parser.parse_args()
+
+    import fitz
+
+    with tempfile.TemporaryDirectory() as tmp:
+        pdf_path = make_synthetic_pdf(Path(tmp) / "render.pdf", args.pages)
+        doc = fitz.open(pdf_path)
+        pages = [doc[i] for i in range(len(doc))]
+
+        print(f"{'zoom':>5} {'path':>14} {'ms/page':>9} {'peak alloc MB/page':>19}")
+        for zoom in args.zooms:
+            for name, fn in (("png roundtrip", render_png_roundtrip),
+                             ("zero-copy", lambda p, z: render_zero_copy(p, z)[0]),
+                             ("zero-copy+cont", lambda p, z: render_zero_copy(p, z)[1])):
+                ms, mb = measure(fn, pages, zoom)
+                print(f"{zoom:>5.1f} {name:>14} {ms:>9.2f} {mb:>19.2f}")
+        doc.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""
+Time-to-first-output of the batch entry point, lazy vs eager model loading.
+
+Each scenario runs extract_outline_docker.py in a fresh process and records
+when the first outline JSON appears and when the process exits. Scenarios:
+an empty input directory, a bookmarked PDF (--sources toc fonts vision,
+resolved from its bookmarks without models) and the sample PDFs (--sources
+vision). The outline sources that answered are listed per scenario, so a
+bookmarked run that fell through to vision shows up. --eager-models is the
+old startup behaviour.
+
+    python benchmarks/bench_startup.py --repeat 3
+"""
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from common import DEFAULT_MODEL, ROOT, SAMPLE_INPUT, make_synthetic_pdf
+
+SCRIPT = ROOT / "extract_outline_docker.py"
+
+
+def run_once(input_dir, model, extra_args):
+    """(seconds to the first JSON or None, seconds to exit, outline sources of the JSONs)"""
+    with tempfile.TemporaryDirectory() as out:
+        start = time.perf_counter()
+        proc = subprocess.Popen([sys.executable, str(SCRIPT), "--input", str(input_dir), "--output", out,
+                                 "--model", str(model), "--no-cache", *extra_args],
+                                stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        first = None
+        while proc.poll() is None:
+            if first is None and any(Path(out).glob("*.json")):
+                first = time.perf_counter() - start
+            time.sleep(0.005)
+        total = time.perf_counter() - start
+        if first is None and any(Path(out).glob("*.json")):
+            first = total
+        sources = {json.loads(p.read_text(encoding="utf-8")).get("source", "vision") for p in Path(out).glob("*.json")}
+        return first, total, sources
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--input", default=str(SAMPLE_INPUT))
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--model", default=str(DEFAULT_MODEL))
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    subprocess.run([sys.executable, "-c", "import extract_outline_docker"], cwd=ROOT, check=True)
+    print(f"Module import: {time.perf_counter() - start:.2f}s (including interpreter start)")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        empty = Path(tmp) / "empty"
+        empty.mkdir()
+        bookmarked = Path(tmp) / "bookmarked"
+        bookmarked.mkdir()
+        make_synthetic_pdf(bookmarked / "bookmarked.pdf", 20, bookmarks=True)
+        scenarios = [
+            ("empty input", empty, []),
+            ("bookmarked PDF", bookmarked, ["--sources", "toc", "fonts", "vision"]),
+            ("sample PDFs", Path(args.input), ["--sources", "vision"]),
+        ]
+
+        print(f"\n{'scenario':<16} {'mode':<6} {'first output':>13} {'total':>8}  sources")
+        for name, input_dir, sources in scenarios:
+            for mode, extra in (("eager", ["--eager-models"]), ("lazy", [])):
+                runs = [run_once(input_dir, args.model, [*sources, *extra]) for _ in range(args.repeat)]
+                firsts = [f for f, _, _ in runs if f is not None]
+                first = f"{statistics.median(firsts):.2f}s" if firsts else "-"
+                total = statistics.median(t for _, t, _ in runs)
+                answered = ", ".join(sorted(set().union(*(s for _, _, s in runs)))) or "-"
+                print(f"{name:<16} {mode:<6} {first:>13} {total:>7.2f}s  {answered}")
+
+
+if __name__ == "__main__":
+    main()
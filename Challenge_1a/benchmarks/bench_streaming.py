@@ -0,0 +1,89 @@
+"""
+Memory and latency benchmark: rasterize-everything vs the streaming page pipeline.
+
+Each mode runs in its own subprocess so peak RSS is measured in isolation.
+Both modes read header text the same way (text layer first, OCR as fallback;
+--no-text-layer OCRs every box) and the outline cache is off, so the gap is
+the streaming pipeline alone.
+
+    python benchmarks/bench_streaming.py --pages 50 300
+"""
+import argparse
+import json
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import fitz
+
+from common import DEFAULT_MODEL, load_extractor, make_synthetic_pdf, peak_rss_mb
+
+
+def run_mode(mode, pdf_path, model_path, use_text_layer=True):
+    extractor = load_extractor(model_path, {"ocr": {"use_text_layer": use_text_layer}, "cache": {"enabled": False}})
+    baseline_rss = peak_rss_mb()
+    start = time.perf_counter()
+    first_page = None
+
+    if mode == "eager":
+        images = extractor.pdf_to_images(pdf_path)
+        records = []
+        with fitz.open(pdf_path) as doc:
+            words = [extractor.text_layer_words(page) if extractor.use_text_layer else None for page in doc]
+        for page_idx, img in enumerate(images, 1):
+            record = {"page": page_idx, "image": img, "words": words[page_idx - 1], "boxes": [], "error": None}
+            records.append(extractor.ocr_page(extractor.detect_page(record)))
+            if first_page is None:
+                first_page = time.perf_counter() - start
+        del images
+    else:
+        records = []
+        for record in extractor.iter_outline_pages(pdf_path):
+            records.append(record)
+            if first_page is None:
+                first_page = time.perf_counter() - start
+
+    extractor.build_outline(records)
+    total = time.perf_counter() - start
+    return {
+        "mode": mode,
+        "pages": len(records),
+        "first_page_s": round(first_page or 0.0, 3),
+        "total_s": round(total, 3),
+        "peak_rss_mb": round(peak_rss_mb(), 1),
+        "rss_growth_mb": round(peak_rss_mb() - baseline_rss, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--pages", type=int, nargs="+", default=[20, 100, 300])
+    parser.add_argument("--model", default=str(DEFAULT_MODEL))
+    parser.add_argument("--no-text-layer", dest="use_text_layer", action="store_false",
+                        help="OCR every header box in both modes")
+    parser.add_argument("--worker", nargs=2, metavar=("MODE", "PDF"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        print(json.dumps(run_mode(args.worker[0], args.worker[1], args.model, args.use_text_layer)))
+        return
+
+    print(f"Header text: {'text layer, OCR fallback' if args.use_text_layer else 'OCR only'} (both modes)")
+    print(f"{'pages':>6} {'mode':>10} {'first page':>11} {'total':>9} {'peak RSS':>10} {'growth':>9}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for pages in args.pages:
+            pdf_path = make_synthetic_pdf(Path(tmp) / f"synthetic_{pages}.pdf", pages)
+            for mode in ("eager", "streaming"):
+                proc = subprocess.run(
+                    [sys.executable, __file__, "--model", args.model, "--worker", mode, str(pdf_path)]
+                    + ([] if args.use_text_layer else ["--no-text-layer"]),
+                    capture_output=True, text=True, check=True)
+                r = json.loads(proc.stdout.strip().splitlines()[-1])
+                print(f"{pages:>6} {mode:>10} {r['first_page_s']:>10.2f}s {r['total_s']:>8.2f}s "
+                      f"{r['peak_rss_mb']:>8.1f}MB {r['rss_growth_mb']:>7.1f}MB")
+
+
+if __name__ == "__main__":
+    main()
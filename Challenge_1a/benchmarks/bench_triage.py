@@ -0,0 +1,64 @@
+"""
+Accuracy vs time for page triage and two-pass (low-DPI detection) rendering.
+
+Every setting runs over the sample PDFs; outlines are compared with the
+golden JSONs in output/ and with the full-resolution baseline run.
+
+    python benchmarks/bench_triage.py --detect-dpi 144 96 72
+"""
+import argparse
+import json
+import time
+from pathlib import Path
+
+from common import DEFAULT_MODEL, SAMPLE_INPUT, SAMPLE_OUTPUT, load_extractor, outline_match
+
+
+def run(extractor, pdfs):
+    start = time.perf_counter()
+    outlines = {pdf.stem: extractor.get_outline(str(pdf)) for pdf in pdfs}
+    return outlines, time.perf_counter() - start
+
+
+def mean_match(outlines, references):
+    scores = [outline_match(outlines[name], ref) for name, ref in references.items() if name in outlines]
+    if not scores:
+        return 0.0, 0.0
+    return (sum(p for p, _ in scores) / len(scores), sum(r for _, r in scores) / len(scores))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--input", default=str(SAMPLE_INPUT))
+    parser.add_argument("--golden", default=str(SAMPLE_OUTPUT))
+    parser.add_argument("--detect-dpi", type=float, nargs="+", default=[144, 108, 72])
+    parser.add_argument("--ocr-dpi", type=float, default=144)
+    parser.add_argument("--model", default=str(DEFAULT_MODEL))
+    args = parser.parse_args()
+
+    pdfs = sorted(Path(args.input).glob("*.pdf"))
+    golden = {p.stem: json.loads(p.read_text(encoding="utf-8")) for p in Path(args.golden).glob("*.json")}
+    extractor = load_extractor(args.model)
+    extractor.ocr_zoom = args.ocr_dpi / 72
+
+    extractor.skip_blank = extractor.skip_image_only = False
+    extractor.detect_zoom = args.ocr_dpi / 72
+    baseline, baseline_time = run(extractor, pdfs)
+
+    rows = [("baseline", baseline, baseline_time)]
+    for detect_dpi in args.detect_dpi:
+        extractor.skip_blank, extractor.skip_image_only = True, True
+        extractor.detect_zoom = detect_dpi / 72
+        outlines, elapsed = run(extractor, pdfs)
+        rows.append((f"triage@{detect_dpi:.0f}dpi", outlines, elapsed))
+
+    print(f"\n{'setting':<18} {'time':>8} {'speedup':>8} {'P/R vs golden':>15} {'P/R vs baseline':>17}")
+    for name, outlines, elapsed in rows:
+        gp, gr = mean_match(outlines, golden)
+        bp, br = mean_match(outlines, baseline)
+        print(f"{name:<18} {elapsed:>7.2f}s {baseline_time / elapsed:>7.2f}x "
+              f"{gp:>7.2f}/{gr:<7.2f} {bp:>8.2f}/{br:<8.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""Shared helpers for the Round 1A benchmark scripts"""
+import resource
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+DEFAULT_MODEL = ROOT / "app" / "model" / "yolov11x_best.pt"
+SAMPLE_INPUT = ROOT / "input"
+SAMPLE_OUTPUT = ROOT / "output"
+
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+
+def load_extractor(model_path=None, config=None, **kwargs):
+    """
+    Import the extractor module lazily so --help works without the model stack.
+    Models load up front (unless the config says otherwise) so timings never
+    include a first-use model load.
+    """
+    from extract_outline_docker import DockerOutlineExtractor, merge_config
+    config = merge_config({"performance": {"lazy_models": False}}, config)
+    return DockerOutlineExtractor(str(model_path or DEFAULT_MODEL), config=config, **kwargs)
+
+
+def make_synthetic_pdf(path, pages, sections_per_page=3, seed=0, bookmarks=False):
+    """Write a long born-digital PDF with numbered headings and filler paragraphs"""
+    import fitz
+    import random
+
+    rng = random.Random(seed)
+    words = ("outline extraction heading section detail result method data model "
+             "page layout analysis document structure benchmark value").split()
+    doc = fitz.open()
+    chapter = 0
+    toc = []
+    for page_no in range(1, pages + 1):
+        page = doc.new_page(width=595, height=842)
+        y = 72
+        if page_no == 1:
+            page.insert_text((72, y), "Synthetic Benchmark Document", fontsize=24)
+            y += 48
+        for _ in range(sections_per_page):
+            chapter += 1
+            page.insert_text((72, y), f"{chapter}. Section {chapter}", fontsize=16)
+            toc.append([1, f"{chapter}. Section {chapter}", page_no])
+            y += 28
+            for _ in range(6):
+                line = " ".join(rng.choice(words) for _ in range(12))
+                page.insert_text((72, y), line, fontsize=10)
+                y += 14
+            y += 20
+    if bookmarks:
+        doc.set_toc(toc)
+    doc.save(str(path))
+    doc.close()
+    return Path(path)
+
+
+def peak_rss_mb():
+    """Peak resident set size of this process in MB"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is KB on Linux, bytes on macOS
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def normalize_text(text):
+    return " ".join(text.lower().split())
+
+
+def outline_match(predicted, expected):
+    """Precision/recall of predicted outline entries against a golden outline (text + page)"""
+    pred = [(normalize_text(o["text"]), o["page"]) for o in predicted.get("outline", [])]
+    gold = [(normalize_text(o["text"]), o["page"]) for o in expected.get("outline", [])]
+    remaining = list(gold)
+    hits = 0
+    for item in pred:
+        if item in remaining:
+            remaining.remove(item)
+            hits += 1
+    precision = hits / len(pred) if pred else (1.0 if not gold else 0.0)
+    recall = hits / len(gold) if gold else 1.0
+    return precision, recall
@@ -0,0 +1,130 @@
+"""
+Load test for the resident outline service against the cold-start batch path.
+
+Start the service first, e.g.
+
+    python extract_outline_docker.py --model app/model/yolov11x_best.pt --serve 127.0.0.1:8080
+
+then
+
+    python benchmarks/load_test_service.py --url 127.0.0.1:8080 --requests 50 --concurrency 4
+
+Requests that get 503 (queue full) are retried after the server's Retry-After.
+The cold-start numbers launch the batch script once per PDF, paying model
+load every time, as a one-file Docker run would.
+"""
+import argparse
+import http.client
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from common import DEFAULT_MODEL, ROOT, SAMPLE_INPUT
+
+
+class UnixHTTPConnection(http.client.HTTPConnection):
+    def __init__(self, socket_path, timeout=600):
+        super().__init__("localhost", timeout=timeout)
+        self.socket_path = socket_path
+
+    def connect(self):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.settimeout(self.timeout)
+        self.sock.connect(self.socket_path)
+
+
+def percentile(values, q):
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    index = min(len(ordered) - 1, max(0, round(q / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def describe(name, latencies):
+    print(f"{name:<12} n={len(latencies):<4} p50={percentile(latencies, 50):7.3f}s "
+          f"p99={percentile(latencies, 99):7.3f}s mean={statistics.mean(latencies):7.3f}s")
+
+
+def run_service_load(args, pdfs):
+    local = threading.local()
+    rejected = [0]
+
+    def connection():
+        if not hasattr(local, "conn"):
+            if args.socket:
+                local.conn = UnixHTTPConnection(args.socket)
+            else:
+                host, _, port = args.url.rpartition(":")
+                local.conn = http.client.HTTPConnection(host or "127.0.0.1", int(port), timeout=600)
+        return local.conn
+
+    def one_request(i):
+        body = pdfs[i % len(pdfs)].read_bytes()
+        start = time.perf_counter()
+        while True:
+            conn = connection()
+            conn.request("POST", "/outline", body=body, headers={"Content-Type": "application/pdf"})
+            response = conn.getresponse()
+            response.read()
+            if response.status != 503:
+                break
+            rejected[0] += 1
+            time.sleep(float(response.getheader("Retry-After", "1")))
+        if response.status != 200:
+            raise RuntimeError(f"HTTP {response.status}")
+        return time.perf_counter() - start
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(args.concurrency) as pool:
+        latencies = list(pool.map(one_request, range(args.requests)))
+    elapsed = time.perf_counter() - start
+    describe("service", latencies)
+    print(f"{'':<12} {args.requests / elapsed:.2f} req/s at concurrency {args.concurrency}, "
+          f"{rejected[0]} backpressure retries")
+
+
+def run_cold_start(args, pdfs):
+    latencies = []
+    script = ROOT / "extract_outline_docker.py"
+    for i in range(args.cold_runs):
+        pdf = pdfs[i % len(pdfs)]
+        with tempfile.TemporaryDirectory() as tmp:
+            input_dir = Path(tmp) / "input"
+            input_dir.mkdir()
+            (input_dir / pdf.name).write_bytes(pdf.read_bytes())
+            start = time.perf_counter()
+            subprocess.run([sys.executable, str(script), "--model", args.model, "--no-cache",
+                            "--input", str(input_dir), "--output", str(Path(tmp) / "output")],
+                           check=True, capture_output=True)
+            latencies.append(time.perf_counter() - start)
+    describe("cold start", latencies)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--url", default="127.0.0.1:8080", help="HOST:PORT of the service")
+    parser.add_argument("--socket", default=None, help="Unix socket of the service instead of --url")
+    parser.add_argument("--input", default=str(SAMPLE_INPUT), help="Directory of PDFs to send")
+    parser.add_argument("--requests", type=int, default=50)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--cold-runs", type=int, default=3, help="Cold-start batch runs (0 to skip)")
+    parser.add_argument("--model", default=str(DEFAULT_MODEL))
+    args = parser.parse_args()
+
+    pdfs = sorted(Path(args.input).glob("*.pdf"))
+    if not pdfs:
+        sys.exit(f"No PDFs in {args.input}")
+    run_service_load(args, pdfs)
+    if args.cold_runs:
+        run_cold_start(args, pdfs)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,208 @@
+"""
+Regression benchmark suite for Round 1A outline extraction.
+
+Runs DockerOutlineExtractor over a fixed corpus: the sample PDFs in input/
+(scored against the golden JSONs in output/) plus synthetic long PDFs for
+scaling. Each corpus runs in its own subprocess with a freshly loaded
+extractor, so its peak RSS is that corpus's alone. The JSON report holds
+throughput (pages/s), per-stage page latency percentiles, peak RSS, model
+load time, and outline precision/recall per corpus. With --baseline, the
+new report is compared to an earlier one, and the exit status is non-zero
+when throughput or accuracy regress beyond the given tolerances.
+
+    python benchmarks/run_benchmarks.py --report bench.json
+    python benchmarks/run_benchmarks.py --report new.json --baseline bench.json
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+from common import (DEFAULT_MODEL, ROOT, SAMPLE_INPUT, SAMPLE_OUTPUT, load_extractor, make_synthetic_pdf,
+                    peak_rss_mb, outline_match)
+
+STAGES = ("render", "detect", "ocr")
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_worker(args, name, pdfs):
+    """Load an extractor and run one corpus in this (fresh) process; returns its report section"""
+    from extract_outline_docker import load_config
+
+    golden = {p.stem: json.loads(p.read_text(encoding="utf-8")) for p in Path(args.golden).glob("*.json")}
+    with tempfile.TemporaryDirectory() as tmp:
+        metrics_path = Path(tmp) / "metrics.jsonl"
+        overrides = {"cache": {"enabled": False}, "metrics": {"path": str(metrics_path), "format": "jsonl"}}
+        if args.sources:
+            overrides["outline"] = {"sources": args.sources}
+        config = load_config(args.config, overrides)
+
+        start = time.perf_counter()
+        extractor = load_extractor(args.model, config=config)
+        load_seconds = time.perf_counter() - start
+        result = run_corpus(extractor, name, [Path(pdf) for pdf in pdfs], golden, metrics_path)
+        extractor.metrics.close()
+    result["model_load_s"] = round(load_seconds, 3)
+    result["settings"] = {"sources": extractor.outline_sources, "engine": extractor.engine,
+                          "backend": extractor.detector_backend, "batch_size": extractor.batch_size}
+    return result
+
+
+def run_corpus(extractor, name, pdfs, golden, metrics_path):
+    """Extract every PDF of one corpus; returns the corpus section of the report"""
+    offset = metrics_path.stat().st_size if metrics_path.exists() else 0
+    documents = []
+    start = time.perf_counter()
+    for pdf in pdfs:
+        doc_start = time.perf_counter()
+        outline = extractor.get_outline(str(pdf))
+        entry = {"name": pdf.name, "seconds": round(time.perf_counter() - doc_start, 4),
+                 "source": outline.get("source"), "headings": len(outline["outline"])}
+        if pdf.stem in golden:
+            entry["precision"], entry["recall"] = outline_match(outline, golden[pdf.stem])
+        documents.append(entry)
+    elapsed = time.perf_counter() - start
+
+    # Page and document lines this corpus appended to the metrics file
+    with open(metrics_path, encoding="utf-8") as f:
+        f.seek(offset)
+        lines = [json.loads(line) for line in f if line.strip()]
+    page_lines = [line for line in lines if line["type"] == "page"]
+    pages_by_doc = {line["doc"]: line["pages"] for line in lines if line["type"] == "document"}
+    for entry in documents:
+        entry["pages"] = pages_by_doc.get(entry["name"], 0)
+    pages = sum(entry["pages"] for entry in documents)
+
+    latency = {}
+    for stage in STAGES:
+        values = np.array([line[f"{stage}_s"] for line in page_lines if line[f"{stage}_s"] > 0]) * 1000
+        latency[stage] = ({"p50_ms": round(float(np.percentile(values, 50)), 2),
+                           "p95_ms": round(float(np.percentile(values, 95)), 2),
+                           "mean_ms": round(float(values.mean()), 2)} if len(values) else None)
+    scored = [entry for entry in documents if "recall" in entry]
+    return {
+        "corpus": name,
+        "documents": documents,
+        "pages": pages,
+        "seconds": round(elapsed, 4),
+        "pages_per_s": round(pages / elapsed, 3) if elapsed > 0 else 0.0,
+        "stage_latency": latency,
+        "peak_rss_mb": round(peak_rss_mb(), 1),
+        "precision": round(sum(e["precision"] for e in scored) / len(scored), 4) if scored else None,
+        "recall": round(sum(e["recall"] for e in scored) / len(scored), 4) if scored else None,
+    }
+
+
+def compare(report, baseline, max_slowdown, max_accuracy_drop):
+    """Print the per-corpus differences; returns the list of regressions"""
+    previous = {c["corpus"]: c for c in baseline["corpora"]}
+    regressions = []
+    print(f"\nCompared with {baseline.get('commit') or 'baseline'} ({baseline.get('created')})")
+    print(f"{'corpus':<16} {'pages/s':>18} {'peak MB':>16} {'precision':>14} {'recall':>14}")
+    for corpus in report["corpora"]:
+        old = previous.get(corpus["corpus"])
+        if old is None:
+            print(f"{corpus['corpus']:<16} (not in baseline)")
+            continue
+        cells = []
+        for key in ("pages_per_s", "peak_rss_mb", "precision", "recall"):
+            new_value, old_value = corpus[key], old.get(key)
+            cells.append(f"{old_value}→{new_value}" if old_value is not None else str(new_value))
+        print(f"{corpus['corpus']:<16} {cells[0]:>18} {cells[1]:>16} {cells[2]:>14} {cells[3]:>14}")
+
+        if old["pages_per_s"] and corpus["pages_per_s"] < old["pages_per_s"] * (1 - max_slowdown):
+            regressions.append(f"{corpus['corpus']}: throughput {old['pages_per_s']} → {corpus['pages_per_s']} pages/s")
+        for key in ("precision", "recall"):
+            if old.get(key) is not None and corpus[key] is not None \
+                    and corpus[key] < old[key] - max_accuracy_drop:
+                regressions.append(f"{corpus['corpus']}: {key} {old[key]} → {corpus[key]}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--input", default=str(SAMPLE_INPUT))
+    parser.add_argument("--golden", default=str(SAMPLE_OUTPUT))
+    parser.add_argument("--synthetic-pages", type=int, nargs="*", default=[50, 200],
+                        help="Page counts of the synthetic long PDFs")
+    parser.add_argument("--sources", nargs="+", default=None,
+                        help="Outline sources to use, e.g. 'vision' to always run the full pipeline")
+    parser.add_argument("--config", default=None, help="YAML config for the extractor")
+    parser.add_argument("--model", default=str(DEFAULT_MODEL))
+    parser.add_argument("--report", default="benchmark_report.json")
+    parser.add_argument("--baseline", default=None, help="Earlier report to compare with")
+    parser.add_argument("--max-slowdown", type=float, default=0.10,
+                        help="Allowed relative throughput drop before failing")
+    parser.add_argument("--max-accuracy-drop", type=float, default=0.02,
+                        help="Allowed absolute precision/recall drop before failing")
+    parser.add_argument("--worker", nargs="+", metavar=("CORPUS", "PDF"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        print(json.dumps(run_worker(args, args.worker[0], args.worker[1:])))
+        return
+
+    passthrough = ["--golden", args.golden, "--model", args.model]
+    if args.config:
+        passthrough += ["--config", args.config]
+    if args.sources:
+        passthrough += ["--sources", *args.sources]
+    with tempfile.TemporaryDirectory() as tmp:
+        corpora = [("samples", sorted(Path(args.input).glob("*.pdf")))]
+        for pages in args.synthetic_pages:
+            corpora.append((f"synthetic-{pages}", [make_synthetic_pdf(Path(tmp) / f"synthetic_{pages}.pdf", pages)]))
+
+        results = []
+        for name, pdfs in corpora:
+            proc = subprocess.run([sys.executable, __file__, *passthrough, "--worker", name, *map(str, pdfs)],
+                                  stdout=subprocess.PIPE, text=True, check=True)
+            results.append(json.loads(proc.stdout.strip().splitlines()[-1]))
+
+    settings = results[0]["settings"]
+    for corpus in results:
+        del corpus["settings"]
+    report = {
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "commit": git_commit(),
+        "environment": {"python": platform.python_version(), "platform": platform.platform(),
+                        "cpus": os.cpu_count()},
+        "settings": settings,
+        "corpora": results,
+    }
+    Path(args.report).write_text(json.dumps(report, indent=2), encoding="utf-8")
+
+    print(f"\n{'corpus':<16} {'pages':>6} {'pages/s':>8} " + " ".join(f"{s + ' p50/p95 ms':>20}" for s in STAGES)
+          + f" {'load s':>7} {'peak MB':>8} {'P/R':>11}")
+    for corpus in results:
+        latency = [f"{l['p50_ms']:.0f}/{l['p95_ms']:.0f}" if l else "-" for l in corpus["stage_latency"].values()]
+        accuracy = f"{corpus['precision']:.2f}/{corpus['recall']:.2f}" if corpus["recall"] is not None else "-"
+        print(f"{corpus['corpus']:<16} {corpus['pages']:>6} {corpus['pages_per_s']:>8.2f} "
+              + " ".join(f"{cell:>20}" for cell in latency)
+              + f" {corpus['model_load_s']:>7.2f} {corpus['peak_rss_mb']:>8.0f} {accuracy:>11}")
+    print(f"\nReport written to {args.report}")
+
+    if args.baseline:
+        baseline = json.loads(Path(args.baseline).read_text(encoding="utf-8"))
+        regressions = compare(report, baseline, args.max_slowdown, args.max_accuracy_drop)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,7 @@
 import warnings
 import time
 import os
-import torch
+import importlib
 
 # Suppress all warnings
 warnings.filterwarnings("ignore")
@@ -10,24 +10,947 @@ warnings.filterwarnings("ignore")
 os.environ['CUDA_VISIBLE_DEVICES'] = ''
 os.environ['YOLO_CONFIG_DIR'] = '/tmp'
 os.environ['ULTRALYTICS_OFFLINE'] = '1'
-torch.cuda.is_available = lambda: False
 
-from ultralytics import YOLO
+
+class _LazyModule:
+    """Stand-in for a heavy module that is imported on first attribute access"""
+
+    def __init__(self, name, setup=None):
+        self._name = name
+        self._setup = setup
+        self._loaded = None
+
+    def _resolve(self):
+        if self._loaded is None:
+            module = importlib.import_module(self._name)
+            if self._setup is not None:
+                self._setup(module)
+            self._loaded = module
+        return self._loaded
+
+    def __getattr__(self, attr):
+        return getattr(self._resolve(), attr)
+
+
+def _force_cpu(torch_module):
+    torch_module.cuda.is_available = lambda: False
+
+
+# torch, OpenCV and EasyOCR take seconds to import; documents resolved from
+# bookmarks or fonts (and empty runs) never pay for them
+torch = _LazyModule("torch", setup=_force_cpu)
+cv2 = _LazyModule("cv2")
+easyocr = _LazyModule("easyocr")
+
+
+def _yolo_class():
+    """ultralytics.YOLO, imported on first use (after torch is forced onto the CPU)"""
+    torch._resolve()
+    from ultralytics import YOLO
+    return YOLO
+
+
 import fitz
-from PIL import Image
-import cv2
 import numpy as np
-import easyocr
 import json
-from io import BytesIO
 import sys
 import re
+import queue
+import threading
+import unicodedata
+import argparse
+import itertools
+import multiprocessing as mp
+import hashlib
+import sqlite3
+import socketserver
+import tempfile
+import http.server
+import shutil
+import cProfile
+import resource
+from collections import Counter
 from pathlib import Path
 from typing import Optional
 
+# Reference render scale: box coordinates are always expressed at this zoom,
+# which the hierarchy area thresholds are tuned for
+RENDER_ZOOM = 2.0
+
+# Share of odd characters above which a text-layer string is treated as garbled
+GARBLED_CHAR_RATIO = 0.1
+
+# EasyOCR recognizer input height (easyocr.config.imgH)
+OCR_LINE_HEIGHT = 64
+
+# OCR results at or below this confidence are dropped
+OCR_MIN_CONFIDENCE = 0.5
+
+# Recognizer batches only mix lines whose padded widths are within this factor
+OCR_WIDTH_BUCKET_RATIO = 1.5
+
+# Crops with more ink bands than this are not split into lines (likely not a header)
+OCR_MAX_SPLIT_LINES = 8
+
+# Batches allowed to wait between two pipeline stages (bounds peak memory)
+DEFAULT_QUEUE_SIZE = 2
+
+DEFAULT_CONFIG_PATH = Path(__file__).with_name("config.yaml")
+
+# Detector backends: torch runs the .pt checkpoint, the others an exported copy of it
+DETECTOR_BACKENDS = ("torch", "onnx", "openvino")
+
+# Settings read by the extractor; config.yaml and CLI flags override these
+DEFAULT_CONFIG = {
+    "model": {
+        "backend": "torch",          # torch | onnx | openvino
+        "int8": False,               # quantize the exported model to INT8
+        "export_dir": None,          # where exported models are kept (default: next to the weights)
+        "calibration_data": None,    # dataset YAML for OpenVINO INT8 calibration
+    },
+    "ocr": {
+        "use_text_layer": True,
+        "batch_recognition": True,  # recognize single-line crops of a page in one call
+        "split_lines": True,        # split multi-line crops into lines for the recognizer instead of readtext
+    },
+    "performance": {
+        "cpu_threads": 0,        # 0 keeps the torch/OpenCV default
+        "batch_size": 1,         # pages per YOLO forward pass
+        "queue_size": DEFAULT_QUEUE_SIZE,
+        "cross_document_batching": False,
+        "workers": 1,            # >1 processes PDFs in a pool of worker processes
+        "pages_per_task": 32,    # larger PDFs are split across workers by page range
+        "lazy_models": True,     # load YOLO/EasyOCR on first use instead of at startup
+        "start_method": "spawn",  # worker processes: spawn | forkserver (preimported libraries) | fork (preloaded models)
+    },
+    "preprocessing": {
+        "pdf_dpi": 144,          # resolution of the crops OCR reads (144 dpi = 2.0 zoom)
+    },
+    "triage": {
+        "skip_blank": True,      # pages with no text, images or drawings
+        "skip_image_only": False,  # pages with images but no text layer (e.g. scans)
+        "detect_dpi": 144,       # YOLO resolution of text-layer pages; below pdf_dpi, crops needing OCR are re-rendered
+    },
+    "service": {
+        "host": "127.0.0.1",
+        "port": 8080,
+        "workers": 1,            # extractors (each with its own models) serving requests
+        "queue_size": 8,         # waiting requests beyond this are rejected with 503
+        "max_upload_mb": 200,
+        "request_timeout": 600,  # seconds a request may wait for its outline
+    },
+    "outline": {
+        # Tried in order; a source is used when it passes its quality check
+        "sources": ["toc", "fonts", "vision"],
+        "toc_min_entries": 2,      # fewer bookmarks than this are not an outline
+        "toc_min_match": 0.8,      # share of bookmark titles that must be a text line on their page
+        "engine": "yolo",          # yolo: YOLO + OCR as the last resort; fonts: font statistics only, no models
+    },
+    "metrics": {
+        "path": None,            # per-page/per-document metrics file; None disables it
+        "format": "jsonl",       # jsonl | prometheus
+        "profile_dir": None,     # cProfile dump per pipeline stage thread
+    },
+    "cache": {
+        "enabled": False,
+        "dir": ".outline_cache",
+        "max_mb": 1024,          # least recently used entries are evicted past this size
+        "fingerprint": "content",  # content: hash page streams and resources; render: hash a low-DPI render
+        "fingerprint_dpi": 48,   # resolution of the render fingerprint
+    },
+}
+
+# Outline sources that need no models, in the order the resolver may try them
+TEXT_OUTLINE_SOURCES = ("toc", "fonts")
+
+# Engines for documents no cheap source resolves: YOLO + OCR, or font statistics alone
+OUTLINE_ENGINES = ("yolo", "fonts")
+
+# Text-layer lines at least this much larger than the body font are heading candidates
+HEADING_SIZE_RATIO = 1.15
+
+# Font sizes closer than this (relative) fall into the same size cluster
+FONT_SIZE_TOLERANCE = 0.08
+
+# A strict font outline needs at least this many headings
+FONT_MIN_HEADINGS = 2
+
+# Above this share of "Label:" lines, bold body text is run-in labels rather than headings
+FONT_MAX_LABEL_SHARE = 0.5
+
+# Bump when cached page results change shape or meaning
+CACHE_FORMAT_VERSION = 1
+
+
+def merge_config(base, overrides):
+    """Recursively merge `overrides` into a copy of `base`"""
+    merged = dict(base)
+    for key, value in (overrides or {}).items():
+        if isinstance(value, dict) and isinstance(merged.get(key), dict):
+            merged[key] = merge_config(merged[key], value)
+        else:
+            merged[key] = value
+    return merged
+
+
+def load_config(path=None, overrides=None):
+    """Defaults, then the YAML config file, then explicit overrides"""
+    config = merge_config(DEFAULT_CONFIG, {})
+    config_file = Path(path) if path else DEFAULT_CONFIG_PATH
+    if config_file.exists():
+        import yaml
+        with open(config_file, "r", encoding="utf-8") as f:
+            config = merge_config(config, yaml.safe_load(f) or {})
+    elif path:
+        raise FileNotFoundError(f"Config file not found: {path}")
+    return merge_config(config, overrides)
+
+
+def detector_weights(model_path, config=None):
+    """
+    Path of the detector model to load for the configured backend. Non-torch
+    backends export the .pt weights once (batch-dynamic, so batched detection
+    keeps working) and reuse the exported copy on later runs.
+    """
+    settings = merge_config(DEFAULT_CONFIG, config)["model"]
+    backend = settings["backend"]
+    if backend not in DETECTOR_BACKENDS:
+        raise ValueError(f"Unknown detector backend {backend!r}, expected one of {DETECTOR_BACKENDS}")
+    if backend == "torch":
+        return Path(model_path)
+
+    weights = Path(model_path)
+    int8 = bool(settings["int8"])
+    stem = weights.stem + ("_int8" if int8 else "")
+    target_dir = Path(settings["export_dir"]) if settings["export_dir"] else weights.parent
+    target = target_dir / (f"{stem}.onnx" if backend == "onnx" else f"{stem}_openvino_model")
+    if target.exists():
+        return target
+
+    print(f"Exporting YOLO model to {backend}{' (INT8)' if int8 else ''}...")
+    target_dir.mkdir(parents=True, exist_ok=True)
+    if backend == "onnx":
+        exported = Path(_yolo_class()(str(weights)).export(format="onnx", dynamic=True, simplify=True))
+        if int8:
+            # Weight-only dynamic quantization needs no calibration data
+            import onnx
+            from onnxruntime.quantization import QuantType, quantize_dynamic
+            quantize_dynamic(str(exported), str(target), weight_type=QuantType.QUInt8)
+            # Keep the class names and strides ultralytics reads from the model metadata
+            quantized = onnx.load(str(target))
+            del quantized.metadata_props[:]
+            quantized.metadata_props.extend(onnx.load(str(exported), load_external_data=False).metadata_props)
+            onnx.save(quantized, str(target))
+            return target
+    else:
+        if int8 and not settings["calibration_data"]:
+            raise ValueError("OpenVINO INT8 export needs model.calibration_data (a dataset YAML)")
+        exported = Path(_yolo_class()(str(weights)).export(format="openvino", dynamic=True, int8=int8,
+                                                  data=settings["calibration_data"]))
+    if exported.resolve() != target.resolve():
+        shutil.move(str(exported), str(target))
+    return target
+
+
+def available_cpus():
+    """CPUs this process may run on"""
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+def peak_rss_bytes():
+    """Peak resident set size of this process in bytes"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is KB on Linux, bytes on macOS
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+# Where run_stage threads dump cProfile stats (see enable_profiling); None = off
+_PROFILE_DIR = None
+_PROFILE_IDS = itertools.count()
+
+
+def enable_profiling(directory):
+    """Profile every pipeline stage thread from now on, one .prof file per thread run"""
+    global _PROFILE_DIR
+    _PROFILE_DIR = Path(directory)
+    _PROFILE_DIR.mkdir(parents=True, exist_ok=True)
+
+
+def _start_profiler():
+    if _PROFILE_DIR is None:
+        return None
+    profiler = cProfile.Profile()
+    profiler.enable()
+    return profiler
+
+
+def _stop_profiler(profiler, name):
+    if profiler is None:
+        return
+    profiler.disable()
+    profiler.dump_stats(str(_PROFILE_DIR / f"{name}-{os.getpid()}-{next(_PROFILE_IDS)}.prof"))
+
+
+_STAGE_DONE = object()
+
+# MuPDF is not thread-safe: every fitz call made off the main thread holds this lock
+_FITZ_LOCK = threading.RLock()
+
+
+class _StageFailure:
+    """Exception raised inside a pipeline stage, forwarded to the consumer"""
+    def __init__(self, exc):
+        self.exc = exc
+
+
+def run_stage(source, fn=None, maxsize=DEFAULT_QUEUE_SIZE, name="outline-stage"):
+    """
+    Consume `source` on a background thread, applying `fn` to every item, and
+    yield the results in order through a bounded queue. The worker blocks once
+    `maxsize` results are waiting, so a slow consumer throttles the producer.
+    Stages chain by passing one stage's generator as the next stage's source.
+    """
+    out = queue.Queue(maxsize=maxsize)
+    stop = threading.Event()
+
+    def put(item):
+        while not stop.is_set():
+            try:
+                out.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def worker():
+        profiler = _start_profiler()
+        try:
+            for item in source:
+                if not put(fn(item) if fn is not None else item):
+                    break
+        except BaseException as e:
+            put(_StageFailure(e))
+        finally:
+            close = getattr(source, "close", None)
+            if close is not None:
+                close()
+            _stop_profiler(profiler, name)
+            put(_STAGE_DONE)
+
+    thread = threading.Thread(target=worker, name=name, daemon=True)
+    thread.start()
+    try:
+        while True:
+            item = out.get()
+            if item is _STAGE_DONE:
+                break
+            if isinstance(item, _StageFailure):
+                raise item.exc
+            yield item
+    finally:
+        stop.set()
+        thread.join()
+
+
+def _batched(items, size):
+    """Group an iterable into lists of at most `size` items"""
+    iterator = iter(items)
+    try:
+        while True:
+            batch = list(itertools.islice(iterator, size))
+            if not batch:
+                return
+            yield batch
+    finally:
+        close = getattr(items, "close", None)
+        if close is not None:
+            close()
+
+
+def _flatten(batches):
+    """Yield the items of each batch in order"""
+    try:
+        for batch in batches:
+            yield from batch
+    finally:
+        close = getattr(batches, "close", None)
+        if close is not None:
+            close()
+
+
+class _PixmapArray(np.ndarray):
+    """ndarray over a fitz.Pixmap's sample buffer; holds the pixmap so the memory stays valid"""
+
+
+def pixmap_to_bgr(pix):
+    """
+    Zero-copy BGR view of an RGB pixmap: the sample buffer is wrapped as an
+    ndarray and the channel axis is reversed with a negative stride. Consumers
+    that need contiguous memory (cv2, torch) make their own single copy.
+    """
+    rgb = np.ndarray((pix.height, pix.width, pix.n), dtype=np.uint8, buffer=pix.samples_mv,
+                     strides=(pix.stride, pix.n, 1)).view(_PixmapArray)
+    rgb.pixmap = pix
+    # Hand out a plain ndarray (EasyOCR type-checks with ==); its base chain still holds rgb
+    return np.asarray(rgb[..., ::-1])
+
+
+def looks_garbled(text):
+    """True when a text-layer string is empty or mostly unmapped/odd glyphs (broken ToUnicode maps)"""
+    visible = [c for c in text if not c.isspace()]
+    if not visible or "\ufffd" in text:
+        return True
+    odd = sum(1 for c in visible if unicodedata.category(c) in ("Cc", "Cf", "Co", "Cn", "Cs"))
+    alnum = sum(1 for c in visible if c.isalnum())
+    return odd / len(visible) > GARBLED_CHAR_RATIO or alnum / len(visible) < 0.5
+
+
+def numbering_level(text):
+    """Heading level implied by a leading section number ("2.1 Scope" -> "H2"), else None"""
+    match = re.match(r'^(\d+(?:\.\d+)*)\.?\s', text.strip())
+    return f"H{match.group(1).count('.') + 1}" if match else None
+
+
+def comparable_text(text):
+    """Lowercased alphanumerics only, for matching strings across PDF text extraction quirks"""
+    return "".join(c for c in text.lower() if c.isalnum())
+
+
+def format_page_ranges(pages):
+    """Compact page list, e.g. [1, 2, 3, 7, 9, 10] -> 1-3, 7, 9-10"""
+    ranges = []
+    for page in sorted(pages):
+        if ranges and page == ranges[-1][1] + 1:
+            ranges[-1][1] = page
+        else:
+            ranges.append([page, page])
+    return ", ".join(str(a) if a == b else f"{a}-{b}" for a, b in ranges)
+
+
+def file_digest(path, chunk_size=1 << 20):
+    """SHA-256 of a file's bytes"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def page_fingerprint(doc, page, mode="content", dpi=48):
+    """
+    Hash identifying a page's content. "content" hashes everything the page
+    draws: geometry, content streams, images, forms and fonts. "render" hashes
+    a low-resolution greyscale render instead, which also matches pages whose
+    PDF objects were rewritten (re-saved, renumbered, recompressed) without
+    visible change, at the cost of one small render per page.
+    """
+    digest = hashlib.sha256()
+    digest.update(f"{mode}|{tuple(page.rect)}|{page.rotation}|".encode())
+    if mode == "render":
+        pix = page.get_pixmap(dpi=dpi, colorspace=fitz.csGRAY, alpha=False)
+        digest.update(f"{pix.width}x{pix.height}|".encode())
+        digest.update(pix.samples_mv)
+        return digest.hexdigest()
+    digest.update(page.read_contents())
+    xrefs = [img[0] for img in page.get_images(full=True)]
+    xrefs += [xobj[0] for xobj in page.get_xobjects()]
+    for xref in xrefs:
+        digest.update(doc.xref_object(xref, compressed=True).encode())
+        digest.update(doc.xref_stream_raw(xref) or b"")
+    for font in page.get_fonts(full=True):
+        digest.update(doc.xref_object(font[0], compressed=True).encode())
+    return digest.hexdigest()
+
+
+class OutlineMetrics:
+    """
+    Extraction metrics sink. Page and document records are appended as JSON
+    lines when documents finish (format "jsonl"); with format "prometheus"
+    the text exposition of the run totals is (re)written on every flush.
+    Documents reported after close() are ignored.
+    """
+
+    STAGES = ("render", "detect", "ocr", "hierarchy")
+
+    def __init__(self, path, fmt="jsonl"):
+        if fmt not in ("jsonl", "prometheus"):
+            raise ValueError(f"Unknown metrics format {fmt!r}, expected 'jsonl' or 'prometheus'")
+        self.path = Path(path)
+        self.format = fmt
+        self.lock = threading.Lock()
+        self.stage_seconds = Counter()
+        self.totals = Counter()
+        self.sources = Counter()
+        self.peak_rss = 0
+        self.closed = False
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.file = open(self.path, "a", encoding="utf-8") if fmt == "jsonl" else None
+
+    def page_entry(self, record):
+        """JSON-ready metrics of one page record"""
+        timings = record.get("timings", {})
+        return {
+            "type": "page",
+            "doc": Path(record["doc"]).name,
+            "page": record["page"],
+            **{f"{stage}_s": round(timings.get(stage, 0.0), 6) for stage in self.STAGES[:3]},
+            "boxes": len(record["boxes"]),
+            "ocr_calls": record.get("ocr_calls", 0),
+            "cached": bool(record.get("cached")),
+            "skipped": record.get("skipped"),
+            "error": str(record["error"]) if record["error"] is not None else None,
+        }
+
+    def document(self, pdf_path, outline_data, seconds, records=(), hierarchy_seconds=0.0, peak_rss=0,
+                 page_count=None):
+        """Record one finished document and its pages (page_count when no page records exist)"""
+        pages = [self.page_entry(record) for record in records]
+        peak_rss = max(peak_rss, peak_rss_bytes())
+        entry = {
+            "type": "document",
+            "doc": Path(pdf_path).name,
+            "source": outline_data.get("source"),
+            "pages": len(pages) if page_count is None else page_count,
+            "reused_pages": sum(page["cached"] for page in pages),
+            "headings": len(outline_data["outline"]),
+            "seconds": round(seconds, 6),
+            "hierarchy_s": round(hierarchy_seconds, 6),
+            "peak_rss_mb": round(peak_rss / 2 ** 20, 1),
+            "time": time.time(),
+        }
+        with self.lock:
+            if self.closed:
+                return
+            for page in pages:
+                for stage in self.STAGES[:3]:
+                    self.stage_seconds[stage] += page[f"{stage}_s"]
+                self.totals["pages"] += 1
+                self.totals["boxes"] += page["boxes"]
+                self.totals["ocr_calls"] += page["ocr_calls"]
+            self.stage_seconds["hierarchy"] += hierarchy_seconds
+            self.totals["documents"] += 1
+            self.totals["seconds"] += seconds
+            self.sources[entry["source"]] += 1
+            self.peak_rss = max(self.peak_rss, peak_rss)
+            if self.format == "jsonl":
+                for line in pages + [entry]:
+                    self.file.write(json.dumps(line) + "\n")
+                self.file.flush()
+            else:
+                self.path.write_text(self.prometheus_text(), encoding="utf-8")
+
+    def prometheus_text(self):
+        """Run totals in the Prometheus text exposition format"""
+        lines = [
+            "# HELP outline_stage_seconds_total Time spent in each extraction stage.",
+            "# TYPE outline_stage_seconds_total counter",
+        ]
+        lines += [f'outline_stage_seconds_total{{stage="{stage}"}} {self.stage_seconds[stage]:.6f}'
+                  for stage in self.STAGES]
+        lines += ["# HELP outline_documents_total Documents extracted, by outline source.",
+                  "# TYPE outline_documents_total counter"]
+        lines += [f'outline_documents_total{{source="{source}"}} {count}'
+                  for source, count in sorted(self.sources.items(), key=lambda item: str(item[0]))]
+        for name, help_text in (("pages", "Pages processed."), ("boxes", "Heading boxes detected."),
+                                ("ocr_calls", "Crops read by OCR.")):
+            lines += [f"# HELP outline_{name}_total {help_text}", f"# TYPE outline_{name}_total counter",
+                      f"outline_{name}_total {self.totals[name]}"]
+        lines += ["# HELP outline_document_seconds_total Wall time spent per document, summed.",
+                  "# TYPE outline_document_seconds_total counter",
+                  f"outline_document_seconds_total {self.totals['seconds']:.6f}",
+                  "# HELP outline_peak_rss_bytes Peak resident set size.",
+                  "# TYPE outline_peak_rss_bytes gauge",
+                  f"outline_peak_rss_bytes {self.peak_rss}"]
+        return "\n".join(lines) + "\n"
+
+    def close(self):
+        with self.lock:
+            self.closed = True
+            if self.file is not None:
+                self.file.close()
+                self.file = None
+
+
+class FontOutlineEngine:
+    """
+    Model-free heading classifier over text-layer font statistics. Lines are
+    read with their font size, weight and position, font sizes are clustered
+    per document, and Title/H1..Hn are assigned from vectorized features:
+    size relative to the body cluster, boldness, length and repetition
+    across pages (running headers and footers).
+    """
+
+    def __init__(self, heading_ratio=HEADING_SIZE_RATIO, size_tolerance=FONT_SIZE_TOLERANCE, max_levels=4):
+        self.heading_ratio = heading_ratio
+        self.size_tolerance = size_tolerance
+        self.max_levels = max_levels
+
+    def read_lines(self, doc, pages=None):
+        """Text lines of every page (or of the given page numbers) as (texts, feature arrays, pages with text)"""
+        texts, rows = [], []
+        text_pages = 0
+        for page_no in pages or range(1, len(doc) + 1):
+            page = doc[page_no - 1]
+            blocks = page.get_text("dict", flags=fitz.TEXTFLAGS_TEXT)["blocks"]
+            text_pages += any(b.get("lines") for b in blocks)
+            height = page.rect.height or 1.0
+            for block in blocks:
+                previous = None
+                for line in block.get("lines", []):
+                    spans = [span for span in line["spans"] if span["text"].strip()]
+                    if not spans:
+                        continue
+                    text = " ".join(span["text"].strip() for span in spans)
+                    size = max(span["size"] for span in spans)
+                    bold = all(span["flags"] & fitz.TEXT_FONT_BOLD for span in spans)
+                    if previous is not None and rows[previous][1:3] == [size, bold]:
+                        # Wrapped line of the same heading or paragraph
+                        texts[previous] += " " + text
+                        rows[previous][3] += len(text)
+                        rows[previous][5] += 1
+                        continue
+                    previous = len(rows)
+                    texts.append(text)
+                    # page, size, bold, chars, rel_y, lines in this run
+                    rows.append([page_no, size, bold, len(text), line["bbox"][1] / height, 1])
+        if not rows:
+            return texts, None, text_pages
+        table = np.array(rows, dtype=np.float64)
+        lines = {
+            "page": table[:, 0].astype(np.int64),
+            "size": table[:, 1],
+            "bold": table[:, 2].astype(bool),
+            "chars": table[:, 3],
+            "rel_y": table[:, 4],
+            "runs": table[:, 5],
+        }
+        return texts, lines, text_pages
+
+    def cluster_sizes(self, sizes, weights):
+        """Cluster id of every size, cluster mean sizes, and the body (most characters) cluster"""
+        unique, inverse = np.unique(np.round(sizes * 2) / 2, return_inverse=True)
+        # A new cluster starts wherever consecutive sizes differ by more than the tolerance
+        breaks = np.diff(unique) > self.size_tolerance * unique[:-1]
+        unique_cluster = np.concatenate(([0], np.cumsum(breaks)))
+        cluster = unique_cluster[inverse]
+        chars = np.bincount(cluster, weights=weights)
+        means = np.bincount(cluster, weights=sizes * weights) / np.maximum(chars, 1e-9)
+        return cluster, means, int(np.argmax(chars))
+
+    def classify(self, texts, lines, page_count):
+        """Heading (line index, level) pairs, the title line index (or None) and the heading style count"""
+        cluster, means, body = self.cluster_sizes(lines["size"], lines["chars"])
+        ratio = means[cluster] / means[body]
+        bold = lines["bold"]
+        body_bold = np.average(bold[cluster == body], weights=lines["chars"][cluster == body]) > 0.5
+
+        has_letters = np.array([bool(re.search(r"[^\W\d_]", t)) for t in texts])
+        sentence = np.array([t.rstrip().endswith((".", ";", ",")) and numbering_level(t) is None
+                             for t in texts])
+        keys = np.array([comparable_text(t) for t in texts])
+        # Text repeated on many pages is a running header or footer
+        _, key_index, key_counts = np.unique(keys, return_inverse=True, return_counts=True)
+        repeated = key_counts[key_index] >= max(3, 0.5 * page_count)
+
+        plausible = has_letters & ~repeated & (lines["chars"] <= 120) & (lines["runs"] <= 3)
+        larger = ratio >= self.heading_ratio
+        emphasized = bold & ~body_bold & (ratio >= 0.95) & ~sentence & (lines["chars"] <= 80)
+        heading = plausible & (larger | emphasized)
+        if not heading.any():
+            return [], None, 0
+
+        # One style per (size cluster, weight); levels go bigger clusters first, bold before regular
+        style = cluster * 2 + bold
+        styles = np.unique(style[heading])
+        ordered_keys = styles[np.lexsort((-(styles % 2), -means[styles // 2]))]
+        indices = np.flatnonzero(heading)
+
+        title = None
+        first = indices[(lines["page"][indices] == 1) & (lines["rel_y"][indices] < 0.5)]
+        if len(first):
+            candidate = first[np.argmax(ratio[first])]
+            if ratio[candidate] >= ratio[indices].max():
+                title = int(candidate)
+        if title is not None:
+            indices = indices[indices != title]
+            # The title style is not a heading level unless other headings share it
+            if not np.any(style[indices] == style[title]):
+                ordered_keys = ordered_keys[ordered_keys != style[title]]
+
+        level_of = {int(key): min(i, self.max_levels - 1) + 1 for i, key in enumerate(ordered_keys)}
+        levels = [numbering_level(texts[i]) or f"H{level_of[int(style[i])]}" for i in indices]
+        return list(zip(indices.tolist(), levels)), title, len(ordered_keys)
+
+    @staticmethod
+    def contents_entries(texts, lines, headings):
+        """
+        Headings that are lines of a printed table of contents: another heading's
+        text followed by the number of the page that heading is on
+        """
+        pages = {comparable_text(texts[i]): int(lines["page"][i]) for i, _ in headings}
+        entries = []
+        for i, _ in headings:
+            match = re.match(r"^(.*\D)\s*(\d+)$", texts[i].strip())
+            if match and pages.get(comparable_text(match.group(1))) == int(match.group(2)):
+                entries.append(i)
+        return entries
+
+    def outline(self, doc, strict=False):
+        """
+        Outline data for an open document. With strict=True, None is returned
+        when the statistics are not convincing (no text layer on most pages,
+        too few headings or too many heading styles, garbled text, a printed
+        table of contents or run-in "Label:" lines taken for headings), so a
+        caller can fall back.
+        """
+        texts, lines, text_pages = self.read_lines(doc)
+        if lines is None:
+            return None if strict else {"title": "(unknown)", "outline": []}
+        headings, title, style_count = self.classify(texts, lines, len(doc))
+        if strict:
+            labels = sum(texts[i].rstrip().endswith(":") for i, _ in headings)
+            if (text_pages < 0.8 * len(doc) or len(headings) < FONT_MIN_HEADINGS or style_count > 6
+                    or len(headings) > 0.3 * len(texts) or labels > FONT_MAX_LABEL_SHARE * len(headings)
+                    or self.contents_entries(texts, lines, headings)
+                    or looks_garbled(" ".join(texts[i] for i, _ in headings))):
+                return None
+        outline = [{"level": level, "text": texts[i], "page": int(lines["page"][i])} for i, level in headings]
+        title_text = texts[title] if title is not None else (doc.metadata or {}).get("title", "").strip()
+        if not title_text and outline:
+            title_text = outline[0]["text"]
+        return {"title": title_text or "(unknown)", "outline": outline}
+
+
+class OutlineCache:
+    """
+    Persistent content-addressed cache of per-page extraction results.
+
+    Pages are keyed by their content fingerprint, documents by the hash of
+    the file bytes; both keys are scoped by the model weights hash and the
+    extraction settings, so a new model or setting never returns stale
+    results. Entries are evicted least-recently-used past `max_mb`.
+    """
+
+    def __init__(self, cache_dir, model_path, settings, max_mb=1024):
+        self.path = Path(cache_dir)
+        self.path.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = int(max_mb * 1024 * 1024)
+        self.lock = threading.Lock()
+        # Shared by the pipeline threads; the lock serializes access
+        self.conn = sqlite3.connect(str(self.path / "outline_cache.sqlite"),
+                                    timeout=30, check_same_thread=False)
+        with self.lock, self.conn:
+            self.conn.execute("PRAGMA journal_mode=WAL")
+            self.conn.execute("CREATE TABLE IF NOT EXISTS entries (key TEXT PRIMARY KEY, "
+                              "kind TEXT, data TEXT, size INTEGER, last_used REAL)")
+            self.conn.execute("CREATE INDEX IF NOT EXISTS entries_lru ON entries (last_used)")
+            self.conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+            self.size = self.conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+
+        scope = {"version": CACHE_FORMAT_VERSION, "weights": self.weights_digest(model_path),
+                 "settings": settings}
+        self.scope = hashlib.sha256(json.dumps(scope, sort_keys=True).encode()).hexdigest()
+
+    def weights_digest(self, model_path):
+        """Hash of the model weights, memoized by path, size and mtime"""
+        model_file = Path(model_path)
+        if not model_file.exists():
+            return "missing"
+        st = model_file.stat()
+        memo_key = f"weights:{model_file.resolve()}:{st.st_size}:{st.st_mtime_ns}"
+        with self.lock:
+            row = self.conn.execute("SELECT value FROM meta WHERE key = ?", (memo_key,)).fetchone()
+        if row:
+            return row[0]
+        digest = file_digest(model_file)
+        with self.lock, self.conn:
+            self.conn.execute("INSERT OR REPLACE INTO meta VALUES (?, ?)", (memo_key, digest))
+        return digest
+
+    def key(self, kind, content_hash):
+        return hashlib.sha256(f"{self.scope}:{kind}:{content_hash}".encode()).hexdigest()
+
+    def document_key(self, pdf_path):
+        return self.key("document", file_digest(pdf_path))
+
+    def page_key(self, fingerprint):
+        return self.key("page", fingerprint)
+
+    def get(self, key):
+        """Cached value for key (refreshing its LRU position) or None"""
+        with self.lock, self.conn:
+            row = self.conn.execute("SELECT data FROM entries WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            self.conn.execute("UPDATE entries SET last_used = ? WHERE key = ?", (time.time(), key))
+        return json.loads(row[0])
+
+    def put(self, key, kind, value):
+        data = json.dumps(value, ensure_ascii=False)
+        with self.lock, self.conn:
+            # Other processes write to the same file: take the write lock first and
+            # size the cache from the table, not from this connection's own writes
+            self.conn.execute("BEGIN IMMEDIATE")
+            self.conn.execute("INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?)",
+                              (key, kind, data, len(data), time.time()))
+            self.size = self.conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+            if self.size > self.max_bytes:
+                self._evict()
+
+    def _evict(self):
+        """Drop least recently used entries until the cache is 10% under its limit"""
+        target = self.max_bytes * 0.9
+        rows = self.conn.execute("SELECT key, size FROM entries ORDER BY last_used").fetchall()
+        evicted = []
+        for key, size in rows:
+            if self.size <= target:
+                break
+            evicted.append((key,))
+            self.size -= size
+        self.conn.executemany("DELETE FROM entries WHERE key = ?", evicted)
+
+
 class DockerOutlineExtractor:
-    def __init__(self, model_path="/model/yolov11x_best.pt"):
-        """Initialize extractor with Docker-compatible paths and robust error handling"""
+    def __init__(self, model_path="/model/yolov11x_best.pt", config=None, load_models=True):
+        """
+        Initialize extractor with Docker-compatible paths and robust error handling.
+        Models load on first use unless performance.lazy_models is off. With
+        load_models=False they are never loaded up front, not even eagerly
+        (the parent process of a worker pool only assembles and saves outlines).
+        """
+        self.config = merge_config(DEFAULT_CONFIG, config)
+        self.detector_backend = self.config["model"]["backend"]
+        self.detector_int8 = bool(self.config["model"]["int8"]) and self.detector_backend != "torch"
+        performance = self.config["performance"]
+        self.batch_size = max(1, int(performance["batch_size"]))
+        self.queue_size = max(1, int(performance["queue_size"]))
+        self.cpu_threads = int(performance["cpu_threads"])
+        self.cross_document_batching = bool(performance["cross_document_batching"])
+        self.model_path = model_path
+        self._model = None
+        self._ocr = None
+        # Serializes first-use model loading between pipeline and service threads
+        self._model_lock = threading.RLock()
+        self.use_text_layer = bool(self.config["ocr"]["use_text_layer"])
+        self.batch_recognition = bool(self.config["ocr"]["batch_recognition"])
+        self.split_lines = bool(self.config["ocr"]["split_lines"])
+        triage = self.config["triage"]
+        self.skip_blank = bool(triage["skip_blank"])
+        self.skip_image_only = bool(triage["skip_image_only"])
+        self.detect_zoom = float(triage["detect_dpi"]) / 72.0
+        self.ocr_zoom = float(self.config["preprocessing"]["pdf_dpi"]) / 72.0
+        self.triage_stats = Counter()
+        # How many target boxes were read from the PDF text layer vs by OCR
+        self.box_sources = Counter()
+        self.target_classes = ["Title", "Section-header"]
+        outline_config = self.config["outline"]
+        self.outline_sources = [str(s) for s in outline_config["sources"]]
+        unknown = set(self.outline_sources) - set(TEXT_OUTLINE_SOURCES) - {"vision"}
+        if unknown or not self.outline_sources:
+            raise ValueError(f"Unknown outline sources {sorted(unknown)}; "
+                             f"use {list(TEXT_OUTLINE_SOURCES) + ['vision']}")
+        self.toc_min_entries = int(outline_config["toc_min_entries"])
+        self.toc_min_match = float(outline_config["toc_min_match"])
+        self.engine = outline_config["engine"]
+        if self.engine not in OUTLINE_ENGINES:
+            raise ValueError(f"Unknown outline engine {self.engine!r}, expected one of {OUTLINE_ENGINES}")
+        self.font_engine = FontOutlineEngine()
+        # Which source produced each document's outline
+        self.source_stats = Counter()
+        self.cache_stats = Counter()
+        self.fingerprint_mode = self.config["cache"]["fingerprint"]
+        if self.fingerprint_mode not in ("content", "render"):
+            raise ValueError(f"Unknown page fingerprint {self.fingerprint_mode!r}, expected 'content' or 'render'")
+        self.fingerprint_dpi = int(self.config["cache"]["fingerprint_dpi"])
+        self.cache = self._open_cache(model_path)
+        # Seconds spent per stage over the run, from the page records
+        self.stage_seconds = Counter()
+        metrics_config = self.config["metrics"]
+        self.metrics = (OutlineMetrics(metrics_config["path"], metrics_config["format"])
+                        if metrics_config["path"] else None)
+        if metrics_config["profile_dir"]:
+            enable_profiling(metrics_config["profile_dir"])
+
+        if load_models and self.engine == "yolo" and not performance["lazy_models"]:
+            self._load_models(model_path)
+
+    @property
+    def model(self):
+        """The YOLO detector, loaded on first use"""
+        if self._model is None:
+            with self._model_lock:
+                if self._model is None:
+                    self._model = self._load_detector(self.model_path)
+        return self._model
+
+    @model.setter
+    def model(self, value):
+        self._model = value
+
+    @property
+    def ocr(self):
+        """The EasyOCR reader, built only once some crop really needs OCR"""
+        if self._ocr is None:
+            with self._model_lock:
+                if self._ocr is None:
+                    self._ocr = self._load_ocr()
+        return self._ocr
+
+    @ocr.setter
+    def ocr(self, value):
+        self._ocr = value
+
+    def _configure_threads(self):
+        """Apply the torch/OpenCV thread budget; runs when the first model loads"""
+        if self.cpu_threads > 0:
+            torch.set_num_threads(self.cpu_threads)
+            cv2.setNumThreads(self.cpu_threads)
+
+    def cache_settings(self):
+        """Every setting that changes per-page results; part of the cache key"""
+        return {
+            "render_zoom": RENDER_ZOOM,
+            "detector_backend": self.detector_backend,
+            "detector_int8": self.detector_int8,
+            "detect_zoom": self.detect_zoom,
+            "ocr_zoom": self.ocr_zoom,
+            "skip_blank": self.skip_blank,
+            "skip_image_only": self.skip_image_only,
+            "confidence": 0.25,
+            "target_classes": self.target_classes,
+            "use_text_layer": self.use_text_layer,
+            "batch_recognition": self.batch_recognition,
+            "split_lines": self.split_lines,
+            "ocr_min_confidence": OCR_MIN_CONFIDENCE,
+        }
+
+    def _open_cache(self, model_path):
+        """The persistent outline cache, or None when disabled or unusable"""
+        cache_config = self.config["cache"]
+        # Only the vision pipeline caches page results
+        if not cache_config["enabled"] or self.engine != "yolo":
+            return None
+        try:
+            cache = OutlineCache(cache_config["dir"], model_path, self.cache_settings(),
+                                 max_mb=float(cache_config["max_mb"]))
+            print(f"✅ Outline cache: {cache.path} ({cache.size / 1e6:.1f} MB used)")
+            return cache
+        except Exception as e:
+            print(f"⚠️ Outline cache disabled: {e}")
+            return None
+
+    def _load_models(self, model_path):
+        """Load the YOLO detector and the EasyOCR reader now instead of on first use"""
+        self.model_path = model_path
+        self.model = self._load_detector(model_path)
+        self.ocr = self._load_ocr()
+        print("✅ All models loaded successfully")
+
+    def _load_detector(self, model_path):
+        """Load the YOLO detector for the configured backend"""
+        self._configure_threads()
+        print(f"Batch size: {self.batch_size} page(s), CPU threads: {torch.get_num_threads()}")
         print("Loading YOLO model...")
         
         # Verify YOLO model file exists and is valid
@@ -51,13 +974,20 @@ class DockerOutlineExtractor:
         
         try:
             # Load YOLO model with offline enforcement
-            self.model = YOLO(model_path)
-            self.model.to('cpu')
-            print("✅ YOLO model loaded successfully")
+            detector_path = detector_weights(model_path, self.config)
+            model = _yolo_class()(str(detector_path), task="detect")
+            if self.detector_backend == "torch":
+                model.to('cpu')
+            print(f"✅ YOLO model loaded successfully ({self.detector_backend} backend: {detector_path.name})")
+            return model
         except Exception as e:
             print(f"❌ Error loading YOLO model: {e}")
             raise
-        
+
+    def _load_ocr(self):
+        """Build the EasyOCR reader from the local model files"""
+        self._configure_threads()
+        torch._resolve()
         print("Initializing OCR...")
         
         # Docker-compatible EasyOCR model path with better handling
@@ -77,12 +1007,12 @@ class DockerOutlineExtractor:
         if models_complete:
             print(f"✅ Complete EasyOCR models found at: {easyocr_models_path}")
             try:
-                self.ocr = easyocr.Reader(['en'], gpu=False, model_storage_directory=str(easyocr_models_path))
+                reader = easyocr.Reader(['en'], gpu=False, model_storage_directory=str(easyocr_models_path))
                 print("✅ EasyOCR initialized with local models")
             except Exception as e:
                 print(f"⚠️ Failed to use local EasyOCR models: {e}")
                 print("Falling back to default EasyOCR (may fail in offline mode)")
-                self.ocr = easyocr.Reader(['en'], gpu=False)
+                reader = easyocr.Reader(['en'], gpu=False)
         else:
             print(f"⚠️ Incomplete EasyOCR models at {easyocr_models_path}")
             print("Missing or corrupted model files:")
@@ -95,51 +1025,235 @@ class DockerOutlineExtractor:
             # Try fallback (will likely fail in offline Docker mode)
             print("Attempting fallback to default EasyOCR location...")
             try:
-                self.ocr = easyocr.Reader(['en'], gpu=False)
+                reader = easyocr.Reader(['en'], gpu=False)
                 print("✅ EasyOCR initialized with default location")
             except Exception as e:
                 print(f"❌ EasyOCR initialization failed: {e}")
                 raise RuntimeError("Cannot initialize EasyOCR. Ensure models are properly downloaded in Docker build.")
-        
-        self.target_classes = ["Title", "Section-header"]
-        print("✅ All models loaded successfully")
+        return reader
 
-    def pdf_to_images(self, pdf_path):
-        """Convert PDF pages to images"""
+    def render_page(self, page, zoom=RENDER_ZOOM, clip=None):
+        """Render a fitz page (or the clip rect of it) to a BGR image"""
+        mat = fitz.Matrix(zoom, zoom)
+        try:
+            pix = page.get_pixmap(matrix=mat, clip=clip, alpha=False)
+        except AttributeError:
+            pix = page.getPixmap(matrix=mat, clip=clip, alpha=False)
+        return pixmap_to_bgr(pix)
+
+    def iter_page_images(self, pdf_path):
+        """Render PDF pages one at a time, yielding (page number, BGR image)"""
         doc = fitz.open(pdf_path)
-        images = []
-        for i in range(len(doc)):
-            page = doc[i]
-            mat = fitz.Matrix(2.0, 2.0)
-            try:
-                pix = page.get_pixmap(matrix=mat)
-            except AttributeError:
-                pix = page.getPixmap(matrix=mat)
-            
-            img_data = pix.tobytes("png")
-            pil_img = Image.open(BytesIO(img_data))
-            cv_img = cv2.cvtColor(np.array(pil_img), cv2.COLOR_RGB2BGR)
-            images.append(cv_img)
-        doc.close()
-        return images
+        try:
+            for i in range(len(doc)):
+                yield i + 1, self.render_page(doc[i])
+        finally:
+            doc.close()
+
+    def pdf_to_images(self, pdf_path):
+        """Convert PDF pages to images (holds every page in memory; prefer iter_page_images)"""
+        return [img for _, img in self.iter_page_images(pdf_path)]
+
+    def text_layer_words(self, page, raw_words=None):
+        """Words of the page text layer as (rect in render pixels, block, line, word, text)"""
+        # The pipeline stages run on different threads and MuPDF is not thread-safe,
+        # so words are collected on the render thread and clipped to boxes later.
+        to_pixels = page.rotation_matrix * fitz.Matrix(RENDER_ZOOM, RENDER_ZOOM)
+        if raw_words is None:
+            raw_words = page.get_text("words")
+        words = []
+        for x0, y0, x1, y1, word, block_no, line_no, word_no in raw_words:
+            words.append((fitz.Rect(x0, y0, x1, y1) * to_pixels, block_no, line_no, word_no, word))
+        return words
+
+    def extract_text_layer(self, words, bbox):
+        """
+        Text-layer equivalent of page.get_text clipped to the bbox: the bbox is
+        mapped back to PDF space (undoing the render zoom) and every word whose
+        centre falls inside it is joined in reading order.
+        """
+        clip = fitz.Rect(bbox)
+        inside = []
+        for rect, block_no, line_no, word_no, word in words:
+            centre = fitz.Point((rect.x0 + rect.x1) / 2, (rect.y0 + rect.y1) / 2)
+            if centre in clip:
+                inside.append((block_no, line_no, word_no, word))
+        inside.sort()
+        return " ".join(w[3] for w in inside).strip()
+
+    def text_layer_text(self, record, bbox):
+        """Text-layer text for a box, or None when the page has none or it looks garbled"""
+        words = record.get("words")
+        if words:
+            text = self.extract_text_layer(words, bbox)
+            if not looks_garbled(text):
+                return text
+        return None
 
     def extract_text(self, image, bbox):
         """Extract text from bounding box using OCR"""
-        x1, y1, x2, y2 = bbox
-        h, w = image.shape[:2]
-        x1, y1 = max(0, x1), max(0, y1)
-        x2, y2 = min(w, x2), min(h, y2)
+        x1, y1, x2, y2 = self.clip_bbox(bbox, image.shape)
         crop = image[y1:y2, x1:x2]
         if crop.size == 0:
             return ""
         try:
-            results = self.ocr.readtext(crop)
-            chunks = [r[1] for r in results if len(r) >= 3 and r[2] > 0.5]
-            return " ".join(chunks).strip()
+            return self.read_crop(crop)
         except Exception as e:
             print(f"⚠️ OCR error for bbox {bbox}: {e}")
             return ""
 
+    def read_crop(self, crop):
+        """Full EasyOCR readtext (CRAFT detection + recognition) on one crop"""
+        results = self.ocr.readtext(crop)
+        chunks = [r[1] for r in results if len(r) >= 3 and r[2] > OCR_MIN_CONFIDENCE]
+        return " ".join(chunks).strip()
+
+    @staticmethod
+    def clip_bbox(bbox, shape):
+        """Clamp a pixel bbox to the image bounds"""
+        x1, y1, x2, y2 = bbox
+        h, w = shape[:2]
+        return max(0, x1), max(0, y1), min(w, x2), min(h, y2)
+
+    @staticmethod
+    def ink_mask(grey_crop):
+        """Binary ink mask of a greyscale crop (1 = ink)"""
+        # Otsu picks the ink/paper split; invert light-on-dark crops so ink is always set
+        mode = cv2.THRESH_BINARY_INV if grey_crop.mean() >= 128 else cv2.THRESH_BINARY
+        _, ink = cv2.threshold(grey_crop, 0, 1, mode + cv2.THRESH_OTSU)
+        return ink
+
+    @classmethod
+    def text_line_bands(cls, grey_crop, ink=None):
+        """(top, bottom) rows of the ink bands in a greyscale crop, from its horizontal projection profile"""
+        if grey_crop.size == 0:
+            return []
+        if ink is None:
+            ink = cls.ink_mask(grey_crop)
+        rows = ink.sum(axis=1) > max(1, 0.01 * grey_crop.shape[1])
+        # Rising and falling edges of the profile; bands shorter than 3px are specks
+        edges = np.flatnonzero(np.diff(np.concatenate(([0], rows.astype(np.int8), [0]))))
+        return [(int(top), int(bottom)) for top, bottom in zip(edges[::2], edges[1::2]) if bottom - top >= 3]
+
+    @classmethod
+    def count_text_lines(cls, grey_crop):
+        """Number of ink bands in a greyscale crop"""
+        return len(cls.text_line_bands(grey_crop))
+
+    @classmethod
+    def split_text_lines(cls, grey_crop, pad=2):
+        """
+        One tight greyscale crop per text line, or None when the crop does not
+        look like stacked lines of text. Blank margins are trimmed so the
+        recognizer does not spend its fixed-height input on padding.
+        """
+        ink = cls.ink_mask(grey_crop)
+        bands = cls.text_line_bands(grey_crop, ink)
+        if not bands:
+            return [grey_crop]
+        if len(bands) > OCR_MAX_SPLIT_LINES:
+            return None
+        h, w = grey_crop.shape[:2]
+        lines = []
+        for top, bottom in bands:
+            columns = np.flatnonzero(ink[top:bottom].any(axis=0))
+            left, right = (columns[0], columns[-1] + 1) if len(columns) else (0, w)
+            lines.append(grey_crop[max(0, top - pad):min(h, bottom + pad),
+                                   max(0, left - pad):min(w, right + pad)])
+        return lines
+
+    def recognize_lines(self, grey_crops):
+        """
+        Batched recognition of greyscale crops that each hold a single text
+        line. Skips EasyOCR's CRAFT detector: every crop is resized to the
+        recognizer's native height and lines of similar width share a batch,
+        so short lines are not padded to the widest one. Returns (text,
+        confidence) per crop.
+        """
+        from easyocr.utils import get_image_list
+        from easyocr.recognition import get_text
+
+        prepared = []
+        for i, grey in enumerate(grey_crops):
+            h, w = grey.shape[:2]
+            crop_list, crop_width = get_image_list([[0, w, 0, h]], [], grey,
+                                                   model_height=OCR_LINE_HEIGHT, sort_output=False)
+            prepared.append((int(crop_width), i, crop_list))
+        prepared.sort(key=lambda item: item[0])
+
+        # Same character filter Reader.readtext applies when no allow/blocklist is given
+        ignore_char = "".join(set(self.ocr.character) - set(self.ocr.lang_char))
+        results = [("", 0.0)] * len(grey_crops)
+        start = 0
+        while start < len(prepared):
+            end = start + 1
+            while end < len(prepared) and prepared[end][0] <= prepared[start][0] * OCR_WIDTH_BUCKET_RATIO:
+                end += 1
+            bucket = prepared[start:end]
+            image_list = [image for _, _, crop_list in bucket for image in crop_list]
+            recognized = get_text(self.ocr.character, OCR_LINE_HEIGHT, bucket[-1][0],
+                                  self.ocr.recognizer, self.ocr.converter, image_list,
+                                  ignore_char, "greedy", 5, len(image_list), 0.1, 0.5, 0.003,
+                                  0, self.ocr.device)
+            for (_, i, _), r in zip(bucket, recognized):
+                results[i] = (r[1], r[2])
+            start = end
+        return results
+
+    def ocr_crops(self, crops):
+        """
+        Page-level OCR over BGR crops. Crops are split into text lines (with
+        split_lines off, only single-line crops are batched) and all lines of
+        the page go through the batched recognizer; crops that do not look
+        like text lines keep the full readtext path. Returns one text per crop.
+        """
+        texts = [""] * len(crops)
+        lines, owners = [], []
+        for i, crop in enumerate(crops):
+            if crop.size == 0:
+                continue
+            if not self.batch_recognition:
+                texts[i] = self._read_crop_safely(crop)
+                continue
+            grey = cv2.cvtColor(crop, cv2.COLOR_BGR2GRAY)
+            crop_lines = self.split_text_lines(grey) if self.split_lines else (
+                [grey] if self.count_text_lines(grey) <= 1 else None)
+            if crop_lines is None:
+                texts[i] = self._read_crop_safely(crop)
+            else:
+                lines.extend(crop_lines)
+                owners.extend([i] * len(crop_lines))
+
+        if lines:
+            try:
+                # Lines of one crop come back top to bottom, like readtext's chunks
+                parts = {i: [] for i in owners}
+                for i, (text, confidence) in zip(owners, self.recognize_lines(lines)):
+                    if confidence > OCR_MIN_CONFIDENCE and text.strip():
+                        parts[i].append(text.strip())
+                for i, chunks in parts.items():
+                    texts[i] = " ".join(chunks)
+            except Exception as e:
+                print(f"⚠️ Batched OCR failed, falling back to per-box OCR: {e}")
+                for i in set(owners):
+                    texts[i] = self._read_crop_safely(crops[i])
+        return texts
+
+    def _read_crop_safely(self, crop):
+        try:
+            return self.read_crop(crop)
+        except Exception as e:
+            print(f"⚠️ OCR error for crop {crop.shape[1]}x{crop.shape[0]}: {e}")
+            return ""
+
+    def ocr_boxes(self, image, bboxes):
+        """Page-level OCR of bboxes on an image; returns one text per bbox"""
+        crops = []
+        for bbox in bboxes:
+            x1, y1, x2, y2 = self.clip_bbox(bbox, image.shape)
+            crops.append(image[y1:y2, x1:x2] if x2 > x1 and y2 > y1 else image[0:0, 0:0])
+        return self.ocr_crops(crops)
+
     def assign_hierarchy(self, detected_text, bbox, area, rel_y_pos, page, first_title_found):
         """Assign hierarchy level with unlimited depth support"""
         text = detected_text.strip()
@@ -170,74 +1284,307 @@ class DockerOutlineExtractor:
         else:
             return "H3"
 
-    def get_outline(self, pdf_path):
-        """Extract outline from a single PDF"""
-        print(f"Processing: {Path(pdf_path).name}")
-        
+    def _cached_records(self, pdf_path, doc_key, pages):
+        """All page records of a document from the cache, or None unless every page is cached"""
+        page_keys = self.cache.get(doc_key)
+        if page_keys is None:
+            return None
+        numbered = list(enumerate(page_keys, 1))
+        if pages:
+            numbered = numbered[pages[0] - 1:pages[1]]
+        records = []
+        for page_no, key in numbered:
+            boxes = self.cache.get(key)
+            if boxes is None:
+                return None
+            records.append(self._cached_record(pdf_path, page_no, boxes, key, doc_key))
+        return records
+
+    @staticmethod
+    def _cached_record(pdf_path, page_no, boxes, key, doc_key):
+        for box in boxes:
+            box["source"] = "cache"
+        return {"doc": str(pdf_path), "page": page_no, "image": None, "words": None,
+                "boxes": boxes, "error": None, "cached": True, "cache_key": key, "doc_key": doc_key}
+
+    def _load_page(self, doc, index, pdf_path, doc_key):
+        """Page record for doc[index]: from the cache when its content is unchanged, else rendered"""
+        page = doc[index]
+        key = None
+        if self.cache is not None:
+            key = self.cache.page_key(page_fingerprint(doc, page, self.fingerprint_mode, self.fingerprint_dpi))
+            boxes = self.cache.get(key)
+            if boxes is not None:
+                self.cache_stats["page_hits"] += 1
+                return self._cached_record(pdf_path, index + 1, boxes, key, doc_key)
+            self.cache_stats["page_misses"] += 1
+        record = {
+            "doc": str(pdf_path),
+            "page": index + 1,
+            "image": None,
+            "words": None,
+            "zoom": self.detect_zoom,
+            "boxes": [],
+            "error": None,
+            "cache_key": key,
+            "doc_key": doc_key,
+        }
+        raw_words = page.get_text("words")
+        record["skipped"] = self.triage_page(page, raw_words)
+        if record["skipped"]:
+            return record
+        if self.use_text_layer:
+            record["words"] = self.text_layer_words(page, raw_words)
+        record["zoom"] = self.page_zoom(raw_words)
+        start = time.perf_counter()
+        record["image"] = self.render_page(page, record["zoom"])
+        record["timings"] = {"render": time.perf_counter() - start}
+        return record
+
+    def page_zoom(self, raw_words):
+        """
+        Detection zoom of a page. Pages whose header text comes from the text layer
+        are detected at detect_dpi, and only the few boxes it misses are re-rendered
+        for OCR. Pages without one (scans) OCR every box, so they are rendered once
+        at the OCR resolution instead of twice.
+        """
+        if raw_words and self.use_text_layer:
+            return self.detect_zoom
+        return max(self.detect_zoom, self.ocr_zoom)
+
+    def triage_page(self, page, raw_words):
+        """Why a page can skip detection ('blank' or 'image_only'), or None"""
+        if raw_words:
+            return None
+        if page.get_images(full=False):
+            return "image_only" if self.skip_image_only else None
+        # Vector-only pages (e.g. text converted to outlines) still go to detection
+        if self.skip_blank and not page.get_drawings():
+            return "blank"
+        return None
+
+    def render_crops(self, record, bboxes):
+        """Re-render bboxes (reference pixels) of a page at the OCR resolution"""
+        with _FITZ_LOCK:
+            doc = fitz.open(record["doc"])
+            try:
+                page = doc[record["page"] - 1]
+                return [self.render_page(page, self.ocr_zoom, clip=fitz.Rect(bbox) / RENDER_ZOOM)
+                        for bbox in bboxes]
+            finally:
+                doc.close()
+
+    def _render_stage(self, pdf_paths, pages=None):
+        """Page records for the pipeline, rendered lazily, one document after another"""
+        for pdf_path in pdf_paths:
+            try:
+                doc_key = None
+                if self.cache is not None:
+                    # Unchanged documents skip opening the PDF at all
+                    doc_key = self.cache.document_key(pdf_path)
+                    records = self._cached_records(pdf_path, doc_key, pages)
+                    if records is not None:
+                        self.cache_stats["document_hits"] += 1
+                        self.cache_stats["page_hits"] += len(records)
+                        yield from records
+                        continue
+                    self.cache_stats["document_misses"] += 1
+
+                with _FITZ_LOCK:
+                    doc = fitz.open(pdf_path)
+                try:
+                    # `pages` is an inclusive 1-based (first, last) range
+                    page_indices = range(pages[0] - 1, min(pages[1], len(doc))) if pages else range(len(doc))
+                    for i in page_indices:
+                        # Never yield while holding the lock
+                        with _FITZ_LOCK:
+                            record = self._load_page(doc, i, pdf_path, doc_key)
+                        yield record
+                finally:
+                    with _FITZ_LOCK:
+                        doc.close()
+            except Exception as e:
+                print(f"❌ Error converting PDF to images: {e}")
+                # Fails this document only; later documents keep flowing
+                yield {"doc": str(pdf_path), "page": 0, "image": None, "words": None,
+                       "boxes": [], "error": e, "failed": True}
+
+    def _collect_boxes(self, record, result):
+        """Keep the target-class boxes of one YOLO result on its page record"""
+        if result.boxes is None:
+            return
+        img_h = record["image"].shape[0]
+        # Map detections back to reference pixels whatever resolution YOLO saw
+        scale = RENDER_ZOOM / record.get("zoom", RENDER_ZOOM)
+
+        for box in result.boxes:
+            class_id = int(box.cls[0])
+            class_name = self.model.names[class_id]
+
+            if class_name not in self.target_classes:
+                continue
+
+            x1, y1, x2, y2 = box.xyxy[0].cpu().numpy()
+            rel_y = y1 / img_h if img_h > 0 else 0.0
+            x1, y1, x2, y2 = x1 * scale, y1 * scale, x2 * scale, y2 * scale
+            record["boxes"].append({
+                "class_name": class_name,
+                "bbox": [int(x1), int(y1), int(x2), int(y2)],
+                "area": (x2 - x1) * (y2 - y1),
+                "rel_y": rel_y,
+            })
+
+    def detect_page(self, record):
+        """Run YOLO on a single rendered page and keep the target boxes"""
+        start = time.perf_counter()
         try:
-            images = self.pdf_to_images(pdf_path)
+            # Run YOLO detection with explicit offline settings
+            detections = self.model(record["image"], conf=0.25, device='cpu', verbose=False)
+            for result in detections:
+                self._collect_boxes(record, result)
         except Exception as e:
-            print(f"❌ Error converting PDF to images: {e}")
-            raise
-        
+            record["error"] = e
+        record.setdefault("timings", {})["detect"] = time.perf_counter() - start
+        return record
+
+    def detect_batch(self, records):
+        """Pipeline stage: one YOLO forward pass over a batch of rendered pages"""
+        pending = [r for r in records if r["image"] is not None and r["error"] is None]
+        if len(pending) == 1:
+            self.detect_page(pending[0])
+        elif pending:
+            try:
+                start = time.perf_counter()
+                # A list source is letterboxed and run as a single batch; results keep input order
+                detections = self.model([r["image"] for r in pending], conf=0.25,
+                                        device='cpu', verbose=False)
+                for record, result in zip(pending, detections):
+                    self._collect_boxes(record, result)
+                # The forward pass is shared, so each page is charged an equal share
+                share = (time.perf_counter() - start) / len(pending)
+                for record in pending:
+                    record.setdefault("timings", {})["detect"] = share
+            except Exception:
+                # Retry page by page so one bad page does not fail the whole batch
+                for record in pending:
+                    record["boxes"] = []
+                    self.detect_page(record)
+        return records
+
+    def ocr_page(self, record):
+        """Read the text of every detected box, then release the image"""
+        start = time.perf_counter()
+        try:
+            ocr_boxes = []
+            for box in record["boxes"]:
+                text = self.text_layer_text(record, box["bbox"])
+                if text is None:
+                    ocr_boxes.append(box)
+                else:
+                    box["text"], box["source"] = text, "text"
+
+            if ocr_boxes:
+                bboxes = [box["bbox"] for box in ocr_boxes]
+                zoom = record.get("zoom", RENDER_ZOOM)
+                if self.ocr_zoom > zoom:
+                    # Two-pass mode: YOLO saw a low-resolution page, OCR reads sharp crops
+                    texts = self.ocr_crops(self.render_crops(record, bboxes))
+                    record["hires_crops"] = len(bboxes)
+                else:
+                    # Boxes are in reference pixels, the image is at the detection zoom
+                    scale = zoom / RENDER_ZOOM
+                    texts = self.ocr_boxes(record["image"],
+                                           [[int(v * scale) for v in bbox] for bbox in bboxes])
+                for box, text in zip(ocr_boxes, texts):
+                    box["text"], box["source"] = text, "ocr"
+            record["ocr_calls"] = len(ocr_boxes)
+        except Exception as e:
+            record["error"] = e
+        record.setdefault("timings", {})["ocr"] = time.perf_counter() - start
+        record["image"] = None
+        record["words"] = None
+        return record
+
+    def ocr_batch(self, records):
+        """Pipeline stage: OCR every page of a detected batch and cache the finished pages"""
+        for record in records:
+            if record.get("failed") or record.get("cached"):
+                continue
+            if not record.get("skipped"):
+                self.ocr_page(record)
+            # Skipped pages are cached too, so a document entry never points at a missing page
+            if self.cache is not None and record.get("cache_key") and record["error"] is None:
+                boxes = [dict(box, area=float(box["area"]), rel_y=float(box["rel_y"]))
+                         for box in record["boxes"]]
+                self.cache.put(record["cache_key"], "page", boxes)
+        return records
+
+    def iter_outline_pages(self, pdf_paths, pages=None):
+        """
+        Streaming page pipeline: rendering, detection and OCR run as separate
+        stages joined by bounded queues, so page N+1 renders while page N is in
+        detection and only a few pages are ever held in memory. Pages are
+        detected in batches of `batch_size`, which may span several documents;
+        records come back in document and page order. `pages` restricts every
+        document to an inclusive 1-based (first, last) page range.
+        """
+        if isinstance(pdf_paths, (str, Path)):
+            pdf_paths = [pdf_paths]
+        rendered = run_stage(self._render_stage(pdf_paths, pages),
+                             maxsize=self.queue_size * self.batch_size, name="outline-render")
+        detected = run_stage(_batched(rendered, self.batch_size), self.detect_batch,
+                             maxsize=self.queue_size, name="outline-detect")
+        return _flatten(run_stage(detected, self.ocr_batch, maxsize=self.queue_size,
+                                  name="outline-ocr"))
+
+    def build_outline(self, page_records, timings=None):
+        """
+        Assemble title and outline from page records in page order. Time spent
+        assigning levels is added to timings["hierarchy"] when given.
+        """
+        hierarchy_seconds = 0.0
         outline = []
         title = None
         first_title_found = False
 
-        for page_idx, img in enumerate(images, 1):
-            try:
-                # Run YOLO detection with explicit offline settings
-                detections = self.model(img, conf=0.25, device='cpu', verbose=False)
-                
-                for result in detections:
-                    if result.boxes is None: 
+        for record in page_records:
+            page_idx = record["page"]
+            if record["error"] is not None:
+                print(f"⚠️ Error processing page {page_idx}: {record['error']}")
+
+            for box in record["boxes"]:
+                class_name = box["class_name"]
+                text = box.get("text", "")
+                if not text:
+                    continue
+                text = text.strip()
+
+                if class_name == "Title":
+                    if not first_title_found:
+                        title = text
+                        level = "H1"
+                        first_title_found = True
+                    else:
+                        # Skip additional titles after the first one
                         continue
-                    
-                    for box in result.boxes:
-                        class_id = int(box.cls[0])
-                        class_name = self.model.names[class_id]
-                        
-                        if class_name not in self.target_classes:
-                            continue
-                        
-                        x1, y1, x2, y2 = box.xyxy[0].cpu().numpy()
-                        bbox = [int(x1), int(y1), int(x2), int(y2)]
-                        
-                        area = (x2 - x1) * (y2 - y1)
-                        rel_y = y1 / img.shape[0] if img.shape[0] > 0 else 0.0
-
-                        text = self.extract_text(img, bbox)
-                        if not text: 
-                            continue
-                        text = text.strip()
-
-                        if class_name == "Title":
-                            if not first_title_found:
-                                title = text
-                                level = "H1"
-                                first_title_found = True
-                            else:
-                                # Skip additional titles after the first one
-                                continue 
-                        else:
-                            level = self.assign_hierarchy(text, bbox, area, rel_y, page_idx, first_title_found)
-                            if not level: 
-                                continue
-
-                        # Skip titles found on pages after the first
-                        if class_name == "Title" and page_idx > 1:
-                            continue
-
-                        outline.append({
-                            "level": level,
-                            "text": text,
-                            "page": page_idx,
-                        })
-                        
-            except Exception as e:
-                print(f"⚠️ Error processing page {page_idx}: {e}")
-                continue
-        
+                else:
+                    start = time.perf_counter()
+                    level = self.assign_hierarchy(text, box["bbox"], box["area"], box["rel_y"],
+                                                  page_idx, first_title_found)
+                    hierarchy_seconds += time.perf_counter() - start
+                    if not level:
+                        continue
+
+                # Skip titles found on pages after the first
+                if class_name == "Title" and page_idx > 1:
+                    continue
+
+                outline.append({
+                    "level": level,
+                    "text": text,
+                    "page": page_idx,
+                })
+
         # Fallback title selection if no title was found
         if title is None and outline:
             for item in outline:
@@ -247,8 +1594,190 @@ class DockerOutlineExtractor:
             if title is None:
                 title = outline[0]["text"]
 
+        if timings is not None:
+            timings["hierarchy"] = timings.get("hierarchy", 0.0) + hierarchy_seconds
         return {"title": title or "(unknown)", "outline": outline}
 
+    def outline_from_records(self, page_records):
+        """Build one document's outline from its page records, tallying box text sources"""
+        start = time.perf_counter()
+        sources = Counter()
+        page_keys = []
+        doc_keys = set()
+        pages = []
+
+        def checked(records):
+            for record in records:
+                if record.get("failed"):
+                    raise record["error"]
+                self.stage_seconds.update(record.get("timings", {}))
+                pages.append(record)
+                sources.update(box["source"] for box in record["boxes"] if "source" in box)
+                if record.get("skipped"):
+                    self.triage_stats[record["skipped"]] += 1
+                self.triage_stats["hires_crops"] += record.get("hires_crops", 0)
+                page_keys.append(record.get("cache_key") if record["error"] is None else None)
+                doc_keys.add(record.get("doc_key"))
+                yield record
+
+        timings = {}
+        outline_data = self.build_outline(checked(page_records), timings)
+        self.stage_seconds.update(timings)
+        outline_data["source"] = "vision"
+        self.source_stats["vision"] += 1
+        self.box_sources.update(sources)
+        print(f"   Text layer: {sources['text']} box(es), OCR: {sources['ocr']} box(es), "
+              f"cached: {sources['cache']} box(es)")
+        if self.cache is not None and pages:
+            self.report_changes(pages)
+
+        # Remember the document's page keys so an identical file skips fingerprinting
+        doc_key = doc_keys.pop() if len(doc_keys) == 1 else None
+        if self.cache is not None and doc_key and page_keys and all(page_keys):
+            self.cache.put(doc_key, "document", page_keys)
+        if self.metrics is not None and pages:
+            self.metrics.document(pages[0]["doc"], outline_data, time.perf_counter() - start, pages,
+                                  timings["hierarchy"], max(r.get("peak_rss", 0) for r in pages))
+        return outline_data
+
+    def report_changes(self, pages):
+        """Print which pages of a document were re-extracted and which came from the cache"""
+        reused = [r["page"] for r in pages if r.get("cached")]
+        extracted = [r["page"] for r in pages if not r.get("cached") and not r.get("skipped")]
+        if not reused:
+            return
+        if not extracted:
+            print(f"   Unchanged: all {len(reused)} page(s) from the cache")
+        else:
+            print(f"   Incremental: {len(reused)} of {len(pages)} page(s) reused, "
+                  f"re-extracted page(s) {format_page_ranges(extracted)}")
+
+    def toc_outline(self, doc):
+        """Outline from the PDF's bookmarks, or None when they are missing or implausible"""
+        toc = [(level, title.strip(), page) for level, title, page in doc.get_toc(simple=True)
+               if title.strip()]
+        if len(toc) < self.toc_min_entries:
+            return None
+        previous = 0
+        for level, _, page in toc:
+            # Levels may only deepen one step at a time; every entry needs a real page
+            if level > previous + 1 or not 1 <= page <= len(doc):
+                return None
+            previous = level
+
+        # Bookmarks copied from another document, or pointing into images, have no
+        # text-layer line with their title on their page
+        texts, lines, _ = self.font_engine.read_lines(doc, sorted({page for _, _, page in toc}))
+        page_lines = {}
+        for text, page in zip(texts, lines["page"] if lines is not None else ()):
+            page_lines.setdefault(int(page), set()).add(comparable_text(text))
+        found = sum(comparable_text(title) in page_lines.get(page, ()) for _, title, page in toc)
+        if found < self.toc_min_match * len(toc):
+            return None
+
+        title = (doc.metadata or {}).get("title", "").strip() or toc[0][1]
+        return {
+            "title": title,
+            "outline": [{"level": f"H{level}", "text": text, "page": page} for level, text, page in toc],
+        }
+
+    def text_outline(self, pdf_path):
+        """
+        Outline from the model-free sources (bookmarks, font statistics) in
+        configured order, or None when vision detection is needed. With the
+        fonts engine the "vision" step is the font engine without its quality
+        check, so every document resolves here. The result records which
+        source produced it under "source".
+        """
+        sources = [s for s in self.outline_sources if s in TEXT_OUTLINE_SOURCES]
+        fonts_engine = self.engine == "fonts" and "vision" in self.outline_sources
+        if not sources and not fonts_engine:
+            return None
+        start = time.perf_counter()
+        outline_data, page_count = self._text_outline(pdf_path, sources, fonts_engine)
+        if outline_data is not None:
+            self.source_stats[outline_data["source"]] += 1
+            if self.metrics is not None:
+                self.metrics.document(pdf_path, outline_data, time.perf_counter() - start,
+                                      page_count=page_count)
+            return outline_data
+        if "vision" not in self.outline_sources:
+            raise ValueError(f"No outline source in {self.outline_sources} produced an outline")
+        return None
+
+    def _text_outline(self, pdf_path, sources, fonts_engine):
+        """(outline data or None, page count) from the model-free sources"""
+        with _FITZ_LOCK:
+            with fitz.open(pdf_path) as doc:
+                for source in sources:
+                    try:
+                        if source == "toc":
+                            outline_data = self.toc_outline(doc)
+                        else:
+                            outline_data = self.font_engine.outline(doc, strict=True)
+                    except Exception as e:
+                        print(f"⚠️ {source} outline failed, trying the next source: {e}")
+                        continue
+                    if outline_data is not None:
+                        outline_data["source"] = source
+                        return outline_data, len(doc)
+                if fonts_engine:
+                    outline_data = self.font_engine.outline(doc)
+                    outline_data["source"] = "fonts"
+                    return outline_data, len(doc)
+                return None, len(doc)
+
+    def get_outline(self, pdf_path):
+        """Extract outline from a single PDF"""
+        print(f"Processing: {Path(pdf_path).name}")
+        outline_data = self.text_outline(pdf_path)
+        if outline_data is not None:
+            return outline_data
+        return self.outline_from_records(self.iter_outline_pages(pdf_path))
+
+    def iter_outlines(self, pdf_files):
+        """
+        Yield (pdf_file, outline_data, error) for every PDF in order. With
+        cross-document batching, all files share one page pipeline so YOLO
+        batches are filled across document boundaries.
+        """
+        if not self.cross_document_batching or len(pdf_files) < 2:
+            for pdf_file in pdf_files:
+                try:
+                    yield pdf_file, self.get_outline(str(pdf_file)), None
+                except Exception as e:
+                    yield pdf_file, None, e
+            return
+
+        # Documents with a usable bookmark or font outline never enter the page pipeline
+        text_outlines = {}
+        for pdf_file in pdf_files:
+            try:
+                text_outlines[pdf_file] = self.text_outline(str(pdf_file))
+            except Exception as e:
+                text_outlines[pdf_file] = e
+        vision_files = [f for f in pdf_files if text_outlines[f] is None]
+
+        groups = itertools.groupby(self.iter_outline_pages(vision_files), key=lambda r: r["doc"])
+        current = next(groups, None)
+        for pdf_file in pdf_files:
+            print(f"Processing: {pdf_file.name}")
+            if isinstance(text_outlines[pdf_file], Exception):
+                yield pdf_file, None, text_outlines[pdf_file]
+                continue
+            if text_outlines[pdf_file] is not None:
+                yield pdf_file, text_outlines[pdf_file], None
+                continue
+            records = []
+            # Documents without pages produce no records at all
+            if current is not None and current[0] == str(pdf_file):
+                records = list(current[1])
+                current = next(groups, None)
+            try:
+                yield pdf_file, self.outline_from_records(records), None
+            except Exception as e:
+                yield pdf_file, None, e
+
     def save_json(self, data, output_path):
         """Save outline data to JSON file"""
         try:
@@ -258,9 +1787,11 @@ class DockerOutlineExtractor:
             print(f"❌ Error saving JSON to {output_path}: {e}")
             raise
 
-    def process_all_pdfs(self, input_dir="/app/input", output_dir="/app/output"):
+    def process_all_pdfs(self, input_dir="/app/input", output_dir="/app/output", worker_pool=None):
         """
         Batch process all PDFs in input directory - MAIN DOCKER FUNCTION
+        With a worker_pool, PDFs are extracted by its worker processes and
+        this instance only assembles and saves the outlines.
         """
         input_path = Path(input_dir)
         output_path = Path(output_dir)
@@ -294,13 +1825,17 @@ class DockerOutlineExtractor:
         successful_count = 0
         failed_count = 0
         
-        for pdf_file in pdf_files:
-            file_start_time = time.time()
-            
+        if worker_pool is not None:
+            outlines = worker_pool.iter_outlines(pdf_files, self)
+        else:
+            outlines = self.iter_outlines(pdf_files)
+
+        file_start_time = time.time()
+        for pdf_file, outline_data, error in outlines:
             try:
-                # Extract outline
-                outline_data = self.get_outline(str(pdf_file))
-                
+                if error is not None:
+                    raise error
+
                 # Save to output directory with same name but .json extension
                 output_file = output_path / (pdf_file.stem + ".json")
                 self.save_json(outline_data, output_file)
@@ -308,7 +1843,7 @@ class DockerOutlineExtractor:
                 file_end_time = time.time()
                 file_time = file_end_time - file_start_time
                 
-                print(f"✅ Saved: {output_file.name} ({file_time:.2f}s)")
+                print(f"✅ Saved: {output_file.name} ({file_time:.2f}s, {outline_data.get('source')} outline)")
                 successful_count += 1
                 
             except Exception as e:
@@ -316,7 +1851,8 @@ class DockerOutlineExtractor:
                 file_time = file_end_time - file_start_time
                 print(f"❌ Error processing {pdf_file.name}: {str(e)} ({file_time:.2f}s)")
                 failed_count += 1
-                continue
+            finally:
+                file_start_time = time.time()
         
         total_end_time = time.time()
         total_time = total_end_time - total_start_time
@@ -337,9 +1873,460 @@ class DockerOutlineExtractor:
         print(f"Total files: {len(pdf_files)}")
         print(f"Successful: {successful_count}")
         print(f"Failed: {failed_count}")
+        print("Outline sources: " + (", ".join(f"{source} {count}" for source, count
+                                               in self.source_stats.most_common()) or "none"))
+        print(f"Boxes read from text layer: {self.box_sources['text']}")
+        print(f"Boxes read by OCR: {self.box_sources['ocr']}")
+        print(f"Triage: {self.triage_stats['blank']} blank and {self.triage_stats['image_only']} "
+              f"image-only page(s) skipped, {self.triage_stats['hires_crops']} crop(s) "
+              f"re-rendered at {self.ocr_zoom * 72:.0f} dpi")
+        if self.cache is not None:
+            stats = self.cache_stats
+            print(f"Cache: {stats['document_hits']} document hit(s), {stats['document_misses']} miss(es); "
+                  f"{stats['page_hits']} page hit(s), {stats['page_misses']} miss(es)")
+        print("Stage time: " + ", ".join(f"{stage} {self.stage_seconds[stage]:.2f}s"
+                                         for stage in OutlineMetrics.STAGES))
+        print(f"Peak RSS: {peak_rss_bytes() / 2 ** 20:.0f} MB")
         print(f"Total processing time: {time_str}")
+        if self.metrics is not None:
+            self.metrics.close()
+            print(f"Metrics written to {self.metrics.path} ({self.metrics.format})")
+        if worker_pool is not None:
+            worker_pool.print_summary()
         print("Batch processing complete")
 
+
+# Per-process state of OutlineWorkerPool workers
+_WORKER = {}
+
+
+def _init_worker(model_path, config):
+    """Pool initializer: load the models once per worker process"""
+    # Inter-op parallelism would multiply the per-worker thread budget
+    try:
+        torch.set_num_interop_threads(1)
+    except RuntimeError:
+        pass  # already fixed in a parent that ran torch before forking
+    extractor = DockerOutlineExtractor(model_path, config=config)
+    preloaded = _WORKER.pop("preloaded", None)
+    if preloaded is not None:
+        # fork start method: adopt the parent's loaded models (shared copy-on-write);
+        # everything else, such as the SQLite cache connection, is this worker's own
+        extractor.model, extractor.ocr = preloaded.model, preloaded.ocr
+    _WORKER["extractor"] = extractor
+
+
+def _extract_page_range(task):
+    """Pool task: run the page pipeline over one page range of one PDF"""
+    doc_index, pdf_path, first, last = task
+    extractor = _WORKER["extractor"]
+    cache_stats_before = Counter(extractor.cache_stats)
+    start = time.perf_counter()
+    records = []
+    try:
+        for record in extractor.iter_outline_pages(pdf_path, pages=(first, last)):
+            if record["error"] is not None:
+                # Exceptions are re-created so they always survive pickling
+                record["error"] = RuntimeError(str(record["error"]))
+            records.append(record)
+    except Exception as e:
+        records.append({"doc": pdf_path, "page": first, "image": None, "words": None,
+                        "boxes": [], "error": RuntimeError(str(e)), "failed": True})
+    # The parent reports metrics, including the memory high-water mark of its workers
+    for record in records:
+        record["peak_rss"] = peak_rss_bytes()
+    # Documents are counted once, by the parent; a range only says whether it was a hit
+    cache_stats = extractor.cache_stats - cache_stats_before
+    document_hit = cache_stats.pop("document_hits", 0) > 0
+    cache_stats.pop("document_misses", None)
+    return {
+        "doc_index": doc_index,
+        "first": first,
+        "records": records,
+        "pages": sum(1 for r in records if not r.get("failed")),
+        "seconds": time.perf_counter() - start,
+        "worker": os.getpid(),
+        "cache_stats": cache_stats,
+        "document_hit": document_hit,
+    }
+
+
+class OutlineWorkerPool:
+    """
+    Document-level parallelism: worker processes each load YOLO and EasyOCR
+    once, then pull page ranges of PDFs from the pool's shared task queue.
+    Ranges of one PDF are merged back in page order before the outline is
+    assembled, so results match single-process extraction.
+    """
+
+    def __init__(self, model_path, config, workers=None):
+        self.model_path = model_path
+        self.config = merge_config(DEFAULT_CONFIG, config)
+        performance = self.config["performance"]
+        self.workers = max(1, int(workers or performance["workers"]))
+        self.pages_per_task = max(1, int(performance["pages_per_task"]))
+        self.start_method = performance["start_method"]
+        if self.start_method not in mp.get_all_start_methods():
+            raise ValueError(f"Start method {self.start_method!r} is not available here; "
+                             f"use one of {mp.get_all_start_methods()}")
+
+        # Split the CPUs between workers instead of letting each grab all of them
+        threads = max(1, available_cpus() // self.workers)
+        if int(performance["cpu_threads"]) > 0:
+            threads = min(threads, int(performance["cpu_threads"]))
+        self.threads_per_worker = threads
+        self.worker_stats = {}  # pid -> [pages, busy seconds]
+
+    def plan_tasks(self, pdf_files):
+        """Split every PDF into page-range tasks; returns (tasks, task count per PDF)"""
+        tasks = []
+        counts = []
+        for doc_index, pdf_file in enumerate(pdf_files):
+            try:
+                with fitz.open(pdf_file) as doc:
+                    page_count = len(doc)
+            except Exception:
+                page_count = 0  # the worker reports the open error
+            firsts = range(1, page_count + 1, self.pages_per_task) if page_count else [1]
+            for first in firsts:
+                tasks.append((doc_index, str(pdf_file), first,
+                              min(first + self.pages_per_task - 1, page_count)))
+            counts.append(len(firsts))
+        return tasks, counts
+
+    def iter_outlines(self, pdf_files, assembler):
+        """Yield (pdf_file, outline_data, error) as each PDF's page ranges complete"""
+        # Bookmark and font outlines need no models, so the parent resolves them directly
+        vision_files = []
+        for pdf_file in pdf_files:
+            try:
+                outline_data = assembler.text_outline(str(pdf_file))
+            except Exception as e:
+                yield pdf_file, None, e
+                continue
+            if outline_data is None:
+                vision_files.append(pdf_file)
+            else:
+                yield pdf_file, outline_data, None
+        if not vision_files:
+            return
+        pdf_files = vision_files
+
+        tasks, counts = self.plan_tasks(pdf_files)
+        worker_config = merge_config(self.config, {"performance": {
+            "cpu_threads": self.threads_per_worker,
+            "cross_document_batching": False,
+        }, "metrics": {"path": None}})
+        print(f"Starting {self.workers} worker(s), {self.threads_per_worker} thread(s) each, "
+              f"{len(tasks)} task(s)")
+
+        # Export a non-torch detector once here, not concurrently in every worker
+        detector_weights(self.model_path, self.config)
+
+        parts = {i: [] for i in range(len(pdf_files))}
+        ctx = mp.get_context(self.start_method)
+        if self.start_method == "forkserver":
+            # The fork server imports the heavy libraries once; every worker forks from it
+            ctx.set_forkserver_preload(["torch", "cv2", "fitz", "ultralytics", "easyocr"])
+        elif self.start_method == "fork":
+            # Load the models once here; forked workers inherit them instead of loading their own
+            _WORKER["preloaded"] = DockerOutlineExtractor(self.model_path, config=merge_config(
+                worker_config, {"performance": {"lazy_models": False}, "cache": {"enabled": False}}))
+        try:
+            pool = ctx.Pool(self.workers, initializer=_init_worker,
+                            initargs=(self.model_path, worker_config))
+        finally:
+            _WORKER.pop("preloaded", None)
+        with pool:
+            for result in pool.imap_unordered(_extract_page_range, tasks):
+                stats = self.worker_stats.setdefault(result["worker"], [0, 0.0])
+                stats[0] += result["pages"]
+                stats[1] += result["seconds"]
+                assembler.cache_stats.update(result["cache_stats"])
+
+                doc_index = result["doc_index"]
+                parts[doc_index].append(result)
+                if len(parts[doc_index]) < counts[doc_index]:
+                    continue
+
+                pdf_file = pdf_files[doc_index]
+                ordered = sorted(parts.pop(doc_index), key=lambda r: r["first"])
+                if assembler.cache is not None:
+                    # A document is a hit only when every one of its ranges came from the cache
+                    hit = all(part["document_hit"] for part in ordered)
+                    assembler.cache_stats["document_hits" if hit else "document_misses"] += 1
+                records = [record for part in ordered for record in part["records"]]
+                print(f"Processing: {pdf_file.name} ({len(ordered)} part(s))")
+                try:
+                    yield pdf_file, assembler.outline_from_records(records), None
+                except Exception as e:
+                    yield pdf_file, None, e
+
+    def print_summary(self):
+        """Per-worker throughput for the processing summary"""
+        for pid, (pages, seconds) in sorted(self.worker_stats.items()):
+            rate = pages / seconds if seconds > 0 else 0.0
+            print(f"Worker {pid}: {pages} page(s) in {seconds:.2f}s ({rate:.2f} pages/s)")
+
+
+class _ThreadingUnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+class _OutlineRequestHandler(http.server.BaseHTTPRequestHandler):
+    """
+    POST /outline   body: the PDF bytes, or JSON {"path": "/local/file.pdf"}
+    GET  /health    queue depth and request counters
+    GET  /metrics   extraction metrics in Prometheus text format (when metrics are enabled)
+    """
+    protocol_version = "HTTP/1.1"
+    service = None  # bound by OutlineService.serve
+
+    def address_string(self):
+        # Unix-socket peers have no address
+        return self.client_address[0] if self.client_address else "unix"
+
+    def _send(self, status, body, content_type="application/json; charset=utf-8", headers=None):
+        data = body.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _send_error(self, status, message, headers=None):
+        self._send(status, json.dumps({"error": message}), headers=headers)
+
+    def do_GET(self):
+        if self.path == "/metrics" and self.service.metrics is not None:
+            self._send(200, self.service.metrics.prometheus_text(), content_type="text/plain; version=0.0.4")
+            return
+        if self.path != "/health":
+            self._send_error(404, "not found")
+            return
+        self._send(200, json.dumps(self.service.health()))
+
+    def do_POST(self):
+        if self.path != "/outline":
+            self._send_error(404, "not found")
+            return
+        length = int(self.headers.get("Content-Length") or 0)
+        if length <= 0:
+            self._send_error(400, "empty request body")
+            return
+        if length > self.service.max_upload_bytes:
+            self._send_error(413, "request body too large")
+            return
+        body = self.rfile.read(length)
+
+        upload = None
+        if self.headers.get("Content-Type", "").startswith("application/json"):
+            try:
+                pdf_path = json.loads(body)["path"]
+            except (ValueError, KeyError, TypeError):
+                self._send_error(400, 'expected JSON {"path": "..."}')
+                return
+            if not Path(pdf_path).is_file():
+                self._send_error(400, f"no such file: {pdf_path}")
+                return
+        else:
+            with tempfile.NamedTemporaryFile(suffix=".pdf", delete=False) as f:
+                f.write(body)
+            pdf_path = upload = f.name
+
+        try:
+            job = self.service.submit(pdf_path, cleanup=upload)
+        except queue.Full:
+            if upload:
+                os.unlink(upload)
+            self._send_error(503, "server busy, retry later", headers={"Retry-After": "1"})
+            return
+
+        if not job["done"].wait(self.service.request_timeout):
+            self._send_error(504, "timed out waiting for the outline")
+        elif job["error"] is not None:
+            self._send_error(500, str(job["error"]))
+        else:
+            # Same bytes save_json writes
+            self._send(200, json.dumps(job["result"], indent=2, ensure_ascii=False))
+
+
+class OutlineService:
+    """
+    Resident outline extraction service. Models are loaded once and stay
+    warm; requests are queued in a bounded queue and served by a fixed set
+    of extractor threads. When the queue is full new requests get 503 with
+    Retry-After, so clients back off instead of piling up.
+    """
+
+    def __init__(self, model_path, config):
+        service_config = merge_config(DEFAULT_CONFIG, config)["service"]
+        self.host = service_config["host"]
+        self.port = int(service_config["port"])
+        self.jobs = queue.Queue(maxsize=max(1, int(service_config["queue_size"])))
+        self.max_upload_bytes = int(float(service_config["max_upload_mb"]) * 1024 * 1024)
+        self.request_timeout = float(service_config["request_timeout"])
+        self.stats = Counter()
+        self.stats_lock = threading.Lock()
+
+        workers = max(1, int(service_config["workers"]))
+        # A resident service keeps its models warm, so load them before the first request
+        warm_config = merge_config(config, {"performance": {"lazy_models": False}})
+        self.extractors = [DockerOutlineExtractor(model_path, config=warm_config) for _ in range(workers)]
+        # All extractor threads report into one metrics sink
+        self.metrics = self.extractors[0].metrics
+        for extractor in self.extractors[1:]:
+            if extractor.metrics is not None:
+                extractor.metrics.close()
+            extractor.metrics = self.metrics
+        for i, extractor in enumerate(self.extractors):
+            threading.Thread(target=self._work, args=(extractor,), daemon=True,
+                             name=f"outline-service-{i}").start()
+
+    def submit(self, pdf_path, cleanup=None):
+        """Queue a PDF for extraction; raises queue.Full when the service is saturated"""
+        job = {"pdf": pdf_path, "cleanup": cleanup, "done": threading.Event(),
+               "result": None, "error": None}
+        try:
+            self.jobs.put_nowait(job)
+        except queue.Full:
+            self._count("rejected")
+            raise
+        return job
+
+    def _count(self, name):
+        with self.stats_lock:
+            self.stats[name] += 1
+
+    def _work(self, extractor):
+        while True:
+            job = self.jobs.get()
+            try:
+                job["result"] = extractor.get_outline(job["pdf"])
+                self._count("completed")
+            except Exception as e:
+                job["error"] = e
+                self._count("failed")
+            finally:
+                if job["cleanup"]:
+                    os.unlink(job["cleanup"])
+                job["done"].set()
+
+    def health(self):
+        with self.stats_lock:
+            stats = dict(self.stats)
+        return {"status": "ok", "workers": len(self.extractors), "queued": self.jobs.qsize(),
+                "queue_size": self.jobs.maxsize, **stats}
+
+    def serve(self, host=None, port=None, socket_path=None):
+        """Serve over TCP, or over a Unix socket when socket_path is given, until interrupted"""
+        handler = type("OutlineRequestHandler", (_OutlineRequestHandler,), {"service": self})
+        if socket_path:
+            if os.path.exists(socket_path):
+                os.unlink(socket_path)
+            server = _ThreadingUnixHTTPServer(socket_path, handler)
+            where = f"unix:{socket_path}"
+        else:
+            server = http.server.ThreadingHTTPServer((host or self.host, port or self.port), handler)
+            server.daemon_threads = True
+            where = f"http://{server.server_address[0]}:{server.server_address[1]}"
+        print(f"✅ Outline service listening on {where}")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            print("Shutting down outline service")
+        finally:
+            server.server_close()
+            if socket_path and os.path.exists(socket_path):
+                os.unlink(socket_path)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Extract title and heading outline from PDFs")
+    parser.add_argument("--input", default="/app/input", help="Directory with input PDFs")
+    parser.add_argument("--output", default="/app/output", help="Directory for outline JSONs")
+    parser.add_argument("--model", default="/model/yolov11x_best.pt", help="YOLO weights")
+    parser.add_argument("--config", default=None,
+                        help=f"YAML config (default: {DEFAULT_CONFIG_PATH.name} next to this script)")
+    parser.add_argument("--backend", choices=DETECTOR_BACKENDS, default=None,
+                        help="YOLO inference backend (model.backend)")
+    parser.add_argument("--int8", action="store_true", default=None,
+                        help="Use an INT8-quantized export of the detector (model.int8)")
+    parser.add_argument("--batch-size", type=int, default=None,
+                        help="Pages per YOLO forward pass (performance.batch_size)")
+    parser.add_argument("--threads", type=int, default=None,
+                        help="Torch/OpenCV CPU threads, 0 = library default (performance.cpu_threads)")
+    parser.add_argument("--cross-document", action="store_true", default=None,
+                        help="Fill detection batches across PDFs (performance.cross_document_batching)")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="Worker processes; >1 enables the multi-process pool (performance.workers)")
+    parser.add_argument("--eager-models", dest="lazy_models", action="store_false", default=None,
+                        help="Load YOLO and EasyOCR at startup instead of on first use (performance.lazy_models)")
+    parser.add_argument("--start-method", choices=["spawn", "forkserver", "fork"], default=None,
+                        help="How worker processes start; forkserver preimports libraries, "
+                             "fork shares preloaded models (performance.start_method)")
+    parser.add_argument("--serve", nargs="?", const="", default=None, metavar="HOST:PORT",
+                        help="Run as a resident HTTP service instead of a batch job (service.host/port)")
+    parser.add_argument("--socket", default=None, help="Serve on this Unix socket path instead of TCP")
+    parser.add_argument("--sources", nargs="+", choices=list(TEXT_OUTLINE_SOURCES) + ["vision"],
+                        default=None, help="Outline sources to try, in order (outline.sources)")
+    parser.add_argument("--engine", choices=OUTLINE_ENGINES, default=None,
+                        help="yolo: YOLO + OCR for PDFs no cheap source resolves; "
+                             "fonts: font statistics only, no models loaded (outline.engine)")
+    parser.add_argument("--metrics", default=None, metavar="PATH",
+                        help="Write per-page and per-document metrics to PATH (metrics.path)")
+    parser.add_argument("--metrics-format", choices=["jsonl", "prometheus"], default=None,
+                        help="Metrics file format (metrics.format)")
+    parser.add_argument("--profile", default=None, metavar="DIR",
+                        help="Dump a cProfile .prof file per pipeline stage thread into DIR (metrics.profile_dir)")
+    parser.add_argument("--cache-dir", default=None,
+                        help="Enable the persistent outline cache in this directory (cache.dir)")
+    parser.add_argument("--no-cache", action="store_true", help="Disable the outline cache")
+    parser.add_argument("--no-text-layer", dest="use_text_layer", action="store_false", default=None,
+                        help="Always OCR header boxes, ignoring the PDF text layer")
+    return parser.parse_args(argv)
+
+
+def config_from_args(args):
+    """Load the YAML config and apply command-line overrides"""
+    overrides = {"model": {}, "performance": {}, "ocr": {}, "outline": {}, "metrics": {}, "cache": {}}
+    if args.metrics is not None:
+        overrides["metrics"]["path"] = args.metrics
+    if args.metrics_format is not None:
+        overrides["metrics"]["format"] = args.metrics_format
+    if args.profile is not None:
+        overrides["metrics"]["profile_dir"] = args.profile
+    if args.sources is not None:
+        overrides["outline"]["sources"] = args.sources
+    if args.engine is not None:
+        overrides["outline"]["engine"] = args.engine
+    if args.backend is not None:
+        overrides["model"]["backend"] = args.backend
+    if args.int8 is not None:
+        overrides["model"]["int8"] = args.int8
+    if args.batch_size is not None:
+        overrides["performance"]["batch_size"] = args.batch_size
+    if args.threads is not None:
+        overrides["performance"]["cpu_threads"] = args.threads
+    if args.workers is not None:
+        overrides["performance"]["workers"] = args.workers
+    if args.lazy_models is not None:
+        overrides["performance"]["lazy_models"] = args.lazy_models
+    if args.start_method is not None:
+        overrides["performance"]["start_method"] = args.start_method
+    if args.cross_document is not None:
+        overrides["performance"]["cross_document_batching"] = args.cross_document
+    if args.cache_dir is not None:
+        overrides["cache"].update(enabled=True, dir=args.cache_dir)
+    if args.no_cache:
+        overrides["cache"]["enabled"] = False
+    if args.use_text_layer is not None:
+        overrides["ocr"]["use_text_layer"] = args.use_text_layer
+    return load_config(args.config, overrides)
+
+
 def main():
     """
     Main function for Docker container
@@ -352,11 +2339,30 @@ def main():
     start_time = time.time()
     
     try:
-        # Initialize extractor
-        extractor = DockerOutlineExtractor()
+        args = parse_args()
+
+        config = config_from_args(args)
+        if args.serve is not None or args.socket:
+            host, _, port = (args.serve or "").rpartition(":")
+            service = OutlineService(args.model, config)
+            service.serve(host or None, int(port) if port else None, socket_path=args.socket)
+            return
+
+        if int(config["performance"]["workers"]) > 1 and config["outline"]["engine"] == "yolo":
+            # Workers own the models; this process only assembles and saves outlines
+            extractor = DockerOutlineExtractor(args.model, config=config, load_models=False)
+            worker_pool = OutlineWorkerPool(args.model, config)
+        else:
+            # Initialize extractor
+            extractor = DockerOutlineExtractor(args.model, config=config)
+            worker_pool = None
         
-        # Process all PDFs in batch mode
-        extractor.process_all_pdfs()
+        # Process all PDFs in batch mode; the main thread is profiled like the stage threads
+        profiler = _start_profiler()
+        try:
+            extractor.process_all_pdfs(args.input, args.output, worker_pool=worker_pool)
+        finally:
+            _stop_profiler(profiler, "main")
         
     except Exception as e:
         print(f"💥 Fatal error during batch processing: {e}")
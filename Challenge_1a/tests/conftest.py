@@ -0,0 +1,20 @@
+"""Make the extractor and benchmark helpers importable as in the benchmarks"""
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+
+@pytest.fixture
+def require_models():
+    """Skip unless the vision stack and real YOLO weights (not a Git LFS pointer) are present"""
+    from benchmarks.common import DEFAULT_MODEL
+
+    pytest.importorskip("ultralytics")
+    pytest.importorskip("easyocr")
+    if not DEFAULT_MODEL.exists() or DEFAULT_MODEL.stat().st_size < 1000000:
+        pytest.skip(f"{DEFAULT_MODEL} is missing or not the real weights")
@@ -0,0 +1,97 @@
+"""
+Regression test: the default outline sources against the sample outputs in
+output/. A model-free source (toc, fonts) must either reject a sample (its
+quality check returns None, leaving it to vision) or produce an outline as
+good as the one on file. The vision check needs the model stack and is
+skipped without it.
+"""
+import json
+from pathlib import Path
+
+import fitz
+import pytest
+
+from benchmarks.common import DEFAULT_MODEL, SAMPLE_INPUT, SAMPLE_OUTPUT, outline_match
+from extract_outline_docker import DEFAULT_CONFIG, DockerOutlineExtractor, load_config, merge_config
+
+ROOT = Path(__file__).resolve().parents[1]
+SOURCES = ["toc", "fonts", "vision"]
+MIN_PRECISION = 0.8
+MIN_RECALL = 0.8
+SAMPLES = sorted(SAMPLE_INPUT.glob("*.pdf"))
+
+
+def expected(pdf):
+    return json.loads((SAMPLE_OUTPUT / f"{pdf.stem}.json").read_text(encoding="utf-8"))
+
+
+def extractor_for(sources, base=DEFAULT_CONFIG, **kwargs):
+    config = merge_config(base, {"outline": {"sources": sources}, "cache": {"enabled": False},
+                                 "metrics": {"path": None}})
+    return DockerOutlineExtractor(str(DEFAULT_MODEL), config=config, **kwargs)
+
+
+def assert_rejected_or_accurate(outline, pdf):
+    if outline is None:
+        return  # rejected: left to the vision pipeline
+    precision, recall = outline_match(outline, expected(pdf))
+    assert precision >= MIN_PRECISION and recall >= MIN_RECALL, (
+        f"{outline['source']} outline of {pdf.name}: precision {precision:.2f}, recall {recall:.2f}")
+
+
+def test_default_sources():
+    assert DEFAULT_CONFIG["outline"]["sources"] == SOURCES
+    assert load_config(ROOT / "config.yaml")["outline"]["sources"] == SOURCES
+
+
+@pytest.mark.parametrize("pdf", SAMPLES, ids=lambda p: p.name)
+def test_model_free_sources_reject_or_match_sample_outputs(pdf):
+    assert_rejected_or_accurate(extractor_for(SOURCES, load_models=False).text_outline(pdf), pdf)
+
+
+@pytest.mark.parametrize("source", ["toc", "fonts"])
+@pytest.mark.parametrize("pdf", SAMPLES, ids=lambda p: p.name)
+def test_each_check_rejects_or_matches_sample_outputs(source, pdf):
+    # Each check on its own, so one source rejecting a sample cannot hide the other
+    assert_rejected_or_accurate(extractor_for([source, "vision"], load_models=False).text_outline(pdf), pdf)
+
+
+def born_digital_pdf(path, bookmarks, pages=5, sections_per_page=3):
+    """Titled PDF whose numbered 16pt headings each open three 10pt paragraphs"""
+    doc = fitz.open()
+    toc = []
+    for page_no in range(1, pages + 1):
+        page = doc.new_page(width=595, height=842)
+        y = 72
+        if page_no == 1:
+            page.insert_text((72, y), "Born-Digital Report", fontsize=24)
+            y += 40
+        for _ in range(sections_per_page):
+            toc.append([1, f"{len(toc) + 1}. Section {len(toc) + 1}", page_no])
+            page.insert_text((72, y), toc[-1][1], fontsize=16)
+            y += 24
+            for _ in range(3):
+                page.insert_textbox(fitz.Rect(72, y, 523, y + 40), "outline heading section detail " * 4, fontsize=10)
+                y += 48
+    if bookmarks:
+        doc.set_toc(toc)
+    doc.save(str(path))
+    doc.close()
+    return path, {(text, page) for _, text, page in toc}
+
+
+@pytest.mark.parametrize("bookmarks, source", [(True, "toc"), (False, "fonts")])
+def test_checks_accept_born_digital_outline(tmp_path, bookmarks, source):
+    # Rejecting every document would pass the sample tests; a clean outline must still get through
+    pdf, headings = born_digital_pdf(tmp_path / "report.pdf", bookmarks)
+    outline = extractor_for(SOURCES, load_models=False).text_outline(pdf)
+    assert outline is not None and outline["source"] == source
+    assert {(h["text"], h["page"]) for h in outline["outline"]} == headings
+
+
+@pytest.mark.parametrize("pdf", SAMPLES, ids=lambda p: p.name)
+def test_default_pipeline_matches_sample_outputs(require_models, pdf):
+    extractor = extractor_for(SOURCES, base=load_config(ROOT / "config.yaml"))
+    precision, recall = outline_match(extractor.get_outline(pdf), expected(pdf))
+    assert precision >= MIN_PRECISION and recall >= MIN_RECALL, (
+        f"{pdf.name}: precision {precision:.2f}, recall {recall:.2f}")
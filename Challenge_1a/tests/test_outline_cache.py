@@ -0,0 +1,30 @@
+"""OutlineCache size limit with several connections (processes) on one cache file"""
+import sqlite3
+
+from extract_outline_docker import OutlineCache
+
+MAX_MB = 0.01
+ENTRY = "x" * 1000
+
+
+def stored_bytes(cache_dir):
+    with sqlite3.connect(str(cache_dir / "outline_cache.sqlite")) as conn:
+        return conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+
+
+def test_size_limit_counts_other_connections(tmp_path):
+    caches = [OutlineCache(tmp_path, tmp_path / "missing.pt", {}, max_mb=MAX_MB) for _ in range(2)]
+    for i in range(40):
+        caches[i % 2].put(caches[i % 2].page_key(f"page-{i}"), "page", ENTRY)
+        assert stored_bytes(tmp_path) <= MAX_MB * 1024 * 1024
+    # The most recent entries survive eviction, whichever connection wrote them
+    assert caches[0].get(caches[0].page_key("page-39")) == ENTRY
+    assert caches[1].get(caches[1].page_key("page-38")) == ENTRY
+
+
+def test_replacing_an_entry_does_not_grow_the_cache(tmp_path):
+    first, second = (OutlineCache(tmp_path, tmp_path / "missing.pt", {}, max_mb=MAX_MB) for _ in range(2))
+    key = first.page_key("page")
+    for cache in (first, second, first):
+        cache.put(key, "page", ENTRY)
+    assert stored_bytes(tmp_path) == first.size == len(f'"{ENTRY}"')
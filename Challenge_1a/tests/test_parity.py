@@ -0,0 +1,101 @@
+"""
+Parity of the fast paths with the paths they replaced, on the sample PDFs:
+the zero-copy pixmap view against the PNG round trip, header text from the
+text layer against OCR, and batched/line-split recognition against per-box
+readtext. Checks that need YOLO or EasyOCR are skipped without them.
+"""
+import difflib
+import types
+from io import BytesIO
+
+import fitz
+import numpy as np
+import pytest
+
+from benchmarks.common import DEFAULT_MODEL, SAMPLE_INPUT
+from extract_outline_docker import RENDER_ZOOM, DockerOutlineExtractor, comparable_text, pixmap_to_bgr
+
+SAMPLES = sorted(SAMPLE_INPUT.glob("*.pdf"))
+
+
+def extractor_for(load_models=False, **ocr):
+    config = {"outline": {"sources": ["vision"]}, "ocr": ocr, "cache": {"enabled": False}}
+    return DockerOutlineExtractor(str(DEFAULT_MODEL), config=config, load_models=load_models)
+
+
+def png_render(self, page, zoom=RENDER_ZOOM, clip=None):
+    """The render path before the zero-copy view: PNG encode, PIL decode, cv2 colour conversion"""
+    cv2 = pytest.importorskip("cv2")
+    from PIL import Image
+
+    pix = page.get_pixmap(matrix=fitz.Matrix(zoom, zoom), clip=clip)
+    return cv2.cvtColor(np.array(Image.open(BytesIO(pix.tobytes("png")))), cv2.COLOR_RGB2BGR)
+
+
+@pytest.mark.parametrize("pdf", SAMPLES, ids=lambda p: p.name)
+def test_pixmap_view_matches_png_render(pdf):
+    extractor = extractor_for()
+    with fitz.open(pdf) as doc:
+        for page in doc:
+            clip = fitz.Rect(page.rect.x0 + 36, page.rect.y0 + 36, page.rect.x1 / 2, page.rect.y1 / 3)
+            for zoom, rect in ((RENDER_ZOOM, None), (1.0, None), (RENDER_ZOOM, clip)):
+                image = extractor.render_page(page, zoom, clip=rect)
+                np.testing.assert_array_equal(image, png_render(extractor, page, zoom, clip=rect))
+
+
+def test_pixmap_view_shares_the_sample_buffer():
+    with fitz.open(SAMPLES[0]) as doc:
+        pix = doc[0].get_pixmap(alpha=False)
+    image = pixmap_to_bgr(pix)
+    samples = np.frombuffer(pix.samples_mv, dtype=np.uint8)
+    assert np.shares_memory(image, samples)
+    assert image.shape == (pix.height, pix.width, 3)
+
+
+def header_crops(extractor, page, count=4):
+    """Renders of the page's largest-font text lines, as YOLO header boxes would crop them"""
+    lines = [(max(span["size"] for span in line["spans"]), fitz.Rect(line["bbox"]))
+             for block in page.get_text("dict")["blocks"] for line in block.get("lines", [])
+             if "".join(span["text"] for span in line["spans"]).strip()]
+    lines.sort(key=lambda line: -line[0])
+    return [extractor.render_page(page, RENDER_ZOOM, clip=rect + (-4, -4, 4, 4)) for _, rect in lines[:count]]
+
+
+@pytest.mark.parametrize("pdf", SAMPLES, ids=lambda p: p.name)
+def test_batched_recognition_matches_readtext(pdf):
+    pytest.importorskip("easyocr")
+    per_box = extractor_for(batch_recognition=False)
+    try:
+        ocr = per_box.ocr
+    except RuntimeError as e:
+        pytest.skip(str(e))
+    with fitz.open(pdf) as doc:
+        crops = header_crops(per_box, doc[0])
+    expected = per_box.ocr_crops(crops)
+    for options in ({"split_lines": False}, {"split_lines": True}):
+        batched = extractor_for(batch_recognition=True, **options)
+        batched.ocr = ocr
+        assert batched.ocr_crops(crops) == expected, options
+
+
+def outline_of(extractor, pdf):
+    outline = extractor.get_outline(str(pdf))
+    return outline["title"], outline["outline"]
+
+
+@pytest.mark.parametrize("pdf", SAMPLES, ids=lambda p: p.name)
+def test_pixmap_view_outline_matches_png_render(require_models, pdf):
+    extractor, reference = extractor_for(load_models=True), extractor_for(load_models=True)
+    reference.render_page = types.MethodType(png_render, reference)
+    assert outline_of(extractor, pdf) == outline_of(reference, pdf)
+
+
+@pytest.mark.parametrize("pdf", SAMPLES, ids=lambda p: p.name)
+def test_text_layer_outline_matches_ocr(require_models, pdf):
+    _, text_layer = outline_of(extractor_for(load_models=True, use_text_layer=True), pdf)
+    _, ocr_only = outline_of(extractor_for(load_models=True, use_text_layer=False), pdf)
+    # Same headings; the words may only differ by OCR misreads of the same text
+    assert [(h["level"], h["page"]) for h in text_layer] == [(h["level"], h["page"]) for h in ocr_only]
+    for fast, ocr in zip(text_layer, ocr_only):
+        ratio = difflib.SequenceMatcher(None, comparable_text(fast["text"]), comparable_text(ocr["text"])).ratio()
+        assert ratio >= 0.8, (fast["text"], ocr["text"])
@@ -0,0 +1,69 @@
+"""Per-page render resolution from triage, and two-pass OCR against single-pass"""
+import fitz
+import pytest
+
+from benchmarks.common import DEFAULT_MODEL, SAMPLE_INPUT
+from extract_outline_docker import RENDER_ZOOM, DockerOutlineExtractor
+
+
+def extractor_for(detect_dpi, use_text_layer=True):
+    config = {"triage": {"detect_dpi": detect_dpi}, "preprocessing": {"pdf_dpi": 144},
+              "ocr": {"use_text_layer": use_text_layer}, "cache": {"enabled": False}}
+    return DockerOutlineExtractor(str(DEFAULT_MODEL), config=config, load_models=False)
+
+
+def text_and_scan_pdf(path):
+    """A born-digital page, then the same page as an image only (a scan)"""
+    doc = fitz.open()
+    page = doc.new_page(width=595, height=842)
+    page.insert_text((72, 100), "1. Introduction", fontsize=18)
+    page.insert_text((72, 130), "Body text of the first section.", fontsize=10)
+    pixmap = page.get_pixmap(matrix=fitz.Matrix(2, 2))
+    scan = doc.new_page(width=595, height=842)
+    scan.insert_image(scan.rect, pixmap=pixmap)
+    doc.save(str(path))
+    doc.close()
+    return path
+
+
+@pytest.mark.parametrize("use_text_layer, zooms", [(True, [1.0, 2.0]), (False, [2.0, 2.0])])
+def test_page_zoom_follows_triage(tmp_path, use_text_layer, zooms):
+    extractor = extractor_for(72, use_text_layer)
+    pdf = text_and_scan_pdf(tmp_path / "mixed.pdf")
+    with fitz.open(pdf) as doc:
+        records = [extractor._load_page(doc, i, pdf, None) for i in range(len(doc))]
+    assert [record["zoom"] for record in records] == zooms
+    assert [record["image"].shape[1] for record in records] == [round(595 * zoom) for zoom in zooms]
+
+
+def heading_boxes(page, count=4):
+    """Reference-pixel boxes of the page's largest-font text lines"""
+    lines = [(max(span["size"] for span in line["spans"]), line["bbox"])
+             for block in page.get_text("dict")["blocks"] for line in block.get("lines", [])
+             if "".join(span["text"] for span in line["spans"]).strip()]
+    lines.sort(key=lambda line: -line[0])
+    return [{"bbox": [int(v * RENDER_ZOOM) for v in fitz.Rect(bbox) + (-4, -4, 4, 4)]}
+            for _, bbox in lines[:count]]
+
+
+@pytest.mark.parametrize("pdf", sorted(SAMPLE_INPUT.glob("*.pdf"))[:2], ids=lambda p: p.name)
+def test_two_pass_ocr_matches_single_pass(pdf):
+    pytest.importorskip("easyocr")
+    single, two_pass = extractor_for(144), extractor_for(72)
+    try:
+        two_pass.ocr = single.ocr
+    except RuntimeError as e:
+        pytest.skip(str(e))
+    texts = {}
+    with fitz.open(pdf) as doc:
+        boxes = heading_boxes(doc[0])
+        for name, extractor in (("single", single), ("two_pass", two_pass)):
+            record = extractor._load_page(doc, 0, pdf, None)
+            # No text layer for the boxes, so every one is OCR'd
+            record["words"] = None
+            record["boxes"] = [dict(box) for box in boxes]
+            extractor.ocr_page(record)
+            assert record["error"] is None
+            assert ("hires_crops" in record) == (name == "two_pass")
+            texts[name] = [box["text"] for box in record["boxes"]]
+    assert texts["two_pass"] == texts["single"]
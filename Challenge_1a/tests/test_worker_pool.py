@@ -0,0 +1,25 @@
+"""Worker pool bookkeeping that needs no models: documents served from the outline cache"""
+from benchmarks.common import DEFAULT_MODEL, make_synthetic_pdf
+from extract_outline_docker import DockerOutlineExtractor, OutlineWorkerPool
+
+
+def test_documents_count_once_across_page_ranges(tmp_path):
+    config = {"outline": {"sources": ["vision"]}, "cache": {"enabled": True, "dir": str(tmp_path / "cache")},
+              "performance": {"workers": 2, "pages_per_task": 1}}
+    extractor = DockerOutlineExtractor(str(DEFAULT_MODEL), config=config, load_models=False)
+    cached = make_synthetic_pdf(tmp_path / "cached.pdf", 3)
+    uncached = make_synthetic_pdf(tmp_path / "uncached.pdf", 3, seed=1)
+    # Cache every page of one PDF as a page without headings, the way a finished run would
+    page_keys = [extractor.cache.page_key(f"page-{page_no}") for page_no in range(1, 4)]
+    for key in page_keys:
+        extractor.cache.put(key, "page", [])
+    extractor.cache.put(extractor.cache.document_key(cached), "document", page_keys)
+
+    pool = OutlineWorkerPool(str(DEFAULT_MODEL), extractor.config)
+    results = {path: error for path, _, error in pool.iter_outlines([cached, uncached], extractor)}
+
+    # Three one-page tasks per PDF, but each PDF is one document hit or miss
+    assert results[cached] is None
+    assert extractor.cache_stats["document_hits"] == 1
+    assert extractor.cache_stats["document_misses"] == 1
+    assert extractor.cache_stats["page_hits"] == 3
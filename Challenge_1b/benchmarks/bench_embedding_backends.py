@@ -0,0 +1,123 @@
+"""
+Embedding backend parity and speed: ONNX Runtime (fp32 / INT8) vs PyTorch.
+
+For each Collection */ directory the text blocks of its PDFs are ranked
+against the collection's persona + job with every backend. Against the
+PyTorch fp32 reference the script reports the mean cosine similarity of the
+block embeddings, the Spearman correlation of the similarity scores and the
+overlap of the top-N sections, plus model load time and texts/s. Backends
+are given as NAME or NAME:int8.
+
+    python benchmarks/bench_embedding_backends.py onnx onnx:int8 --threads 4
+"""
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from config import (BATCH_EMBED_SIZE, EMBED_EXPORT_DIR, EMBED_QUANTIZATION, EMBEDDING_MODEL_NAME,
+                    MIN_SECTION_CHAR_LEN, N_EMBED_INTER_THREADS, N_EMBED_THREADS, TOP_N_SECTIONS)
+from embedding.embedder import load_sentence_model
+
+
+def collection_texts(directory, max_texts):
+    """Persona+job prompt and the PDF text blocks of one collection"""
+    import fitz
+
+    query = json.loads((directory / "challenge1b_input.json").read_text(encoding="utf-8"))
+    prompt = f"{query['persona']['role']}\n\n{query['job_to_be_done']['task']}"
+    texts = []
+    for pdf in sorted((directory / "PDFs").glob("*.pdf")):
+        with fitz.open(pdf) as doc:
+            for page in doc:
+                texts.extend(" ".join(b[4].split()) for b in page.get_text("blocks")
+                             if len(b[4].strip()) >= MIN_SECTION_CHAR_LEN)
+    return prompt, texts[:max_texts]
+
+
+def ranks(values):
+    order = np.argsort(values)
+    r = np.empty(len(values))
+    r[order] = np.arange(len(values))
+    return r
+
+
+def spearman(a, b):
+    return float(np.corrcoef(ranks(a), ranks(b))[0, 1]) if len(a) > 1 else 1.0
+
+
+def encode(model, prompt, texts):
+    start = time.perf_counter()
+    embeds = model.encode(texts, batch_size=BATCH_EMBED_SIZE, show_progress_bar=False, normalize_embeddings=True)
+    elapsed = time.perf_counter() - start
+    prompt_embed = model.encode([prompt])[0]
+    return np.asarray(embeds, dtype=np.float32), embeds @ prompt_embed, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("backends", nargs="*", default=["onnx", "onnx:int8"])
+    parser.add_argument("--collections", nargs="+", default=None, help="Collection directories")
+    parser.add_argument("--max-texts", type=int, default=2000, help="Text blocks per collection")
+    parser.add_argument("--threads", type=int, default=N_EMBED_THREADS)
+    parser.add_argument("--inter-threads", type=int, default=N_EMBED_INTER_THREADS)
+    parser.add_argument("--quantization", default=EMBED_QUANTIZATION)
+    parser.add_argument("--model", default=EMBEDDING_MODEL_NAME)
+    args = parser.parse_args()
+
+    directories = [Path(d) for d in args.collections] if args.collections else sorted(ROOT.glob("Collection */"))
+    corpora = [(d.name, *collection_texts(d, args.max_texts)) for d in directories]
+    print(f"{sum(len(t) for _, _, t in corpora)} text block(s) from {len(corpora)} collection(s)")
+
+    def load(backend, int8):
+        start = time.perf_counter()
+        model = load_sentence_model(args.model, backend, int8, args.quantization, EMBED_EXPORT_DIR,
+                                    threads=args.threads, inter_threads=args.inter_threads)
+        model.encode(["warm-up"])
+        return model, time.perf_counter() - start
+
+    reference_model, torch_load = load("torch", False)
+    reference = {name: encode(reference_model, prompt, texts) for name, prompt, texts in corpora}
+    del reference_model
+    torch_rate = sum(len(t) for _, _, t in corpora) / sum(r[2] for r in reference.values())
+
+    print(f"\n{'backend':<12} {'collection':<14} {'load':>7} {'texts/s':>8} {'cosine':>7} {'spearman':>9} "
+          f"{'top-' + str(TOP_N_SECTIONS):>6} {'top-1':>6}")
+    print(f"{'torch':<12} {'all':<14} {torch_load:>6.2f}s {torch_rate:>8.1f} {1.0:>7.4f} {1.0:>9.4f} "
+          f"{1.0:>6.2f} {'yes':>6}")
+    failed = []
+    for spec in args.backends:
+        backend, _, flag = spec.partition(":")
+        try:
+            model, load_time = load(backend, flag == "int8")
+        except Exception as e:
+            print(f"{spec:<12} failed to load: {type(e).__name__}: {e}")
+            failed.append(spec)
+            continue
+        total_texts = total_time = 0
+        for name, prompt, texts in corpora:
+            ref_embeds, ref_scores, _ = reference[name]
+            embeds, scores, elapsed = encode(model, prompt, texts)
+            total_texts, total_time = total_texts + len(texts), total_time + elapsed
+            cosine = float(np.mean(np.sum(embeds * ref_embeds, axis=1))) if len(texts) else 1.0
+            top_ref = set(np.argsort(-ref_scores)[:TOP_N_SECTIONS].tolist())
+            top_new = set(np.argsort(-scores)[:TOP_N_SECTIONS].tolist())
+            overlap = len(top_ref & top_new) / max(len(top_ref), 1)
+            same_first = "yes" if len(texts) and np.argmax(scores) == np.argmax(ref_scores) else "no"
+            print(f"{spec:<12} {name:<14} {'':>7} {len(texts) / elapsed:>8.1f} {cosine:>7.4f} "
+                  f"{spearman(scores, ref_scores):>9.4f} {overlap:>6.2f} {same_first:>6}")
+        print(f"{spec:<12} {'all':<14} {load_time:>6.2f}s {total_texts / total_time:>8.1f} "
+              f"({total_texts / total_time / torch_rate:.2f}x torch)")
+    if failed:
+        sys.exit(f"Not measured: {', '.join(failed)}")
+
+
+if __name__ == "__main__":
+    main()
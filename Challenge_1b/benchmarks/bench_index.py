@@ -0,0 +1,107 @@
+"""
+Vector index benchmark: build time, exact vs IVF query latency and IVF recall.
+
+A synthetic corpus of clustered, normalized embeddings (topics + noise, so
+IVF lists are meaningful) is written to a temporary index in documents of
+--blocks-per-doc blocks. Queries are noisy copies of random blocks. For each
+nprobe the script reports p50/p99 latency and recall@k against exact search,
+then times removing and re-adding a document.
+
+    python benchmarks/bench_index.py --blocks 100000 500000 --nprobe 4 8 16
+"""
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from indexing.vector_index import VectorIndex
+
+
+def make_docs(n_blocks, per_doc, dim, topics, seed=0):
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((topics, dim)).astype(np.float32)
+    for d, start in enumerate(range(0, n_blocks, per_doc)):
+        n = min(per_doc, n_blocks - start)
+        embeds = centers[rng.integers(0, topics, n)] + 0.6 * rng.standard_normal((n, dim)).astype(np.float32)
+        embeds /= np.linalg.norm(embeds, axis=1, keepdims=True)
+        blocks = [{"document": f"doc{d}", "page_number": i // 10 + 1, "tag_type": "Text", "header_level": None,
+                   "text": f"doc{d} block {i} " + "filler text " * 5, "block_id": f"doc{d}|{i // 10 + 1}|{i}"}
+                  for i in range(n)]
+        yield f"doc{d}", blocks, embeds
+
+
+def timed(fn, repeat):
+    times, result = [], None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        times.append(time.perf_counter() - start)
+    return result, np.array(times) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--blocks", type=int, nargs="+", default=[50000, 200000])
+    parser.add_argument("--blocks-per-doc", type=int, default=100)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--topics", type=int, default=200)
+    parser.add_argument("--nprobe", type=int, nargs="+", default=[4, 8, 16])
+    parser.add_argument("--k", type=int, default=20)
+    parser.add_argument("--queries", type=int, default=50)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(1)
+    for n_blocks in args.blocks:
+        with tempfile.TemporaryDirectory() as tmp:
+            index = VectorIndex(tmp, args.dim, "bench")
+            start = time.perf_counter()
+            docs = list(make_docs(n_blocks, args.blocks_per_doc, args.dim, args.topics))
+            for name, blocks, embeds in docs:
+                index.add_document(name, f"{name}.pdf", blocks, embeds, commit=False)
+            index.commit()
+            build = time.perf_counter() - start
+            start = time.perf_counter()
+            index.train()
+            train = time.perf_counter() - start
+            print(f"\n{n_blocks} blocks in {len(docs)} docs: add {build:.1f}s, "
+                  f"IVF train {train:.1f}s ({len(index.centroids)} lists)")
+
+            picks = rng.integers(0, len(docs), args.queries)
+            queries = np.stack([docs[i][2][0] for i in picks]) + 0.3 * rng.standard_normal(
+                (args.queries, args.dim)).astype(np.float32)
+            queries /= np.linalg.norm(queries, axis=1, keepdims=True)
+
+            exact = [None] * len(queries)
+            times = []
+            for j, q in enumerate(queries):
+                (exact[j],), t = timed(lambda: index.search(q, args.k, mode="exact"), 1)
+                times.extend(t)
+            print(f"{'mode':<12} {'p50 ms':>8} {'p99 ms':>8} {'recall@' + str(args.k):>10}")
+            print(f"{'exact':<12} {np.percentile(times, 50):>8.2f} {np.percentile(times, 99):>8.2f} {1.0:>10.3f}")
+            for nprobe in args.nprobe:
+                times, recall = [], []
+                for j, q in enumerate(queries):
+                    ((rows, _),), t = timed(lambda: index.search(q, args.k, mode="ivf", nprobe=nprobe), 1)
+                    times.extend(t)
+                    recall.append(len(np.intersect1d(rows, exact[j][0])) / max(len(exact[j][0]), 1))
+                print(f"{'ivf/' + str(nprobe):<12} {np.percentile(times, 50):>8.2f} "
+                      f"{np.percentile(times, 99):>8.2f} {np.mean(recall):>10.3f}")
+
+            _, t = timed(lambda: index.rank_sections(queries[:1]), 3)
+            print(f"rank_sections (ivf, top-5 with block metadata): {t.min():.2f} ms")
+            name, blocks, embeds = docs[0]
+            _, remove_t = timed(lambda: index.remove_document(name), 1)
+            _, add_t = timed(lambda: index.add_document(name, f"{name}.pdf", blocks, embeds), 1)
+            print(f"remove one document {remove_t[0]:.1f} ms, add one document {add_t[0]:.1f} ms")
+            index.close()
+
+
+if __name__ == "__main__":
+    main()
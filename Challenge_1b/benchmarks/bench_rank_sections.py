@@ -0,0 +1,102 @@
+"""
+Scaling benchmark: vectorized rank_sections vs the original per-block loop.
+
+Random normalized embeddings stand in for a corpus (a share of dropped tags,
+short texts and duplicated texts included), so no model or PDFs are needed.
+For every size both rankers run on the same input; the script checks the
+selected sections and ranks agree and prints the timings. "cached mask" is
+the vectorized ranker with the candidate mask computed once per corpus, as
+when many queries run against the same blocks.
+
+    python benchmarks/bench_rank_sections.py --sizes 1000 10000 100000 300000
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from config import DROP_TAGS, MIN_SECTION_CHAR_LEN, TOP_N_SECTIONS
+from ranking.section_ranker import candidate_mask, rank_sections, score_one_block
+
+
+def rank_sections_loop(blocks, block_embeds, prompt_embed):
+    """The original implementation: one np.dot per block and a full sort"""
+    scored_blocks = []
+    for block, embed in zip(blocks, block_embeds):
+        if block['tag_type'] in DROP_TAGS:
+            continue
+        if len(block['text']) < MIN_SECTION_CHAR_LEN:
+            continue
+        scored_blocks.append((score_one_block(embed, prompt_embed), block))
+    scored_blocks = sorted(scored_blocks, key=lambda x: -x[0])
+    results = []
+    seen = set()
+    for rank, (score, block) in enumerate(scored_blocks):
+        hash_ = hash(block["text"][:80])
+        if hash_ in seen:
+            continue
+        seen.add(hash_)
+        d = dict(block)
+        d["importance_rank"] = rank + 1
+        d["similarity_score"] = score
+        results.append(d)
+        if len(results) == TOP_N_SECTIONS:
+            break
+    return results
+
+
+def make_corpus(n, dim, seed=0):
+    rng = np.random.default_rng(seed)
+    tags = ["Section-header", "Text", "List-item", "Page-footer", "Picture"]
+    tag_idx = rng.choice(len(tags), size=n, p=[0.2, 0.5, 0.15, 0.1, 0.05])
+    blocks = []
+    for i in range(n):
+        # Every 50th block repeats an earlier text to exercise the dedup path
+        body = f"block {i % (n // 50 + 1) if i % 50 == 0 else i} " + "lorem ipsum " * int(rng.integers(1, 12))
+        blocks.append({"document": f"doc{i % 100}", "page_number": i % 30 + 1, "tag_type": tags[tag_idx[i]],
+                       "header_level": None, "text": body, "block_id": f"doc{i % 100}|{i % 30 + 1}|{i}"})
+    embeds = rng.standard_normal((n, dim)).astype(np.float32)
+    embeds /= np.linalg.norm(embeds, axis=1, keepdims=True)
+    # A block of exact duplicates near the top so ties and dedup both matter
+    embeds[1:n:97] = embeds[0]
+    prompt = embeds[0] + 0.1 * rng.standard_normal(dim).astype(np.float32)
+    return blocks, embeds, prompt
+
+
+def best_of(fn, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        times.append(time.perf_counter() - start)
+    return result, min(times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000, 300000])
+    parser.add_argument("--dim", type=int, default=384, help="Embedding size (all-MiniLM-L6-v2: 384)")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'blocks':>8} {'loop ms':>10} {'vectorized ms':>14} {'cached mask ms':>15} {'speedup':>8} "
+          f"{'same result':>12}")
+    for n in args.sizes:
+        blocks, embeds, prompt = make_corpus(n, args.dim)
+        old, old_time = best_of(lambda: rank_sections_loop(blocks, embeds, prompt), args.repeat)
+        new, new_time = best_of(lambda: rank_sections(blocks, embeds, prompt), args.repeat)
+        mask = candidate_mask(blocks)
+        _, masked_time = best_of(lambda: rank_sections(blocks, embeds, prompt, mask=mask), args.repeat)
+        same = ([(s["block_id"], s["importance_rank"]) for s in old]
+                == [(s["block_id"], s["importance_rank"]) for s in new])
+        print(f"{n:>8} {old_time * 1000:>10.1f} {new_time * 1000:>14.1f} {masked_time * 1000:>15.1f} {old_time / new_time:>7.1f}x {str(same):>12}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,150 @@
+"""
+Load test for the resident Round 1B query service.
+
+Start the service first, e.g.
+
+    python main.py --doc_inputs a.pdf a.json "Doc A" b.pdf b.json "Doc B" --serve 127.0.0.1:8081
+
+then
+
+    python benchmarks/load_test_service.py --url 127.0.0.1:8081 --requests 500 --concurrency 1 8 32
+
+Queries are the persona/job pairs of the Collection */challenge1b_input.json
+files (or --queries files), with a numbered suffix so no two prompts are the
+same. For every concurrency level the script reports p50/p99 latency and
+queries per second; the best level is the service's max QPS. Requests that
+get 503 (queue full) are retried after the server's Retry-After. With
+--doc_inputs, a few cold runs of main.py (model load + parse + embed per
+query) are timed for comparison.
+"""
+import argparse
+import http.client
+import json
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import numpy as np
+
+ROOT = Path(__file__).resolve().parents[1]
+
+
+class UnixHTTPConnection(http.client.HTTPConnection):
+    def __init__(self, socket_path, timeout=600):
+        super().__init__("localhost", timeout=timeout)
+        self.socket_path = socket_path
+
+    def connect(self):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.settimeout(self.timeout)
+        self.sock.connect(self.socket_path)
+
+
+def load_queries(paths):
+    queries = []
+    for path in paths:
+        data = json.loads(Path(path).read_text(encoding="utf-8"))
+        for item in data if isinstance(data, list) else [data]:
+            queries.append({"persona": item["persona"]["role"], "job": item["job_to_be_done"]["task"]})
+    return queries
+
+
+def run_level(args, queries, concurrency):
+    local = threading.local()
+    rejected = [0]
+
+    def connection():
+        if not hasattr(local, "conn"):
+            if args.socket:
+                local.conn = UnixHTTPConnection(args.socket)
+            else:
+                host, _, port = args.url.rpartition(":")
+                local.conn = http.client.HTTPConnection(host or "127.0.0.1", int(port), timeout=600)
+        return local.conn
+
+    def one_request(i):
+        query = queries[i % len(queries)]
+        body = json.dumps({"persona": query["persona"], "job": f"{query['job']} ({i})",
+                           "collection": args.collection})
+        start = time.perf_counter()
+        while True:
+            conn = connection()
+            conn.request("POST", "/query", body=body, headers={"Content-Type": "application/json"})
+            response = conn.getresponse()
+            response.read()
+            if response.status != 503:
+                break
+            rejected[0] += 1
+            time.sleep(float(response.getheader("Retry-After", "1")))
+        if response.status != 200:
+            raise RuntimeError(f"HTTP {response.status}")
+        return time.perf_counter() - start
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(concurrency) as pool:
+        latencies = np.array(list(pool.map(one_request, range(args.requests)))) * 1000
+    elapsed = time.perf_counter() - start
+    return {"concurrency": concurrency, "p50_ms": np.percentile(latencies, 50), "p99_ms": np.percentile(latencies, 99),
+            "qps": args.requests / elapsed, "retries": rejected[0]}
+
+
+def health(args):
+    conn = UnixHTTPConnection(args.socket) if args.socket else http.client.HTTPConnection(
+        args.url.rpartition(":")[0] or "127.0.0.1", int(args.url.rpartition(":")[2]), timeout=60)
+    conn.request("GET", "/health")
+    return json.loads(conn.getresponse().read())
+
+
+def run_cold_start(args, queries):
+    latencies = []
+    for i in range(args.cold_runs):
+        query = queries[i % len(queries)]
+        with tempfile.TemporaryDirectory() as tmp:
+            start = time.perf_counter()
+            subprocess.run([sys.executable, str(ROOT / "main.py"), "--doc_inputs", *args.doc_inputs,
+                            "--persona", query["persona"], "--job", query["job"],
+                            "--outpath", str(Path(tmp) / "out.json"), "--cache_dir", ""],
+                           check=True, capture_output=True, cwd=ROOT)
+            latencies.append(time.perf_counter() - start)
+    print(f"\ncold start (main.py per query): p50 {np.percentile(latencies, 50):.2f}s, "
+          f"max {max(latencies):.2f}s over {len(latencies)} run(s)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--url", default="127.0.0.1:8081", help="HOST:PORT of the service")
+    parser.add_argument("--socket", default=None, help="Unix socket of the service instead of --url")
+    parser.add_argument("--collection", default="default")
+    parser.add_argument("--queries", nargs="+", default=None, help="challenge1b_input.json-style files")
+    parser.add_argument("--requests", type=int, default=500, help="Requests per concurrency level")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 16, 64])
+    parser.add_argument("--doc_inputs", nargs="+", default=None, metavar="PDF TAGGED_JSON DOCNAME",
+                        help="Also time cold main.py runs over these documents")
+    parser.add_argument("--cold-runs", type=int, default=3)
+    args = parser.parse_args()
+
+    queries = load_queries(args.queries or sorted(ROOT.glob("Collection */challenge1b_input.json")))
+    if not queries:
+        sys.exit("No queries found")
+
+    results = []
+    print(f"{'concurrency':>11} {'p50 ms':>9} {'p99 ms':>9} {'queries/s':>10} {'retries':>8}")
+    for concurrency in args.concurrency:
+        r = run_level(args, queries, concurrency)
+        results.append(r)
+        print(f"{concurrency:>11} {r['p50_ms']:>9.1f} {r['p99_ms']:>9.1f} {r['qps']:>10.1f} {r['retries']:>8}")
+    best = max(results, key=lambda r: r["qps"])
+    stats = health(args)
+    print(f"\nmax {best['qps']:.1f} queries/s at concurrency {best['concurrency']}; "
+          f"mean prompt batch {stats.get('mean_batch')} over {stats.get('batches', 0)} batches")
+    if args.doc_inputs and args.cold_runs:
+        run_cold_start(args, queries)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,7 @@
 # chunking/subchunker.py
 import re
-from config import TOP_M_CHUNKS_PER_SECTION
+import numpy as np
+from config import TOP_M_CHUNKS_PER_SECTION, BATCH_EMBED_SIZE
 
 def paragraph_chunks(text):
     # Naive split on double newline, fallback to single
@@ -9,21 +10,68 @@ def paragraph_chunks(text):
         paras = [p.strip() for p in text.split('\n') if p.strip()]
     return paras
 
-def rank_chunks(section_text, embedder, prompt_embed):
-    paras = paragraph_chunks(section_text)
-    if not paras:
-        return []
-    para_embeds = embedder.embed_many(paras)
-    scores = [float((e @ prompt_embed)) for e in para_embeds]
-    ranked = sorted(zip(scores, paras), key=lambda x: -x[0])
+def embed_paragraphs(section_texts, embedder, batch_size=BATCH_EMBED_SIZE):
+    """
+    Split every section into paragraphs and embed all of them in one pass.
+    Identical paragraphs (across sections or documents) are encoded once.
+    Returns (per-section paragraph lists, per-section row indices, embeddings).
+    """
+    section_paras = [paragraph_chunks(t) for t in section_texts]
+    unique = {}
+    section_rows = [np.array([unique.setdefault(p, len(unique)) for p in paras], dtype=np.int64)
+                    for paras in section_paras]
+    if not unique:
+        return section_paras, section_rows, np.zeros((0, 0), dtype=np.float32)
+    # One length-sorted encode call, so each batch holds paragraphs of similar length
+    texts = sorted(unique, key=len)
+    order = np.argsort(np.fromiter((unique[t] for t in texts), dtype=np.int64, count=len(texts)))
+    embeds = np.asarray(embedder.embed_many(texts, batch_size=batch_size))
+    return section_paras, section_rows, embeds[order]
+
+def select_chunks(paras, scores, top_m=TOP_M_CHUNKS_PER_SECTION):
+    """Top-M paragraphs of one section by score, skipping near-duplicates."""
     selected = []
     seen = set()
-    for score, chunk_text in ranked:
+    for i in np.argsort(-scores, kind="stable"):
+        chunk_text = paras[i]
         key = chunk_text[:60]
         if key in seen:
             continue
         seen.add(key)
-        selected.append({"score": score, "refined_text": chunk_text})
-        if len(selected) == TOP_M_CHUNKS_PER_SECTION:
+        selected.append({"score": float(scores[i]), "refined_text": chunk_text})
+        if len(selected) == top_m:
             break
     return selected
+
+def rank_all_chunks(section_texts, embedder, prompt_embed, batch_size=BATCH_EMBED_SIZE):
+    """Ranks paragraphs of many sections with one embedding pass and one matrix product."""
+    section_paras, section_rows, embeds = embed_paragraphs(section_texts, embedder, batch_size)
+    if not len(embeds):
+        return [[] for _ in section_texts]
+    scores = embeds @ np.asarray(prompt_embed)
+    return [select_chunks(paras, scores[rows]) if paras else []
+            for paras, rows in zip(section_paras, section_rows)]
+
+def rank_chunks(section_text, embedder, prompt_embed):
+    return rank_all_chunks([section_text], embedder, prompt_embed)[0]
+
+def rank_chunks_multi(query_section_texts, embedder, prompt_embeds, batch_size=BATCH_EMBED_SIZE):
+    """
+    rank_all_chunks for many prompts: query_section_texts holds each prompt's section
+    texts. Sections shared by several prompts are split and embedded once, and all
+    paragraphs are scored against all prompts with one matrix product.
+    """
+    prompt_embeds = np.atleast_2d(np.asarray(prompt_embeds))
+    section_index = {}
+    for texts in query_section_texts:
+        for t in texts:
+            section_index.setdefault(t, len(section_index))
+    section_paras, section_rows, embeds = embed_paragraphs(list(section_index), embedder, batch_size)
+    if not len(embeds):
+        return [[[] for _ in texts] for texts in query_section_texts]
+    scores = embeds @ prompt_embeds.T
+    results = []
+    for j, texts in enumerate(query_section_texts):
+        results.append([select_chunks(section_paras[i], scores[section_rows[i], j]) if section_paras[i] else []
+                        for i in (section_index[t] for t in texts)])
+    return results
@@ -12,5 +12,31 @@ TOP_M_CHUNKS_PER_SECTION = 2
 
 # Parallelism (tune as needed per hardware)
 N_PARSE_THREADS = int(os.environ.get("N_PARSE_THREADS", 4))
-N_EMBED_THREADS = int(os.environ.get("N_EMBED_THREADS", 4))
+N_EMBED_THREADS = int(os.environ.get("N_EMBED_THREADS", 4))  # intra-op threads of the embedding model
+N_EMBED_INTER_THREADS = int(os.environ.get("N_EMBED_INTER_THREADS", 1))
 BATCH_EMBED_SIZE = 32
+
+# Embedding backend: "torch" (fp32) or "onnx" (ONNX Runtime, optionally INT8 dynamic quantization)
+EMBED_BACKEND = os.environ.get("EMBED_BACKEND", "torch")
+EMBED_INT8 = os.environ.get("EMBED_INT8", "0") == "1"
+EMBED_QUANTIZATION = os.environ.get("EMBED_QUANTIZATION", "avx2")  # avx2 | avx512 | avx512_vnni | arm64
+EMBED_EXPORT_DIR = os.environ.get("EMBED_EXPORT_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "onnx_models"))
+
+# Embedding cache: vectors keyed by model + text hash, reused across runs/personas
+# (set EMBED_CACHE_DIR="" to disable)
+EMBED_CACHE_DIR = os.environ.get("EMBED_CACHE_DIR", os.path.join(os.path.expanduser("~"), ".cache", "round1b_embeddings"))
+EMBED_CACHE_DTYPE = os.environ.get("EMBED_CACHE_DTYPE", "float16")  # float16 halves disk/RAM; float32 is exact
+EMBED_CACHE_MAX_ENTRIES = int(os.environ.get("EMBED_CACHE_MAX_ENTRIES", 200_000))
+
+# Persistent vector index (main.py --index DIR)
+INDEX_DTYPE = "float32"
+INDEX_IVF_MIN_ROWS = 20_000  # train IVF lists once the index holds this many blocks
+INDEX_NPROBE = 8  # IVF lists scanned per query
+
+# Resident query service (main.py --serve / --socket)
+SERVICE_HOST = "127.0.0.1"
+SERVICE_PORT = int(os.environ.get("SERVICE_PORT", 8081))
+SERVICE_BATCH_WINDOW_MS = float(os.environ.get("SERVICE_BATCH_WINDOW_MS", 5))  # wait this long to batch prompts
+SERVICE_MAX_BATCH = 64
+SERVICE_QUEUE_SIZE = 256  # queued queries before new ones get 503
+SERVICE_REQUEST_TIMEOUT = 60
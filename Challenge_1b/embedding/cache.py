@@ -0,0 +1,191 @@
+# embedding/cache.py
+import fcntl
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+from contextlib import contextmanager
+import numpy as np
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (key TEXT PRIMARY KEY, slot INTEGER NOT NULL, last_used INTEGER NOT NULL);
+CREATE INDEX IF NOT EXISTS entries_last_used ON entries (last_used);
+CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value TEXT NOT NULL);
+"""
+
+
+def text_key(text):
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+
+class EmbeddingCache:
+    """
+    Disk-backed embedding store for one model: vectors live in a memory-mapped
+    array (one row per text), a sqlite index maps text hash -> row and keeps an
+    LRU clock. Once max_entries rows are used, the least recently used rows are
+    overwritten. Each model gets its own directory; processes sharing it
+    serialize vector reads/writes and slot allocation on a lock file.
+    """
+
+    def __init__(self, cache_dir, model_name, dim, dtype="float16", max_entries=200_000):
+        self.dim = int(dim)
+        self.dtype = np.dtype(dtype)
+        self.max_entries = int(max_entries)
+        self.dir = os.path.join(cache_dir, re.sub(r"[^A-Za-z0-9_.-]+", "_", model_name))
+        os.makedirs(self.dir, exist_ok=True)
+        self.vectors_path = os.path.join(self.dir, "vectors.bin")
+        self.lock_file = open(os.path.join(self.dir, "lock"), "a")
+        self.thread_lock = threading.Lock()  # flock does not exclude threads sharing one descriptor
+        # The query service uses it from its batcher thread
+        self.db = sqlite3.connect(os.path.join(self.dir, "index.sqlite"), timeout=60, check_same_thread=False)
+        self.hits = 0
+        self.misses = 0
+        with self._locked():
+            self._init_store(model_name)
+
+    @contextmanager
+    def _locked(self):
+        """Exclusive across threads and processes using this directory"""
+        with self.thread_lock:
+            fcntl.flock(self.lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(self.lock_file, fcntl.LOCK_UN)
+
+    def _init_store(self, model_name):
+        self.db.executescript(SCHEMA)
+        layout = f"{model_name}|{self.dim}|{self.dtype.str}"
+        rows = self.db.execute("SELECT COALESCE(MAX(slot) + 1, 0) FROM entries").fetchone()[0]
+        if self._meta("layout") != layout or rows > self.max_entries:
+            # Different model/dim/dtype (or a smaller size bound) under the same directory: start over
+            rows = 0
+            self.db.execute("DELETE FROM entries")
+            self.db.execute("DELETE FROM meta")
+            self._set_meta("layout", layout)
+            if os.path.exists(self.vectors_path):
+                os.remove(self.vectors_path)
+            self.db.commit()
+        self.clock = int(self._meta("clock") or 0)
+        self.capacity = 0
+        self.vectors = None
+        self._open(max(rows, 1024))
+
+    def _meta(self, name):
+        row = self.db.execute("SELECT value FROM meta WHERE name = ?", (name,)).fetchone()
+        return row[0] if row else None
+
+    def _set_meta(self, name, value):
+        self.db.execute("INSERT OR REPLACE INTO meta (name, value) VALUES (?, ?)", (name, str(value)))
+
+    def _open(self, rows):
+        """Map the vector file with room for at least `rows` rows (grows by doubling)"""
+        if rows <= self.capacity:
+            return
+        rows = min(max(rows, self.capacity * 2), self.max_entries)
+        row_bytes = self.dim * self.dtype.itemsize
+        if self.vectors is not None:
+            self.vectors.flush()
+            self.vectors = None
+        with open(self.vectors_path, "ab") as f:
+            if f.tell() < rows * row_bytes:
+                f.truncate(rows * row_bytes)
+        self.vectors = np.memmap(self.vectors_path, dtype=self.dtype, mode="r+", shape=(rows, self.dim))
+        self.capacity = rows
+
+    def _slots(self, keys):
+        """{key: slot} for the cached keys"""
+        found = {}
+        for i in range(0, len(keys), 500):
+            part = keys[i:i + 500]
+            found.update(self.db.execute(f"SELECT key, slot FROM entries WHERE key IN ({','.join('?' * len(part))})",
+                                         part).fetchall())
+        return found
+
+    def _tick(self):
+        """Advance the LRU clock past every other process sharing the index"""
+        latest = self.db.execute("SELECT COALESCE(MAX(last_used), 0) FROM entries").fetchone()[0]
+        self.clock = max(self.clock, latest) + 1
+        return self.clock
+
+    def get_many(self, keys):
+        """Returns {key: float32 vector} for the cached keys and bumps their LRU clock"""
+        with self._locked():
+            found = self._slots(list(dict.fromkeys(keys)))
+            vectors = None
+            if found:
+                slots = np.fromiter(found.values(), dtype=np.int64)
+                self._open(int(slots.max()) + 1)  # another process may have grown the file
+                vectors = np.asarray(self.vectors[slots], dtype=np.float32)
+                clock = self._tick()
+                self.db.executemany("UPDATE entries SET last_used = ? WHERE key = ?", [(clock, k) for k in found])
+                self._set_meta("clock", clock)
+                self.db.commit()
+        self.hits += sum(k in found for k in keys)
+        self.misses += sum(k not in found for k in keys)
+        return dict(zip(found, vectors)) if found else {}
+
+    def put_many(self, keys, vectors):
+        """Store vectors for keys not yet cached, evicting the least recently used rows when full"""
+        new = {}
+        for key, vec in zip(keys, vectors):
+            new.setdefault(key, vec)
+        if not new:
+            return
+        with self._locked():
+            self.db.execute("BEGIN IMMEDIATE")
+            try:
+                cached = self._slots(list(new))
+                new_keys = [k for k in new if k not in cached][:self.max_entries]
+                if not new_keys:
+                    self.db.commit()
+                    return
+                # Evicted rows are reused in place, so slots above the highest one are free
+                next_slot = self.db.execute("SELECT COALESCE(MAX(slot) + 1, 0) FROM entries").fetchone()[0]
+                fresh = max(0, min(len(new_keys), self.max_entries - next_slot))
+                slots = list(range(next_slot, next_slot + fresh))
+                if len(slots) < len(new_keys):
+                    victims = self.db.execute("SELECT key, slot FROM entries ORDER BY last_used LIMIT ?",
+                                              (len(new_keys) - len(slots),)).fetchall()
+                    self.db.executemany("DELETE FROM entries WHERE key = ?", [(k,) for k, _ in victims])
+                    slots.extend(s for _, s in victims)
+                    new_keys = new_keys[:len(slots)]
+                self._open(max(slots) + 1)
+
+                clock = self._tick()
+                slots = np.asarray(slots, dtype=np.int64)
+                self.vectors[slots] = np.asarray([new[k] for k in new_keys], dtype=self.dtype)
+                self.vectors.flush()
+                self.db.executemany("INSERT INTO entries (key, slot, last_used) VALUES (?, ?, ?)",
+                                    [(k, int(s), clock) for k, s in zip(new_keys, slots)])
+                self._set_meta("clock", clock)
+                self.db.commit()
+            except BaseException:
+                self.db.rollback()
+                raise
+
+    def flush(self):
+        with self._locked():
+            self.vectors.flush()
+            self._set_meta("clock", self.clock)
+            self.db.commit()
+
+    def stats(self):
+        total = self.hits + self.misses
+        entries = self.db.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+            "entries": entries,
+            "max_entries": self.max_entries,
+            "size_mb": os.path.getsize(self.vectors_path) / 1e6,
+        }
+
+    def close(self):
+        if self.vectors is not None:
+            self.flush()
+            self.vectors = None
+        self.db.close()
+        self.lock_file.close()
@@ -1,13 +1,102 @@
 # embedding/embedder.py
+import os
+import re
 from sentence_transformers import SentenceTransformer
 import numpy as np
+from embedding.cache import EmbeddingCache, text_key
+from config import N_EMBED_THREADS, N_EMBED_INTER_THREADS
+
+EMBED_BACKENDS = ("torch", "onnx")
+
+def onnx_model_dir(model_name, export_dir, quantization=None):
+    """
+    Local ONNX copy of a model (exported once, then loaded offline). With a quantization
+    ("avx2", "avx512", "avx512_vnni", "arm64") a dynamically quantized INT8 file is added.
+    Returns (model directory, ONNX file name inside it).
+    """
+    target = os.path.join(export_dir, re.sub(r"[^A-Za-z0-9_.-]+", "_", model_name))
+    model = None
+    if not os.path.exists(os.path.join(target, "onnx", "model.onnx")):
+        model = SentenceTransformer(model_name, backend="onnx", device="cpu")
+        model.save_pretrained(target)
+    if not quantization:
+        return target, "onnx/model.onnx"
+    # Name the file ourselves: the default suffix follows the preset's weight type (quint8 for avx2, qint8 for others)
+    file_suffix = f"int8_{quantization}"
+    file_name = f"onnx/model_{file_suffix}.onnx"
+    if not os.path.exists(os.path.join(target, file_name)):
+        from sentence_transformers import export_dynamic_quantized_onnx_model
+        model = model or SentenceTransformer(target, backend="onnx", device="cpu")
+        export_dynamic_quantized_onnx_model(model, quantization, target, file_suffix=file_suffix)
+        if not os.path.exists(os.path.join(target, file_name)):
+            raise RuntimeError(f"INT8 export did not produce {os.path.join(target, file_name)}")
+    return target, file_name
+
+def load_sentence_model(model_name, backend="torch", int8=False, quantization="avx2", export_dir="onnx_models",
+                        threads=N_EMBED_THREADS, inter_threads=N_EMBED_INTER_THREADS):
+    """SentenceTransformer on CPU with the given backend and thread counts."""
+    if backend == "torch":
+        import torch
+        torch.set_num_threads(threads)
+        try:
+            torch.set_num_interop_threads(inter_threads)
+        except RuntimeError:
+            pass  # only settable before the first parallel op in this process
+        return SentenceTransformer(model_name, device="cpu")
+    if backend != "onnx":
+        raise ValueError(f"Unknown embedding backend {backend!r}, expected one of {EMBED_BACKENDS}")
+    import onnxruntime as ort
+    path, file_name = onnx_model_dir(model_name, export_dir, quantization if int8 else None)
+    options = ort.SessionOptions()
+    options.intra_op_num_threads = threads
+    options.inter_op_num_threads = inter_threads
+    return SentenceTransformer(path, backend="onnx", device="cpu",
+                               model_kwargs={"file_name": file_name, "provider": "CPUExecutionProvider",
+                                             "session_options": options})
 
 class EmbeddingEngine:
-    def __init__(self, model_name):
-        self.model = SentenceTransformer(model_name)
-    
+    def __init__(self, model_name, cache_dir=None, cache_dtype="float16", cache_max_entries=200_000,
+                 backend="torch", int8=False, quantization="avx2", export_dir="onnx_models"):
+        self.model_name = model_name
+        self.model = load_sentence_model(model_name, backend, int8, quantization, export_dir)
+        self.dim = self.model.get_sentence_embedding_dimension()
+        # Vectors from different backends/precisions differ slightly, so caches and indexes keep them apart
+        self.model_id = model_name if backend == "torch" else f"{model_name}|{backend}{'-int8-' + quantization if int8 else ''}"
+        self.cache = None
+        if cache_dir:
+            self.cache = EmbeddingCache(cache_dir, self.model_id, self.dim,
+                                        dtype=cache_dtype, max_entries=cache_max_entries)
+
     def embed_many(self, texts, batch_size=32):
-        return self.model.encode(texts, batch_size=batch_size, show_progress_bar=False, normalize_embeddings=True)
+        if self.cache is None:
+            return self.model.encode(texts, batch_size=batch_size, show_progress_bar=False, normalize_embeddings=True)
+        # Only texts missing from the cache reach the model
+        keys = [text_key(t) for t in texts]
+        found = self.cache.get_many(keys)
+        missing = {}
+        for key, text in zip(keys, texts):
+            if key not in found:
+                missing.setdefault(key, text)
+        if missing:
+            new = self.model.encode(list(missing.values()), batch_size=batch_size, show_progress_bar=False,
+                                    normalize_embeddings=True)
+            self.cache.put_many(list(missing), new)
+            # Round through the cache dtype so a first run scores exactly like a cached re-run
+            found.update(zip(missing, np.asarray(new, dtype=self.cache.dtype).astype(np.float32)))
+        if not keys:
+            return np.zeros((0, self.dim), dtype=np.float32)
+        return np.stack([found[k] for k in keys])
     
     def embed_one(self, text):
         return self.model.encode([text])[0]
+
+    def embed_queries(self, texts, batch_size=32):
+        """Prompt embeddings for many queries at once (same vectors as embed_one, stacked)."""
+        return self.model.encode(list(texts), batch_size=batch_size, show_progress_bar=False)
+
+    def cache_stats(self):
+        return self.cache.stats() if self.cache is not None else None
+
+    def close(self):
+        if self.cache is not None:
+            self.cache.close()
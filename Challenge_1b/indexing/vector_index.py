@@ -0,0 +1,301 @@
+# indexing/vector_index.py
+import json
+import os
+import sqlite3
+import numpy as np
+from config import TOP_N_SECTIONS
+from ranking.section_ranker import candidate_mask, select_sections, top_k_order
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS docs (name TEXT PRIMARY KEY, pdf_path TEXT, first_row INTEGER, n_rows INTEGER);
+CREATE TABLE IF NOT EXISTS blocks (row INTEGER PRIMARY KEY, doc TEXT NOT NULL, block TEXT NOT NULL);
+CREATE INDEX IF NOT EXISTS blocks_doc ON blocks (doc);
+CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value TEXT NOT NULL);
+"""
+
+ALIVE = 1       # row belongs to an indexed document
+CANDIDATE = 2   # row passes candidate_mask (may be returned as a section)
+SCAN_ROWS = 65536
+
+
+def _save_npy(path, array):
+    tmp = path + ".tmp.npy"
+    np.save(tmp, array)
+    os.replace(tmp, path)
+
+
+def kmeans(vectors, n_lists, iters=10, seed=0):
+    """Spherical k-means (vectors are normalized): returns (n_lists, dim) unit centroids"""
+    rng = np.random.default_rng(seed)
+    centroids = vectors[rng.choice(len(vectors), size=n_lists, replace=False)].astype(np.float32)
+    for _ in range(iters):
+        assign = np.argmax(vectors @ centroids.T, axis=1)
+        # Per-list sums via one sort + reduceat (np.add.at is far slower)
+        order = np.argsort(assign, kind="stable")
+        counts = np.bincount(assign, minlength=n_lists)
+        starts = np.concatenate([[0], np.cumsum(counts)[:-1]])
+        sums = np.zeros_like(centroids)
+        used = counts > 0
+        sums[used] = np.add.reduceat(vectors[order], starts[used], axis=0)
+        empty = counts == 0
+        # Re-seed empty lists from random rows so every list stays in use
+        sums[empty] = vectors[rng.choice(len(vectors), size=int(empty.sum()))]
+        centroids = sums / np.maximum(np.linalg.norm(sums, axis=1, keepdims=True), 1e-12)
+    return centroids
+
+
+class VectorIndex:
+    """
+    Build-once, query-many store of block metadata and embeddings for a corpus.
+
+    vectors.bin   memory-mapped (rows x dim) embeddings, appended per document
+    flags.npy     per-row ALIVE / CANDIDATE bits (removal only clears bits)
+    lists.npy     per-row IVF list (-1 until the index is trained)
+    centroids.npy IVF centroids
+    index.sqlite  documents and block dicts (JSON) by row
+
+    Search is exact (chunked scan of the memmap) or IVF (scan only the lists
+    nearest to the query). Single writer; compact() drops removed rows.
+    """
+
+    def __init__(self, path, dim, model_name, dtype="float32"):
+        self.path = path
+        self.dim = int(dim)
+        self.dtype = np.dtype(dtype)
+        os.makedirs(path, exist_ok=True)
+        self.vectors_path = os.path.join(path, "vectors.bin")
+        # The query service uses it from its batcher thread (still a single writer)
+        self.db = sqlite3.connect(os.path.join(path, "index.sqlite"), check_same_thread=False)
+        self.db.executescript(SCHEMA)
+        layout = f"{model_name}|{self.dim}|{self.dtype.str}"
+        stored = self._meta("layout")
+        if stored is None:
+            self._set_meta("layout", layout)
+            self.db.commit()
+        elif stored != layout:
+            raise ValueError(f"Index at {path} was built for {stored}, not {layout}")
+
+        self.n_rows = int(self._meta("n_rows") or 0)
+        flags_path, lists_path = os.path.join(path, "flags.npy"), os.path.join(path, "lists.npy")
+        self.flags = np.load(flags_path) if os.path.exists(flags_path) else np.zeros(0, dtype=np.uint8)
+        self.lists = np.load(lists_path) if os.path.exists(lists_path) else np.zeros(0, dtype=np.int32)
+        centroids_path = os.path.join(path, "centroids.npy")
+        self.centroids = np.load(centroids_path) if os.path.exists(centroids_path) else None
+        self.trained_rows = int(self._meta("trained_rows") or 0)
+        self.capacity = 0
+        self.vectors = None
+        self._list_rows = None
+        self._open(max(self.n_rows, 1024))
+
+    def _meta(self, name):
+        row = self.db.execute("SELECT value FROM meta WHERE name = ?", (name,)).fetchone()
+        return row[0] if row else None
+
+    def _set_meta(self, name, value):
+        self.db.execute("INSERT OR REPLACE INTO meta (name, value) VALUES (?, ?)", (name, str(value)))
+
+    def _open(self, rows):
+        """Map the vector file with room for at least `rows` rows (grows by doubling)"""
+        if rows <= self.capacity:
+            return
+        rows = max(rows, self.capacity * 2)
+        if self.vectors is not None:
+            self.vectors.flush()
+            self.vectors = None
+        with open(self.vectors_path, "ab") as f:
+            if f.tell() < rows * self.dim * self.dtype.itemsize:
+                f.truncate(rows * self.dim * self.dtype.itemsize)
+        self.vectors = np.memmap(self.vectors_path, dtype=self.dtype, mode="r+", shape=(rows, self.dim))
+        self.capacity = rows
+
+    def _save(self):
+        self.vectors.flush()
+        _save_npy(os.path.join(self.path, "flags.npy"), self.flags[:self.n_rows])
+        _save_npy(os.path.join(self.path, "lists.npy"), self.lists[:self.n_rows])
+        if self.centroids is not None:
+            _save_npy(os.path.join(self.path, "centroids.npy"), self.centroids)
+        self._set_meta("n_rows", self.n_rows)
+        self._set_meta("trained_rows", self.trained_rows)
+        self.db.commit()
+
+    # ---- Documents
+    def documents(self):
+        """[{"name", "pdf_path"}] of the indexed documents, in insertion order"""
+        return [{"name": n, "pdf_path": p}
+                for n, p in self.db.execute("SELECT name, pdf_path FROM docs ORDER BY first_row")]
+
+    def has_document(self, name):
+        return self.db.execute("SELECT 1 FROM docs WHERE name = ?", (name,)).fetchone() is not None
+
+    def add_document(self, name, pdf_path, blocks, embeds, commit=True):
+        """Append one document's blocks and embeddings (replacing an earlier version)"""
+        if self.has_document(name):
+            self.remove_document(name, commit=False)
+        embeds = np.asarray(embeds, dtype=np.float32).reshape(len(blocks), self.dim)
+        first, n = self.n_rows, len(blocks)
+        self._open(first + n)
+        self.vectors[first:first + n] = embeds
+        flags = np.full(n, ALIVE, dtype=np.uint8)
+        flags[candidate_mask(blocks)] |= CANDIDATE
+        lists = (np.argmax(embeds @ self.centroids.T, axis=1).astype(np.int32) if self.centroids is not None and n
+                 else np.full(n, -1, dtype=np.int32))
+        if len(self.flags) < first + n:
+            # Grow the per-row arrays by doubling so bulk loads stay linear
+            size = max(first + n, 2 * len(self.flags))
+            self.flags = np.concatenate([self.flags[:first], np.zeros(size - first, dtype=np.uint8)])
+            self.lists = np.concatenate([self.lists[:first], np.full(size - first, -1, dtype=np.int32)])
+        self.flags[first:first + n] = flags
+        self.lists[first:first + n] = lists
+        self.n_rows += n
+        self._list_rows = None
+        self.db.execute("INSERT INTO docs (name, pdf_path, first_row, n_rows) VALUES (?, ?, ?, ?)",
+                        (name, pdf_path, first, n))
+        self.db.executemany("INSERT INTO blocks (row, doc, block) VALUES (?, ?, ?)",
+                            [(first + i, name, json.dumps(b, ensure_ascii=False)) for i, b in enumerate(blocks)])
+        if commit:
+            self._save()
+
+    def remove_document(self, name, commit=True):
+        row = self.db.execute("SELECT first_row, n_rows FROM docs WHERE name = ?", (name,)).fetchone()
+        if row is None:
+            return False
+        first, n = row
+        self.flags[first:first + n] = 0
+        self.db.execute("DELETE FROM docs WHERE name = ?", (name,))
+        self.db.execute("DELETE FROM blocks WHERE doc = ?", (name,))
+        if commit:
+            self._save()
+        return True
+
+    def commit(self):
+        self._save()
+
+    def dead_rows(self):
+        return int(self.n_rows - np.count_nonzero(self.flags[:self.n_rows] & ALIVE))
+
+    def compact(self):
+        """Rewrite the index without removed rows (row numbers change)"""
+        keep = np.flatnonzero(self.flags[:self.n_rows] & ALIVE)
+        remap = np.full(self.n_rows, -1, dtype=np.int64)
+        remap[keep] = np.arange(len(keep))
+        for start in range(0, len(keep), SCAN_ROWS):
+            part = keep[start:start + SCAN_ROWS]
+            self.vectors[start:start + len(part)] = self.vectors[part]
+        self.flags = self.flags[keep]
+        self.lists = self.lists[keep]
+        self.n_rows = len(keep)
+        self._list_rows = None
+        docs = self.db.execute("SELECT name, first_row FROM docs").fetchall()
+        self.db.executemany("UPDATE docs SET first_row = ? WHERE name = ?",
+                            [(int(remap[first]), name) for name, first in docs])
+        rows = [r for (r,) in self.db.execute("SELECT row FROM blocks ORDER BY row")]
+        # Rows only move down and keep their order, so updating in ascending order never collides
+        self.db.executemany("UPDATE blocks SET row = ? WHERE row = ?", [(int(remap[r]), r) for r in rows])
+        self._save()
+
+    # ---- IVF
+    def train(self, n_lists=None, sample=None, iters=10, seed=0):
+        """Cluster the live rows into n_lists IVF lists (default ~4*sqrt(rows))"""
+        live = np.flatnonzero(self.flags[:self.n_rows] & ALIVE)
+        if not len(live):
+            return
+        n_lists = min(n_lists or int(4 * np.sqrt(len(live))), len(live))
+        sample = min(sample or 64 * n_lists, len(live))
+        rng = np.random.default_rng(seed)
+        train_rows = np.sort(rng.choice(live, size=sample, replace=False))
+        self.centroids = kmeans(np.asarray(self.vectors[train_rows], dtype=np.float32), n_lists, iters, seed)
+        for start in range(0, self.n_rows, SCAN_ROWS):
+            stop = min(start + SCAN_ROWS, self.n_rows)
+            block = np.asarray(self.vectors[start:stop], dtype=np.float32)
+            self.lists[start:stop] = np.argmax(block @ self.centroids.T, axis=1)
+        self.trained_rows = len(live)
+        self._list_rows = None
+        self._save()
+
+    def needs_training(self, min_rows):
+        """True when the index is big enough for IVF and untrained, or has grown 4x since training"""
+        live = self.n_rows - self.dead_rows()
+        return live >= min_rows and (self.centroids is None or live > 4 * self.trained_rows)
+
+    def _lists(self):
+        """CSR view of the IVF lists: (rows sorted by list, list offsets)"""
+        if self._list_rows is None:
+            order = np.argsort(self.lists[:self.n_rows], kind="stable")
+            offsets = np.searchsorted(self.lists[:self.n_rows][order], np.arange(len(self.centroids) + 1))
+            self._list_rows = (order, offsets)
+        return self._list_rows
+
+    # ---- Search
+    def search(self, queries, k, mode="auto", nprobe=8, candidates_only=True):
+        """
+        Top-k rows for each query (queries: (m, dim) or (dim,)). Returns a list of
+        (rows, scores) per query, best first. mode: "exact", "ivf" or "auto" (IVF once trained).
+        """
+        queries = np.atleast_2d(np.asarray(queries, dtype=np.float32))
+        want = CANDIDATE | ALIVE if candidates_only else ALIVE
+        if mode == "auto":
+            mode = "ivf" if self.centroids is not None else "exact"
+        if mode == "ivf" and self.centroids is not None:
+            return [self._search_ivf(q, k, nprobe, want) for q in queries]
+        return self._search_exact(queries, k, want)
+
+    def _search_exact(self, queries, k, want):
+        best = [(np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32)) for _ in queries]
+        for start in range(0, self.n_rows, SCAN_ROWS):
+            stop = min(start + SCAN_ROWS, self.n_rows)
+            live = np.flatnonzero((self.flags[start:stop] & want) == want)
+            if not len(live):
+                continue
+            scores = (np.asarray(self.vectors[start:stop], dtype=np.float32) @ queries.T)[live]
+            for j in range(len(queries)):
+                rows = np.concatenate([best[j][0], start + live])
+                col = np.concatenate([best[j][1], scores[:, j]])
+                top = top_k_order(col, k)
+                best[j] = (rows[top], col[top])
+        return best
+
+    def _search_ivf(self, query, k, nprobe, want):
+        order, offsets = self._lists()
+        probe = top_k_order(self.centroids @ query, min(nprobe, len(self.centroids)))
+        rows = np.sort(np.concatenate([order[offsets[l]:offsets[l + 1]] for l in probe]))
+        rows = rows[(self.flags[rows] & want) == want]
+        if not len(rows):
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32)
+        scores = np.asarray(self.vectors[rows], dtype=np.float32) @ query
+        top = top_k_order(scores, k)
+        return rows[top], scores[top]
+
+    def blocks(self, rows):
+        """Block dicts for the given rows, in the same order"""
+        rows = [int(r) for r in rows]
+        found = {}
+        for i in range(0, len(rows), 500):
+            part = rows[i:i + 500]
+            found.update(self.db.execute(f"SELECT row, block FROM blocks WHERE row IN ({','.join('?' * len(part))})",
+                                         part).fetchall())
+        return [json.loads(found[r]) for r in rows]
+
+    def rank_sections(self, prompt_embeds, top_n=TOP_N_SECTIONS, mode="auto", nprobe=8):
+        """rank_sections_multi over the whole index: one list of top-N sections per prompt"""
+        prompt_embeds = np.atleast_2d(np.asarray(prompt_embeds, dtype=np.float32))
+        k = max(4 * top_n, 32)
+        pending = list(range(len(prompt_embeds)))
+        results = [None] * len(prompt_embeds)
+        while pending:
+            hits = self.search(prompt_embeds[pending], k, mode=mode, nprobe=nprobe)
+            retry = []
+            for j, (rows, scores) in zip(pending, hits):
+                sections = select_sections(self.blocks(rows), np.arange(len(rows)), scores, top_n)
+                # Near-duplicates filled the first k hits: fetch more
+                if len(sections) < top_n and len(rows) == k:
+                    retry.append(j)
+                else:
+                    results[j] = sections
+            pending, k = retry, k * 4
+        return results
+
+    def close(self):
+        if self.vectors is not None:
+            self._save()
+            self.vectors = None
+        self.db.close()
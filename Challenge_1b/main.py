@@ -1,77 +1,213 @@
 # main.py
 import argparse
+import json
 import multiprocessing as mp
+import os
+import time
+import numpy as np
 from parsing.doc_tag_parser import parse_pdf_to_blocks
 from embedding.embedder import EmbeddingEngine
-from ranking.section_ranker import rank_sections
-from chunking.subchunker import rank_chunks
+from ranking.section_ranker import candidate_mask, rank_sections_multi
+from ranking.query_ranker import embed_blocks, query_from_json, rank_queries
+from indexing.vector_index import VectorIndex
+from service.query_service import QueryService
 from output.formatter import build_output_json
 from utils.fast_filter import flatten_doc_blocks
 from config import *
 
-def parse_all_pdfs(pdf_model_input_list):
-    """Parallel parse all input PDFs to tagged blocks."""
-    results = []
+def _parse_one(doc_input):
+    return parse_pdf_to_blocks(*doc_input)
+
+def iter_parsed_pdfs(pdf_model_input_list):
+    """Parallel parse of the input PDFs; yields each document's blocks, in input order, as soon as it is ready."""
     with mp.Pool(N_PARSE_THREADS) as pool:
-        jobs = [pool.apply_async(parse_pdf_to_blocks, args=(pdf, tag_json, doc_nm))
-                for (pdf, tag_json, doc_nm) in pdf_model_input_list]
-        for j in jobs:
-            results.extend(j.get())
-    return results
+        yield from pool.imap(_parse_one, pdf_model_input_list)
+
+def parse_and_embed(embedder, pdfs):
+    """
+    Parses and embeds documents with the two stages overlapped: each document is
+    embedded here while the pool is still parsing the next ones. Returns (blocks, embeds).
+    """
+    blocks, embeds = [], []
+    for doc_blocks in iter_parsed_pdfs(pdfs):
+        doc_blocks = flatten_doc_blocks(doc_blocks)
+        if doc_blocks:
+            blocks.extend(doc_blocks)
+            embeds.append(np.asarray(embed_blocks(embedder, doc_blocks), dtype=np.float32))
+    return blocks, np.concatenate(embeds) if embeds else np.zeros((0, embedder.dim), dtype=np.float32)
+
+def load_queries(paths):
+    """
+    Reads persona/job queries from challenge1b_input.json-style files (one object, or a
+    list of them per file). Returns [{"name", "persona", "job"}].
+    """
+    queries = []
+    for path in paths:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        items = data if isinstance(data, list) else [data]
+        stem = os.path.splitext(os.path.basename(path))[0].replace("input", "output")
+        for i, item in enumerate(items):
+            query = query_from_json(item)
+            name = query["name"] or stem
+            query["name"] = name if len(items) == 1 else f"{name}_{i + 1}"
+            queries.append(query)
+    return queries
+
+def update_index(index, embedder, pdfs, remove=(), reindex=False):
+    """Adds documents not yet in the index (all of them with reindex) and drops `remove`."""
+    for name in remove:
+        if not index.remove_document(name, commit=False):
+            print(f"Not in index: {name}")
+    new = [d for d in pdfs if reindex or not index.has_document(d[2])]
+    if new:
+        blocks, embeds = parse_and_embed(embedder, new)
+        doc_rows = {}
+        for i, b in enumerate(blocks):
+            doc_rows.setdefault(b["document"], []).append(i)
+        for pdf_file, _, doc_nm in new:
+            rows = doc_rows.get(doc_nm, [])
+            index.add_document(doc_nm, pdf_file, [blocks[i] for i in rows], embeds[rows], commit=False)
+    if index.dead_rows() > index.n_rows // 2:
+        index.compact()
+    index.commit()
+    if index.needs_training(INDEX_IVF_MIN_ROWS):
+        index.train()
+    print(f"Index: {len(index.documents())} documents, {index.n_rows} blocks "
+          f"({len(new)} added, {len(remove)} removed{', IVF' if index.centroids is not None else ''})")
+
+def load_documents(embedder, pdfs):
+    """
+    Parses and embeds documents in memory. Returns (docs_metadata, section_ranker, block count);
+    section_ranker maps a prompt-embedding matrix to one section list per prompt.
+    """
+    docs_metadata = [{"name": d[2], "pdf_path": d[0]} for d in pdfs]
+
+    # ---- Parse (in parallel) and embed each document as it arrives
+    blocks, block_embeds = parse_and_embed(embedder, pdfs)
+    mask = candidate_mask(blocks)
+    section_ranker = lambda prompt_embeds: rank_sections_multi(blocks, block_embeds, prompt_embeds, mask=mask)
+    return docs_metadata, section_ranker, len(blocks)
 
 def main():
     parser = argparse.ArgumentParser(description="Persona-driven document section analyst (Round1b)")
-    parser.add_argument("--doc_inputs", nargs="+", metavar=('PDF', "TAGGED_JSON", "DOCNAME"),
-                        help="List of tuples: PDF path, model-tagged-JSON-path, document name")
-    parser.add_argument("--persona", required=True, help="Persona description string")
-    parser.add_argument("--job", required=True, help="Job-to-be-done/task string")
-    parser.add_argument("--outpath", required=True, help="Where to write output JSON")
+    parser.add_argument("--doc_inputs", nargs="+", metavar="PDF TAGGED_JSON DOCNAME",
+                        help="List of tuples: PDF path, model-tagged-JSON or Round 1A outline JSON path, document name")
+    parser.add_argument("--persona", help="Persona description string")
+    parser.add_argument("--job", help="Job-to-be-done/task string")
+    parser.add_argument("--outpath", help="Where to write output JSON")
+    parser.add_argument("--queries", nargs="+", metavar="INPUT_JSON",
+                        help="Batch mode: challenge1b_input.json-style query files, all ranked against the same documents")
+    parser.add_argument("--outdir", help="Batch mode: directory for the per-query output JSONs")
+    parser.add_argument("--index", metavar="DIR",
+                        help="Persistent vector index: --doc_inputs not yet indexed are added, ranking covers the whole index")
+    parser.add_argument("--index_mode", choices=["auto", "exact", "ivf"], default="auto",
+                        help="Index search: exact scan, IVF, or IVF once the index is trained (auto)")
+    parser.add_argument("--nprobe", type=int, default=INDEX_NPROBE, help="IVF lists scanned per query")
+    parser.add_argument("--remove_docs", nargs="+", default=[], metavar="DOCNAME", help="Remove documents from the index")
+    parser.add_argument("--reindex", action="store_true", help="Re-parse and re-embed --doc_inputs already in the index")
+    parser.add_argument("--serve", nargs="?", const="", default=None, metavar="HOST:PORT",
+                        help=f"Run as a resident query service (default {SERVICE_HOST}:{SERVICE_PORT}) over "
+                             "the --doc_inputs / --index collection")
+    parser.add_argument("--socket", default=None, help="Serve on this Unix socket path instead of TCP")
+    parser.add_argument("--backend", choices=["torch", "onnx"], default=EMBED_BACKEND,
+                        help="Embedding backend: PyTorch fp32 or ONNX Runtime")
+    parser.add_argument("--int8", action="store_true", default=EMBED_INT8,
+                        help="With --backend onnx: INT8 dynamic quantization (EMBED_QUANTIZATION)")
+    parser.add_argument("--cache_dir", default=EMBED_CACHE_DIR,
+                        help="Embedding cache directory (empty string disables the cache)")
     args = parser.parse_args()
+    if args.queries:
+        if not args.outdir:
+            parser.error("--queries needs --outdir")
+        queries = load_queries(args.queries)
+    elif args.persona and args.job and args.outpath:
+        queries = [{"name": None, "persona": args.persona, "job": args.job}]
+    elif args.index or args.serve is not None or args.socket:
+        queries = []  # index maintenance or service
+    else:
+        parser.error("give --persona, --job and --outpath, or --queries and --outdir")
+    if queries and not (args.doc_inputs or args.index):
+        parser.error("give --doc_inputs or --index")
+    if args.doc_inputs and len(args.doc_inputs) % 3:
+        parser.error("--doc_inputs takes PDF TAGGED_JSON DOCNAME triplets")
 
     # Example for N documents: args.doc_inputs =
     #   sample1.pdf sample1_tagged.json "Sample 1" sample2.pdf sample2_tagged.json "Sample 2" ...
 
-    # ---- Parse input PDF+JSON pairs
+    # ---- Parse input PDF+JSON pairs (once, whatever the number of queries)
     pdfs = []
-    for i in range(0, len(args.doc_inputs), 3):
+    for i in range(0, len(args.doc_inputs or []), 3):
         pdf_file, tag_json, doc_nm = args.doc_inputs[i:i+3]
         pdfs.append((pdf_file, tag_json, doc_nm))
-    doc_blocks = parse_all_pdfs(pdfs)
-    docs_metadata = [{"name": d[2], "pdf_path": d[0]} for d in pdfs]
-
-    # ---- Flatten blocks for batch embedding/scoring
-    blocks = flatten_doc_blocks(doc_blocks)
 
     # ---- Embedding setup
-    embedder = EmbeddingEngine(EMBEDDING_MODEL_NAME)
-    persona_job_prompt = f"{args.persona}\n\n{args.job}"
-    prompt_embed = embedder.embed_one(persona_job_prompt)
-    block_texts = []
-    for b in blocks:
-        if b["header_level"]:
-            block_text = f"{b['tag_type']} {b['header_level']}: {b['text']}"
-        else:
-            block_text = f"{b['tag_type']}: {b['text']}"
-        block_texts.append(block_text)
+    embedder = EmbeddingEngine(EMBEDDING_MODEL_NAME, cache_dir=args.cache_dir, cache_dtype=EMBED_CACHE_DTYPE,
+                               cache_max_entries=EMBED_CACHE_MAX_ENTRIES, backend=args.backend, int8=args.int8,
+                               quantization=EMBED_QUANTIZATION, export_dir=EMBED_EXPORT_DIR)
+
+    if args.index:
+        # ---- Build-once, query-many: only new documents are parsed and embedded
+        index = VectorIndex(args.index, embedder.dim, embedder.model_id, dtype=INDEX_DTYPE)
+        update_index(index, embedder, pdfs, args.remove_docs, args.reindex)
+        docs_metadata = index.documents()
+        section_ranker = lambda prompt_embeds: index.rank_sections(prompt_embeds, mode=args.index_mode,
+                                                                   nprobe=args.nprobe)
+    elif pdfs:
+        docs_metadata, section_ranker, _ = load_documents(embedder, pdfs)
 
-    block_embeds = embedder.embed_many(block_texts, batch_size=BATCH_EMBED_SIZE)
+    if args.serve is not None or args.socket:
+        # ---- Resident service: model and collection stay warm between requests
+        service = QueryService(embedder, loader=load_documents)
+        if args.index or pdfs:
+            service.add_collection("default", docs_metadata, section_ranker)
+        host, _, port = (args.serve or "").rpartition(":")
+        try:
+            service.serve(host or None, int(port) if port else None, socket_path=args.socket)
+        finally:
+            embedder.close()
+            if args.index:
+                index.close()
+        return
 
-    # ---- Section-level ranking
-    selected_sections = rank_sections(blocks, block_embeds, prompt_embed)
+    if not queries:
+        embedder.close()
+        if args.index:
+            index.close()
+        return
 
-    # ---- Fine-grained chunking within each section
-    sub_analysis_map = {}  # block_id -> list
-    for sec in selected_sections:
-        chunks = rank_chunks(sec["text"], embedder, prompt_embed)
-        sub_analysis_map[sec["block_id"]] = chunks
+    start = time.perf_counter()
+    results = rank_queries(embedder, queries, section_ranker)
+    elapsed = time.perf_counter() - start
 
-    # ---- Output JSON
-    output = build_output_json(docs_metadata, args.persona, args.job, selected_sections, sub_analysis_map)
-    with open(args.outpath, "w", encoding="utf-8") as f:
-        import json
-        json.dump(output, f, indent=2, ensure_ascii=False)
+    # ---- Output JSON (one file per query)
+    if args.queries:
+        os.makedirs(args.outdir, exist_ok=True)
+    used = set()
+    for query, (selected_sections, sub_analysis_map) in zip(queries, results):
+        output = build_output_json(docs_metadata, query["persona"], query["job"], selected_sections, sub_analysis_map)
+        if args.queries:
+            name = query["name"]
+            while name in used:
+                name += "_"
+            used.add(name)
+            outpath = os.path.join(args.outdir, f"{name}.json")
+        else:
+            outpath = args.outpath
+        with open(outpath, "w", encoding="utf-8") as f:
+            json.dump(output, f, indent=2, ensure_ascii=False)
+        print(f"Extracted/Ranked analysis written to {outpath}")
 
-    print(f"Extracted/Ranked analysis written to {args.outpath}")
+    if len(queries) > 1:
+        print(f"Ranked {len(queries)} queries in {elapsed:.2f}s ({len(queries) / max(elapsed, 1e-9):.1f} queries/s)")
+    stats = embedder.cache_stats()
+    if stats:
+        print(f"Embedding cache: {stats['hits']} hits / {stats['misses']} misses "
+              f"({stats['hit_rate']:.0%} hit rate), {stats['entries']}/{stats['max_entries']} entries, "
+              f"{stats['size_mb']:.1f} MB")
+    embedder.close()
+    if args.index:
+        index.close()
 
 if __name__ == "__main__":
     main()
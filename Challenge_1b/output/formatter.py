@@ -18,6 +18,7 @@ def build_output_json(docs_metadata, persona_desc, job_desc, selected_sections,
             "section_title": sec.get("text", ""),
             "section_level": sec.get("header_level", None),
             "page_number": sec["page_number"],
+            **({"page_end": sec["page_end"]} if "page_end" in sec else {}),
             "importance_rank": sec["importance_rank"],
             "similarity_score": sec["similarity_score"],
             "subsection_analysis": sub_analysis_map.get(sec["block_id"], []),
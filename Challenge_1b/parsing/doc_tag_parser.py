@@ -1,16 +1,128 @@
 # parsing/doc_tag_parser.py
+import difflib
 import fitz
 import json
 
-def parse_pdf_to_blocks(pdf_path: str, model_tagged_json_path: str, doc_name: str) -> list:
+HEADING_MATCH_RATIO = 0.85  # OCR'd Round 1A headings vs the text layer (difflib ratio)
+HEADING_MAX_LINES = 4  # a heading may be wrapped over this many lines
+
+def _norm(text):
+    """Lowercased alphanumerics only (as Round 1A's comparable_text): quotes, spacing and OCR punctuation drop out."""
+    return "".join(c for c in text.lower() if c.isalnum())
+
+def _page_lines(page):
+    """Text lines of a page in content order, as (paragraph number, line) pairs."""
+    lines = []
+    for x0, y0, x1, y1, text, block_no, block_type in page.get_text("blocks"):
+        if block_type == 0:
+            lines.extend((block_no, line) for line in text.split("\n") if line.strip())
+    return lines
+
+def _find_heading(lines, start, heading):
     """
-    Loads the output from your custom model (tagged elements per page, JSON format)
-    and returns canonical block dicts per element with: doc, page, tag, (if sec) header level, text, etc.
+    (first, end) line positions of a heading at or after `start`, or None. Lines are
+    joined until they are as long as the heading (it may be wrapped), and the best
+    join must be a close match, so OCR slips and stray characters are tolerated.
     """
-    with open(model_tagged_json_path, "r", encoding="utf-8") as f:
-        tag_data = json.load(f)  # [{page, tag, ...}, ...]
+    target = _norm(heading)
+    if not target:
+        return None
+    matcher = difflib.SequenceMatcher(autojunk=False)
+    matcher.set_seq2(target)
+    for i in range(start, len(lines)):
+        joined, best, best_end = "", 0.0, None
+        for end in range(i + 1, min(i + HEADING_MAX_LINES, len(lines)) + 1):
+            joined += _norm(lines[end - 1][1])
+            if not joined:
+                break
+            matcher.set_seq1(joined)
+            if matcher.real_quick_ratio() >= HEADING_MATCH_RATIO and matcher.quick_ratio() >= HEADING_MATCH_RATIO:
+                ratio = matcher.ratio()
+                if ratio > best:
+                    best, best_end = ratio, end
+            if len(joined) >= len(target):
+                break
+        if best >= HEADING_MATCH_RATIO:
+            return i, best_end
+    return None
+
+def _place_headings(lines, headings):
+    """
+    (first, end, heading) for the headings of one page, in page order. Each is matched
+    after the previous one, else anywhere on the page (outline and content order can
+    differ); a heading that is not found is placed right after the previous one.
+    """
+    claimed, placed, anchor = set(), [], 0
+    for n, heading in enumerate(headings):
+        found = None
+        for start in (anchor, 0):
+            found = _find_heading(lines, start, heading["text"])
+            while found is not None and found[0] in claimed:
+                found = _find_heading(lines, found[0] + 1, heading["text"])
+            if found is not None:
+                break
+        first, end = found if found is not None else (anchor, anchor)
+        claimed.add(first)
+        anchor = end
+        placed.append((first, n, end, heading))
+    return [(first, end, heading) for first, n, end, heading in sorted(placed, key=lambda p: p[:2])]
+
+def _section_block(doc_name, number, section, body_lines):
+    paragraphs = []
+    last = None
+    for key, line in body_lines:
+        if key == last:
+            paragraphs[-1] += " " + line.strip()
+        else:
+            paragraphs.append(line.strip())
+        last = key
+    return {
+        'document': doc_name,
+        'page_number': section["page"],
+        'page_end': body_lines[-1][0][0] if body_lines else section["page"],
+        'tag_type': section["tag_type"],
+        'header_level': section["level"],
+        'text': section["text"],
+        'body': "\n\n".join(paragraphs),
+        'block_id': f'{doc_name}|{section["page"]}|{number}',
+    }
 
-    blocks = []
+def iter_outline_blocks(pdf_path: str, outline: dict, doc_name: str):
+    """
+    Streams one block per Round 1A heading ({title, outline: [{level, text, page}]}):
+    the PDF is opened once and its text layer between consecutive headings becomes the
+    section body, spanning page_number..page_end. Blocks are yielded as soon as the next
+    heading is reached, so a consumer can embed while the rest is still being read.
+    """
+    headings = [h for h in outline.get("outline", []) if str(h.get("text", "")).strip()]
+    title = str(outline.get("title") or "").strip()
+    with fitz.open(pdf_path) as doc:
+        n_pages = doc.page_count
+        # Text before the first heading belongs to the document title, when there is one
+        section = {"tag_type": "Title", "level": None, "text": title, "page": 1} if title else None
+        body, number, h = [], 0, 0
+        for page_no in range(1, n_pages + 1):
+            lines = _page_lines(doc[page_no - 1])
+            on_page = []
+            while h < len(headings) and min(max(int(headings[h].get("page", 1)), 1), n_pages) <= page_no:
+                on_page.append({"level": headings[h].get("level"), "text": " ".join(str(headings[h]["text"]).split())})
+                h += 1
+            pos = 0
+            for first, end, heading in _place_headings(lines, on_page):
+                body.extend(((page_no, key), line) for key, line in lines[pos:first])
+                # A title that only repeats the first heading has no body of its own
+                if section is not None and (body or section["tag_type"] != "Title"):
+                    yield _section_block(doc_name, number, section, body)
+                    number += 1
+                section = {"tag_type": "Section-header", "page": page_no, **heading}
+                body, pos = [], max(pos, end)
+            if section is not None:
+                body.extend(((page_no, key), line) for key, line in lines[pos:])
+        if section is not None:
+            yield _section_block(doc_name, number, section, body)
+
+def iter_tagged_blocks(tag_data: list, doc_name: str):
+    """Canonical block dicts for tagged elements per page ([{page, tag_type, text, ...}, ...])."""
     for item in tag_data:
         tag_type = item.get("tag_type")
         if tag_type in ["Section-header", "Title"]:
@@ -18,7 +130,7 @@ def parse_pdf_to_blocks(pdf_path: str, model_tagged_json_path: str, doc_name: st
         else:
             header_level = None
 
-        block = {
+        yield {
             'document': doc_name,
             'page_number': item["page"],
             'tag_type': tag_type,
@@ -26,5 +138,20 @@ def parse_pdf_to_blocks(pdf_path: str, model_tagged_json_path: str, doc_name: st
             'text': item["text"],
             'block_id': f'{doc_name}|{item["page"]}|{item.get("block_number", 0)}',
         }
-        blocks.append(block)
-    return blocks
+
+def iter_pdf_blocks(pdf_path: str, model_tagged_json_path: str, doc_name: str):
+    """Lazily yields the blocks of one document from either input format."""
+    with open(model_tagged_json_path, "r", encoding="utf-8") as f:
+        tag_data = json.load(f)
+    if isinstance(tag_data, dict) and "outline" in tag_data:
+        return iter_outline_blocks(pdf_path, tag_data, doc_name)  # Round 1A output
+    return iter_tagged_blocks(tag_data, doc_name)
+
+def parse_pdf_to_blocks(pdf_path: str, model_tagged_json_path: str, doc_name: str) -> list:
+    """
+    Loads the output from your custom model (tagged elements per page, JSON format)
+    or a Round 1A outline JSON, and returns canonical block dicts per element with:
+    doc, page, tag, (if sec) header level, text, etc. Outline sections also carry
+    their body text and page_end.
+    """
+    return list(iter_pdf_blocks(pdf_path, model_tagged_json_path, doc_name))
@@ -0,0 +1,50 @@
+# ranking/query_ranker.py
+from chunking.subchunker import rank_chunks_multi
+from config import BATCH_EMBED_SIZE
+
+def _field(value, key):
+    return value.get(key, "") if isinstance(value, dict) else (value or "")
+
+def query_from_json(item):
+    """{"name", "persona", "job"} from a challenge1b_input.json-style object (plain "persona"/"job" strings work too)."""
+    return {
+        "name": (item.get("challenge_info") or {}).get("test_case_name"),
+        "persona": _field(item.get("persona"), "role"),
+        "job": _field(item.get("job_to_be_done", item.get("job")), "task"),
+    }
+
+def embed_blocks(embedder, blocks):
+    block_texts = []
+    for b in blocks:
+        if b["header_level"]:
+            block_text = f"{b['tag_type']} {b['header_level']}: {b['text']}"
+        else:
+            block_text = f"{b['tag_type']}: {b['text']}"
+        if b.get("body"):
+            block_text += "\n" + b["body"]  # outline sections: heading plus the start of its body
+        block_texts.append(block_text)
+    return embedder.embed_many(block_texts, batch_size=BATCH_EMBED_SIZE)
+
+def rank_queries(embedder, queries, section_ranker):
+    """
+    Ranks sections and sub-chunks for every query: prompts are embedded together and
+    section_ranker scores them against the corpus in one go (one matrix-matrix product
+    in memory, or an index search). Returns [(selected_sections, sub_analysis_map)] in query order.
+    """
+    prompts = [f"{q['persona']}\n\n{q['job']}" for q in queries]
+    prompt_embeds = embedder.embed_queries(prompts, batch_size=BATCH_EMBED_SIZE)
+    return rank_prompts(embedder, prompt_embeds, section_ranker)
+
+def rank_prompts(embedder, prompt_embeds, section_ranker):
+    """rank_queries for prompts that are already embedded."""
+    # ---- Section-level ranking
+    all_sections = section_ranker(prompt_embeds)
+
+    # ---- Fine-grained chunking within each section (all paragraphs in one embedding pass)
+    all_chunks = rank_chunks_multi([[sec.get("body") or sec["text"] for sec in sections] for sections in all_sections],
+                                   embedder, prompt_embeds, batch_size=BATCH_EMBED_SIZE)
+    results = []
+    for sections, chunks in zip(all_sections, all_chunks):
+        sub_analysis_map = {sec["block_id"]: c for sec, c in zip(sections, chunks)}  # block_id -> list
+        results.append((sections, sub_analysis_map))
+    return results
@@ -5,29 +5,78 @@ from config import DROP_TAGS, TOP_N_SECTIONS, MIN_SECTION_CHAR_LEN
 def score_one_block(block_embed, prompt_embed):
     return float(np.dot(block_embed, prompt_embed))  # cosine similarity (embeddings normalized)
 
-def rank_sections(blocks, block_embeds, prompt_embed):
-    """Returns top-N ranked sections with all relevant metadata."""
-    scored_blocks = []
-    for block, embed in zip(blocks, block_embeds):
-        if block['tag_type'] in DROP_TAGS:
-            continue
-        if len(block['text']) < MIN_SECTION_CHAR_LEN:
-            continue
-        s = score_one_block(embed, prompt_embed)
-        scored_blocks.append((s, block))
-    # Sort by score descending; remove near-duplicate sections by block_id/text hash if needed
-    scored_blocks = sorted(scored_blocks, key=lambda x: -x[0])
+def candidate_mask(blocks):
+    """Boolean mask of blocks eligible as sections (not a dropped tag, long enough incl. any section body)."""
+    return np.fromiter((b['tag_type'] not in DROP_TAGS and len(b['text']) + len(b.get('body', '')) >= MIN_SECTION_CHAR_LEN
+                        for b in blocks),
+                       dtype=bool, count=len(blocks))
+
+def top_k_order(scores, k):
+    """
+    Indices of the k best scores, best first; equal scores keep input order, so the
+    result is exactly the first k entries of a stable descending sort.
+    """
+    n = len(scores)
+    if k >= n:
+        return np.lexsort((np.arange(n), -scores))
+    kth = np.partition(scores, n - k)[n - k]
+    # Everything above the k-th score plus all ties with it, then a small stable sort
+    cand = np.flatnonzero(scores >= kth)
+    return cand[np.lexsort((cand, -scores[cand]))][:k]
+
+def select_sections(blocks, candidates, scores, top_n=TOP_N_SECTIONS):
+    """
+    Top-N deduplicated sections from precomputed candidate scores (candidates: block
+    indices, scores: their similarities). importance_rank is the position in the full
+    score order, duplicates included.
+    """
     results = []
     seen = set()
-    for rank, (score, block) in enumerate(scored_blocks):
-        hash_ = hash(block["text"][:80])
-        if hash_ in seen:
-            continue
-        seen.add(hash_)
-        d = dict(block)
-        d["importance_rank"] = rank + 1
-        d["similarity_score"] = score
-        results.append(d)
-        if len(results) == TOP_N_SECTIONS:
-            break
+    k = min(len(scores), max(2 * top_n, 16))
+    done = 0
+    while done < len(scores) and len(results) < top_n:
+        order = top_k_order(scores, k)
+        for rank in range(done, len(order)):
+            block = blocks[candidates[order[rank]]]
+            key = (block["text"][:80], block.get("body", "")[:80])  # same heading in two documents is not a duplicate
+            if key in seen:
+                continue
+            seen.add(key)
+            d = dict(block)
+            d["importance_rank"] = rank + 1
+            d["similarity_score"] = float(scores[order[rank]])
+            results.append(d)
+            if len(results) == top_n:
+                break
+        # Too many near-duplicates in the first k: widen the window
+        done, k = len(order), min(len(scores), k * 4)
     return results
+
+def rank_sections(blocks, block_embeds, prompt_embed, top_n=TOP_N_SECTIONS, mask=None):
+    """
+    Returns top-N ranked sections with all relevant metadata. All blocks are scored in
+    one matrix-vector product; pass a precomputed candidate_mask to reuse it across queries.
+    """
+    if not len(blocks):
+        return []
+    candidates = np.flatnonzero(candidate_mask(blocks) if mask is None else mask)
+    if not len(candidates):
+        return []
+    # Scoring every row and then indexing beats copying the candidate rows out first
+    scores = (np.asarray(block_embeds) @ np.asarray(prompt_embed))[candidates]
+    return select_sections(blocks, candidates, scores, top_n)
+
+def rank_sections_multi(blocks, block_embeds, prompt_embeds, top_n=TOP_N_SECTIONS, mask=None):
+    """
+    rank_sections for many prompts at once: one (blocks x prompts) matrix product,
+    then the usual top-N selection per prompt column. Returns one list per prompt.
+    """
+    prompt_embeds = np.atleast_2d(np.asarray(prompt_embeds))
+    if not len(blocks):
+        return [[] for _ in prompt_embeds]
+    candidates = np.flatnonzero(candidate_mask(blocks) if mask is None else mask)
+    if not len(candidates):
+        return [[] for _ in prompt_embeds]
+    scores = (np.asarray(block_embeds) @ prompt_embeds.T)[candidates]
+    return [select_sections(blocks, candidates, np.ascontiguousarray(scores[:, j]), top_n)
+            for j in range(len(prompt_embeds))]
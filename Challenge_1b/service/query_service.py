@@ -0,0 +1,237 @@
+# service/query_service.py
+import http.server
+import json
+import os
+import queue
+import socketserver
+import threading
+import time
+from collections import Counter
+import numpy as np
+from ranking.query_ranker import query_from_json, rank_prompts
+from output.formatter import build_output_json
+from config import (BATCH_EMBED_SIZE, SERVICE_HOST, SERVICE_PORT, SERVICE_BATCH_WINDOW_MS, SERVICE_MAX_BATCH,
+                    SERVICE_QUEUE_SIZE, SERVICE_REQUEST_TIMEOUT)
+
+
+class _ThreadingHTTPServer(http.server.ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 128  # many concurrent clients connect at once; the default backlog of 5 resets them
+
+
+class _ThreadingUnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+    request_queue_size = 128
+
+
+class _QueryRequestHandler(http.server.BaseHTTPRequestHandler):
+    """
+    POST /query        JSON {"persona", "job"} or a challenge1b_input.json object,
+                       optional "collection" (default: "default")
+    POST /collections  JSON {"name", "doc_inputs": [[pdf, tagged_json, docname], ...]}
+    GET  /health       collections, queue depth, request and batch counters
+    """
+    protocol_version = "HTTP/1.1"
+    service = None  # bound by QueryService.serve
+
+    def address_string(self):
+        # Unix-socket peers have no address
+        return self.client_address[0] if self.client_address else "unix"
+
+    def log_message(self, format, *args):
+        pass  # one line per request would dominate the cost of a query
+
+    def _send(self, status, body, headers=None):
+        data = body.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _send_error(self, status, message, headers=None):
+        self._send(status, json.dumps({"error": message}), headers=headers)
+
+    def _read_json(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        try:
+            body = json.loads(self.rfile.read(length)) if length > 0 else None
+        except ValueError:
+            body = None
+        if not isinstance(body, dict):
+            self._send_error(400, "expected a JSON object")
+            return None
+        return body
+
+    def do_GET(self):
+        if self.path != "/health":
+            self._send_error(404, "not found")
+            return
+        self._send(200, json.dumps(self.service.health()))
+
+    def do_POST(self):
+        if self.path not in ("/query", "/collections"):
+            self._send_error(404, "not found")
+            return
+        body = self._read_json()
+        if body is None:
+            return
+
+        if self.path == "/collections":
+            try:
+                name = body["name"]
+                docs = [tuple(d) for d in body["doc_inputs"]]
+            except (KeyError, TypeError):
+                self._send_error(400, 'expected {"name": ..., "doc_inputs": [[pdf, tagged_json, docname], ...]}')
+                return
+            try:
+                count = self.service.load_collection(name, docs)
+            except Exception as e:
+                self._send_error(500, str(e))
+                return
+            self._send(200, json.dumps({"name": name, "blocks": count}))
+            return
+
+        query = query_from_json(body)
+        if not query["persona"] and not query["job"]:
+            self._send_error(400, "expected persona and job")
+            return
+        collection = body.get("collection", "default")
+        if collection not in self.service.collections:
+            self._send_error(404, f"no such collection: {collection}")
+            return
+        try:
+            job = self.service.submit(query, collection)
+        except queue.Full:
+            self._send_error(503, "server busy, retry later", headers={"Retry-After": "1"})
+            return
+        if not job["done"].wait(self.service.request_timeout):
+            self._send_error(504, "timed out waiting for the ranking")
+        elif job["error"] is not None:
+            self._send_error(500, str(job["error"]))
+        else:
+            self._send(200, json.dumps(job["result"], indent=2, ensure_ascii=False))
+
+
+class QueryService:
+    """
+    Resident Round 1B query service. The embedding model and the embedded
+    collections stay in memory. One batcher thread owns the model: it takes
+    the first queued request, waits up to batch_window_ms for more (at most
+    max_batch), embeds all their prompts in one call and ranks each
+    collection's share with one matrix product. A full queue answers 503.
+    """
+
+    def __init__(self, embedder, loader=None, batch_window_ms=SERVICE_BATCH_WINDOW_MS, max_batch=SERVICE_MAX_BATCH,
+                 queue_size=SERVICE_QUEUE_SIZE, request_timeout=SERVICE_REQUEST_TIMEOUT):
+        self.embedder = embedder
+        self.loader = loader  # (embedder, [(pdf, tagged_json, docname)]) -> (docs_metadata, section_ranker, n_blocks)
+        self.collections = {}  # name -> (docs_metadata, section_ranker)
+        self.batch_window = batch_window_ms / 1000
+        self.max_batch = max(1, int(max_batch))
+        self.request_timeout = float(request_timeout)
+        self.jobs = queue.Queue(maxsize=max(1, int(queue_size)))
+        self.model_lock = threading.Lock()
+        self.stats = Counter()
+        self.stats_lock = threading.Lock()
+        threading.Thread(target=self._work, daemon=True, name="query-batcher").start()
+
+    def add_collection(self, name, docs_metadata, section_ranker):
+        self.collections[name] = (docs_metadata, section_ranker)
+
+    def load_collection(self, name, docs):
+        """Parse and embed documents into a new (or replaced) collection; returns its block count"""
+        if self.loader is None:
+            raise RuntimeError("this service cannot load collections")
+        with self.model_lock:
+            docs_metadata, section_ranker, n_blocks = self.loader(self.embedder, docs)
+        self.add_collection(name, docs_metadata, section_ranker)
+        return n_blocks
+
+    def submit(self, query, collection):
+        """Queue one query; raises queue.Full when the service is saturated"""
+        job = {"query": query, "collection": collection, "done": threading.Event(), "result": None, "error": None}
+        try:
+            self.jobs.put_nowait(job)
+        except queue.Full:
+            self._count("rejected")
+            raise
+        return job
+
+    def _count(self, name, n=1):
+        with self.stats_lock:
+            self.stats[name] += n
+
+    def _next_batch(self):
+        batch = [self.jobs.get()]
+        deadline = time.monotonic() + self.batch_window
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.monotonic()
+            try:
+                batch.append(self.jobs.get(timeout=remaining) if remaining > 0 else self.jobs.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _work(self):
+        while True:
+            batch = self._next_batch()
+            try:
+                with self.model_lock:
+                    self._run(batch)
+                self._count("completed", len(batch))
+            except Exception as e:
+                for job in batch:
+                    job["error"] = e
+                self._count("failed", len(batch))
+            finally:
+                self._count("batches")
+                for job in batch:
+                    job["done"].set()
+
+    def _run(self, batch):
+        prompts = [f"{job['query']['persona']}\n\n{job['query']['job']}" for job in batch]
+        prompt_embeds = np.atleast_2d(self.embedder.embed_queries(prompts, batch_size=BATCH_EMBED_SIZE))
+        by_collection = {}
+        for i, job in enumerate(batch):
+            by_collection.setdefault(job["collection"], []).append(i)
+        for name, rows in by_collection.items():
+            docs_metadata, section_ranker = self.collections[name]
+            results = rank_prompts(self.embedder, prompt_embeds[rows], section_ranker)
+            for i, (selected_sections, sub_analysis_map) in zip(rows, results):
+                query = batch[i]["query"]
+                batch[i]["result"] = build_output_json(docs_metadata, query["persona"], query["job"],
+                                                       selected_sections, sub_analysis_map)
+
+    def health(self):
+        with self.stats_lock:
+            stats = dict(self.stats)
+        completed, batches = stats.get("completed", 0), stats.get("batches", 0)
+        return {"status": "ok", "collections": sorted(self.collections), "queued": self.jobs.qsize(),
+                "queue_size": self.jobs.maxsize, "mean_batch": round(completed / batches, 2) if batches else 0.0,
+                **stats}
+
+    def serve(self, host=None, port=None, socket_path=None):
+        """Serve over TCP, or over a Unix socket when socket_path is given, until interrupted"""
+        # Responses are headers + body in two writes; without TCP_NODELAY each one waits on a delayed ACK
+        handler = type("QueryRequestHandler", (_QueryRequestHandler,),
+                       {"service": self, "disable_nagle_algorithm": not socket_path})
+        if socket_path:
+            if os.path.exists(socket_path):
+                os.unlink(socket_path)
+            server = _ThreadingUnixHTTPServer(socket_path, handler)
+            where = f"unix:{socket_path}"
+        else:
+            server = _ThreadingHTTPServer((host or SERVICE_HOST, port or SERVICE_PORT), handler)
+            where = f"http://{server.server_address[0]}:{server.server_address[1]}"
+        print(f"Query service listening on {where} (collections: {', '.join(sorted(self.collections)) or 'none'})")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            print("Shutting down query service")
+        finally:
+            server.server_close()
+            if socket_path and os.path.exists(socket_path):
+                os.unlink(socket_path)
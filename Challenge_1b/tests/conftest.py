@@ -0,0 +1,6 @@
+# tests/conftest.py
+import sys
+from pathlib import Path
+
+# Modules are imported the way main.py imports them (config, embedding.*, ...)
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
@@ -0,0 +1,62 @@
+# tests/test_cache.py
+import multiprocessing as mp
+
+import numpy as np
+
+from embedding.cache import EmbeddingCache, text_key
+
+DIM = 8
+
+
+def vector(key):
+    return np.random.default_rng(int(text_key(key)[:8], 16)).standard_normal(DIM).astype(np.float32)
+
+
+def check(cache, keys):
+    found = cache.get_many(keys)
+    assert sorted(found) == sorted(keys)
+    for key in keys:
+        np.testing.assert_array_equal(found[key], vector(key))
+    slots = [s for (s,) in cache.db.execute("SELECT slot FROM entries")]
+    assert len(slots) == len(set(slots))
+
+
+def test_reput_does_not_share_slots(tmp_path):
+    cache = EmbeddingCache(str(tmp_path), "model", DIM, dtype="float32")
+    cache.put_many(["a", "b", "c"], [vector(k) for k in "abc"])
+    cache.put_many(["b"], [vector("b")])  # already cached
+    cache.put_many(["d"], [vector("d")])
+    check(cache, list("abcd"))
+    cache.close()
+
+
+def test_eviction_reuses_lru_slots(tmp_path):
+    cache = EmbeddingCache(str(tmp_path), "model", DIM, dtype="float32", max_entries=3)
+    cache.put_many(["a", "b", "c"], [vector(k) for k in "abc"])
+    cache.get_many(["a", "c"])
+    cache.put_many(["c", "d"], [vector(k) for k in "cd"])  # c is cached, d evicts b
+    check(cache, ["a", "c", "d"])
+    assert cache.get_many(["b"]) == {}
+    cache.close()
+
+
+def _writer(cache_dir, prefix, n):
+    cache = EmbeddingCache(cache_dir, "model", DIM, dtype="float32")
+    for i in range(0, n, 7):
+        keys = [f"{prefix}{j}" for j in range(i, min(i + 7, n))] + ["shared"]
+        cache.put_many(keys, [vector(k) for k in keys])
+    cache.close()
+
+
+def test_processes_sharing_a_directory(tmp_path):
+    EmbeddingCache(str(tmp_path), "model", DIM, dtype="float32").close()
+    ctx = mp.get_context("spawn")
+    procs = [ctx.Process(target=_writer, args=(str(tmp_path), p, 3000)) for p in "xyz"]
+    for p in procs:
+        p.start()
+    for p in procs:
+        p.join()
+        assert p.exitcode == 0
+    cache = EmbeddingCache(str(tmp_path), "model", DIM, dtype="float32")
+    check(cache, [f"{p}{j}" for p in "xyz" for j in range(3000)] + ["shared"])
+    cache.close()
@@ -0,0 +1,47 @@
+# tests/test_doc_tag_parser.py
+import json
+
+import fitz
+
+from parsing.doc_tag_parser import parse_pdf_to_blocks
+
+PAGES = [
+    [("Ontario’s Libraries Working Together", 18),
+     ("Libraries across the province share one digital collection.", 10),
+     ("Parsippany -Troy Hills STEM Pathways", 18),
+     ("Students complete four credits of math and science.", 10)],
+    [("Appendix B: Steering Committee Terms of", 18),
+     ("Reference for the Digital Library", 18),
+     ("The committee meets four times a year.", 10)],
+]
+
+# Round 1A headings as OCR reads them: no apostrophe, leading junk, one line for a wrapped title
+OUTLINE = {"title": "", "outline": [
+    {"level": "H1", "text": "Ontarios Libraries Working Together", "page": 1},
+    {"level": "H2", "text": "S[@fParsippany -Troy Hills STEM Pathways", "page": 1},
+    {"level": "H1", "text": "Appendix B: Steering Committee Terms of Reference for the Digital Library", "page": 2},
+]}
+
+
+def write_inputs(tmp_path):
+    doc = fitz.open()
+    for lines in PAGES:
+        page = doc.new_page()
+        y = 72
+        for text, size in lines:
+            page.insert_text((72, y), text, fontsize=size)
+            y += 2.2 * size
+    pdf = tmp_path / "doc.pdf"
+    doc.save(str(pdf))
+    outline = tmp_path / "doc.json"
+    outline.write_text(json.dumps(OUTLINE), encoding="utf-8")
+    return str(pdf), str(outline)
+
+
+def test_ocr_noisy_headings_get_their_own_bodies(tmp_path):
+    blocks = parse_pdf_to_blocks(*write_inputs(tmp_path), "Doc")
+    assert [b["text"] for b in blocks] == [h["text"] for h in OUTLINE["outline"]]
+    assert blocks[0]["body"] == "Libraries across the province share one digital collection."
+    assert blocks[1]["body"] == "Students complete four credits of math and science."
+    assert blocks[2]["body"] == "The committee meets four times a year."
+    assert [(b["page_number"], b["page_end"]) for b in blocks] == [(1, 1), (1, 1), (2, 2)]
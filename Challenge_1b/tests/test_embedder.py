@@ -0,0 +1,62 @@
+# tests/test_embedder.py
+import numpy as np
+import pytest
+
+pytest.importorskip("sentence_transformers")
+pytest.importorskip("onnxruntime")
+pytest.importorskip("optimum.onnxruntime", exc_type=ImportError)  # also skip on a transformers mismatch
+
+import sentence_transformers
+from embedding.embedder import load_sentence_model, onnx_model_dir
+
+TEXTS = ["plan a trip for friends", "nice is famous for its promenade", "fill and sign forms"]
+
+
+@pytest.fixture(scope="module")
+def model_path(tmp_path_factory):
+    """A tiny randomly initialised BERT sentence model, so the test needs no hub access"""
+    from transformers import BertConfig, BertModel, BertTokenizerFast
+    from sentence_transformers import SentenceTransformer, models
+
+    root = tmp_path_factory.mktemp("tiny_model")
+    words = "[PAD] [UNK] [CLS] [SEP] [MASK] plan a trip for friends nice is famous its promenade fill and sign forms"
+    (root / "vocab.txt").write_text("\n".join(words.split()), encoding="utf-8")
+    BertTokenizerFast(vocab_file=str(root / "vocab.txt")).save_pretrained(str(root / "bert"))
+    config = BertConfig(vocab_size=len(words.split()), hidden_size=32, num_hidden_layers=2, num_attention_heads=2,
+                        intermediate_size=64)
+    BertModel(config).save_pretrained(str(root / "bert"))
+    transformer = models.Transformer(str(root / "bert"))
+    pooling = models.Pooling(transformer.get_word_embedding_dimension())
+    SentenceTransformer(modules=[transformer, pooling], device="cpu").save(str(root / "model"))
+    return str(root / "model")
+
+
+@pytest.fixture(scope="module")
+def export_dir(tmp_path_factory):
+    return str(tmp_path_factory.mktemp("onnx_models"))
+
+
+@pytest.fixture(scope="module")
+def fp32_onnx(model_path, export_dir):
+    return load_sentence_model(model_path, "onnx", export_dir=export_dir, threads=1, inter_threads=1)
+
+
+@pytest.mark.parametrize("quantization", ["avx2", "avx512_vnni"])
+def test_int8_export_reloads_without_reexport(model_path, fp32_onnx, export_dir, quantization, monkeypatch):
+    model = load_sentence_model(model_path, "onnx", int8=True, quantization=quantization,
+                                export_dir=export_dir, threads=1, inter_threads=1)
+    path, file_name = onnx_model_dir(model_path, export_dir, quantization)
+    assert file_name == f"onnx/model_int8_{quantization}.onnx"
+
+    # A second load must find the exported file instead of quantizing again
+    def no_export(*args, **kwargs):
+        raise AssertionError("re-exported an existing INT8 model")
+    monkeypatch.setattr(sentence_transformers, "export_dynamic_quantized_onnx_model", no_export)
+    reloaded = load_sentence_model(model_path, "onnx", int8=True, quantization=quantization,
+                                   export_dir=export_dir, threads=1, inter_threads=1)
+
+    reference = fp32_onnx.encode(TEXTS, normalize_embeddings=True)
+    first = model.encode(TEXTS, normalize_embeddings=True)
+    again = reloaded.encode(TEXTS, normalize_embeddings=True)
+    np.testing.assert_allclose(first, again, atol=1e-6)
+    assert np.min(np.sum(first * reference, axis=1)) > 0.9